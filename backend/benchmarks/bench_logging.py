@@ -0,0 +1,111 @@
+"""Benchmark: per-request cost of logging on the request thread.
+
+Replays the log calls of one GET /api/v1/targets/<id> request (controller,
+service, repository and request middleware) against a file handler, and
+compares the previous setup (synchronous handler, f-strings, all record
+attributes) with configure_logging's (queued %-style, unused record
+attributes skipped):
+
+    python -m benchmarks.bench_logging [--requests 20000]
+
+Reported times are measured on the calling (request) thread; the "drained"
+column includes waiting for the background writer to finish.
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from src.logging_pipeline import install_pipeline, sample_request, skip_unused_record_attributes
+
+FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def request_fstring(logger: logging.Logger, request_id: str, target_id: str) -> None:
+    """Log calls of one request as written before (eager f-strings)."""
+    logger.debug(f"[{request_id}] GET /api/v1/targets/{target_id}")
+    logger.info(f"[{request_id}] Getting target: {target_id}")
+    logger.debug(f"Getting target by ID: {target_id}")
+    logger.debug(f"Fetching target by ID: {target_id}")
+    logger.debug(f"Found target: {target_id}")
+    logger.info(f"[{request_id}] GET /api/v1/targets/{target_id} -> 200 ({1.2345:.2f}ms)")
+
+
+def request_lazy(logger: logging.Logger, request_id: str, target_id: str) -> None:
+    """Log calls of one request with lazy %-style arguments."""
+    logger.debug("[%s] GET /api/v1/targets/%s", request_id, target_id)
+    logger.info("[%s] Getting target: %s", request_id, target_id)
+    logger.debug("Getting target by ID: %s", target_id)
+    logger.debug("Fetching target by ID: %s", target_id)
+    logger.debug("Found target: %s", target_id)
+    logger.info("[%s] GET /api/v1/targets/%s -> %s (%.2fms)", request_id, target_id, 200, 1.2345)
+
+
+def _file_handler(path: Path) -> logging.Handler:
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter(FORMAT))
+    return handler
+
+
+def _logger(name: str, level: int) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+def run_case(name, log_request, level, requests, directory, queued=False, sample_rate=1.0):
+    """Time `requests` simulated requests; returns (request-thread us, drained us) per request."""
+    logger = _logger(name, level)
+    handler = _file_handler(directory / f"{name}.log")
+    pipeline = None
+    if queued:
+        pipeline = install_pipeline([handler], logger)
+    else:
+        logger.addHandler(handler)
+
+    ids = [(str(uuid.uuid4()), str(uuid.uuid4())) for _ in range(requests)]
+    started = time.perf_counter()
+    for request_id, target_id in ids:
+        if queued:
+            sample_request(sample_rate)
+        log_request(logger, request_id, target_id)
+    request_thread = time.perf_counter() - started
+    if pipeline is not None:
+        pipeline.stop()
+    drained = time.perf_counter() - started
+    handler.close()
+    return request_thread / requests * 1e6, drained / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    before = [
+        ("before: sync f-string, INFO", request_fstring, logging.INFO, {}),
+        ("before: sync f-string, WARNING", request_fstring, logging.WARNING, {}),
+    ]
+    after = [
+        ("after: queued %-style, INFO", request_lazy, logging.INFO, {"queued": True}),
+        ("after: queued, INFO, 10% sampled", request_lazy, logging.INFO,
+         {"queued": True, "sample_rate": 0.1}),
+        ("after: %-style, WARNING", request_lazy, logging.WARNING, {}),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'case':<36} {'request us':>11} {'drained us':>11}")
+        for index, (name, log_request, level, options) in enumerate(before + after):
+            if index == len(before):
+                skip_unused_record_attributes(FORMAT)
+            request_us, drained_us = run_case(
+                f"case{index}", log_request, level, args.requests, Path(tmp), **options
+            )
+            print(f"{name:<36} {request_us:>11.2f} {drained_us:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Benchmark: target repository, service, converters and JSON serialization.
+
+Builds datasets of increasing size from the tests/factories generators and
+times every TargetRepository and TargetService operation on them:
+
+    python -m benchmarks.bench_targets [--sizes 1000 100000 1000000]
+                                       [--output results.json] [--compare baseline.json]
+
+For every operation and size it reports throughput, p50/p99 latency and the
+peak memory allocated by one call (measured separately with tracemalloc, so
+the timings are not slowed down by it). Results are written as JSON
+(default: benchmarks/results/targets-<timestamp>.json); --compare prints the
+change against an earlier results file and exits with status 1 if any p50
+got slower by more than --threshold.
+"""
+
+import argparse
+import csv
+import dataclasses
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from flask import Flask
+
+from src.api.controllers.targets_controller import _target_to_dict
+from src.bl.history_service import HistoryService
+from src.bl.target_service import TargetService
+from src.dal.converters.entity_converter import (
+    entity_to_row,
+    plain_to_entity,
+    plain_to_row,
+    row_to_entity,
+    row_to_plain,
+)
+from src.dal.entities.target_entity import TargetEntity
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.target_repository import TargetRepository
+from src.models.target import Target, TargetUpdate
+from tests.factories import create_random_target, create_random_target_create
+from tests.factories.bulk_target_factory import BulkTargetGenerator
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Faker takes ~0.1ms per target; larger datasets are completed by the bulk generator
+TEMPLATE_COUNT = 10_000
+# Time spent on one operation at one size (at least MIN_CALLS calls)
+TIME_BUDGET_SECONDS = 2.0
+MIN_CALLS = 3
+MAX_CALLS = 2_000
+# Creates per layer, so the dataset stays close to its nominal size
+MAX_WRITES = 200
+# Items per call of the per-item benchmarks (converters, serialization)
+BATCH_SIZE = 1_000
+
+
+@dataclasses.dataclass
+class Result:
+    """Measurements of one operation at one dataset size."""
+
+    group: str
+    operation: str
+    size: int
+    calls: int
+    items_per_call: int
+    ops_per_second: float
+    p50_ms: float
+    p99_ms: float
+    peak_memory_kib: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.group}.{self.operation}@{self.size}"
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def measure(
+    group: str,
+    operation: str,
+    size: int,
+    func: Callable[[int], object],
+    items_per_call: int = 1,
+    max_calls: int = MAX_CALLS,
+    min_calls: int = MIN_CALLS,
+) -> Result:
+    """Time func(call_index) until the time budget is spent.
+
+    Args:
+        group: Layer the operation belongs to (repository, service, ...)
+        operation: Operation name
+        size: Dataset size
+        func: Callable running the operation once
+        items_per_call: Items processed by one call (for throughput)
+        max_calls: Upper bound on timed calls
+        min_calls: Calls made even if they exceed the time budget
+
+    Returns:
+        Result of the operation
+    """
+    samples = []
+    deadline = time.perf_counter() + TIME_BUDGET_SECONDS
+    while len(samples) < max_calls and (len(samples) < min_calls or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        func(len(samples))
+        samples.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    func(len(samples))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = Result(
+        group=group,
+        operation=operation,
+        size=size,
+        calls=len(samples),
+        items_per_call=items_per_call,
+        ops_per_second=items_per_call * len(samples) / sum(samples),
+        p50_ms=statistics.median(samples) * 1000,
+        p99_ms=_percentile(samples, 0.99) * 1000,
+        peak_memory_kib=peak / 1024,
+    )
+    print(
+        f"{result.key:<42} {result.calls:>6} {result.ops_per_second:>14,.0f} "
+        f"{result.p50_ms:>10.3f} {result.p99_ms:>10.3f} {result.peak_memory_kib:>12,.0f}",
+        flush=True,
+    )
+    return result
+
+
+def build_dataset(size: int) -> list[Target]:
+    """Create `size` valid targets with the test data factories."""
+    targets = [create_random_target() for _ in range(min(size, TEMPLATE_COUNT))]
+    targets.extend(BulkTargetGenerator(seed=size).targets(size - len(targets)))
+    return targets
+
+
+def write_csv(path: Path, targets: list[Target]) -> None:
+    """Write targets to a CSV file in the repository's format."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(TargetEntity.csv_headers())
+        for target in targets:
+            writer.writerow(plain_to_entity(target).to_csv_row())
+
+
+def bench_size(size: int, directory: Path) -> list[Result]:
+    """Run all benchmarks on a dataset of `size` targets."""
+    targets = build_dataset(size)
+    ids = [t.id for t in targets]
+    csv_path = directory / "targets.csv"
+    write_csv(csv_path, targets)
+    results = []
+    rng = random.Random(size)
+
+    # Loading: the first repository parses the CSV, the second one uses the
+    # snapshot written by the first
+    results.append(measure(
+        "repository", "load_csv", size,
+        lambda i: TargetRepository(str(csv_path)).close(), max_calls=1,
+    ))
+    results.append(measure(
+        "repository", "load_snapshot", size,
+        lambda i: TargetRepository(str(csv_path)).close(),
+    ))
+
+    repository = TargetRepository(str(csv_path))
+    results.append(measure("repository", "get_all", size, lambda i: repository.get_all()))
+    results.append(measure(
+        "repository", "get_by_id", size, lambda i: repository.get_by_id(rng.choice(ids))
+    ))
+    # Write paths, on targets created beforehand (Faker is slower than a create)
+    new_targets = build_dataset(MAX_WRITES + 1)
+    created: list[Target] = []
+    results.append(measure(
+        "repository", "create", size,
+        lambda i: created.append(repository.create(new_targets[i])), max_calls=MAX_WRITES,
+    ))
+    results.append(measure(
+        "repository", "update", size,
+        lambda i: repository.update(dataclasses.replace(created[i % len(created)], speed=float(i))),
+        min_calls=1,
+    ))
+    results.append(measure(
+        "repository", "delete", size,
+        lambda i: repository.delete(created.pop().id),
+        max_calls=max(len(created) - 1, 1), min_calls=1,
+    ))
+
+    history = HistoryService(PositionHistoryRepository(str(directory / "history")))
+    service = TargetService(repository, history)
+    results.append(measure("service", "get_all", size, lambda i: service.get_all()))
+    results.append(measure(
+        "service", "get_by_id", size, lambda i: service.get_by_id(rng.choice(ids))
+    ))
+    new_data = [create_random_target_create() for _ in range(MAX_WRITES + 1)]
+    created.clear()
+    results.append(measure(
+        "service", "create", size,
+        lambda i: created.append(service.create(new_data[i])), max_calls=MAX_WRITES,
+    ))
+    results.append(measure(
+        "service", "update", size,
+        lambda i: service.update(created[i % len(created)].id, TargetUpdate(latitude=i % 90)),
+        min_calls=1,
+    ))
+    results.append(measure(
+        "service", "delete", size,
+        lambda i: service.delete(created.pop().id),
+        max_calls=max(len(created) - 1, 1), min_calls=1,
+    ))
+    repository.close()
+    history.repository.close()
+
+    # Per-item paths, on a batch of the dataset
+    batch = targets[:BATCH_SIZE]
+    entities = [plain_to_entity(t) for t in batch]
+    rows = [plain_to_row(t) for t in batch]
+    csv_rows = [dict(zip(TargetEntity.csv_headers(), e.to_csv_row())) for e in entities]
+    for name, convert, items in (
+        ("from_csv_row", TargetEntity.from_csv_row, csv_rows),
+        ("entity_to_row", entity_to_row, entities),
+        ("row_to_entity", row_to_entity, rows),
+        ("row_to_plain", row_to_plain, rows),
+        ("plain_to_row", plain_to_row, batch),
+        ("plain_to_entity", plain_to_entity, batch),
+    ):
+        results.append(measure(
+            "converter", name, size,
+            lambda i, convert=convert, items=items: [convert(item) for item in items],
+            items_per_call=len(items),
+        ))
+
+    # The get_all response: plain objects -> dicts -> JSON (as Flask does it)
+    json_provider = Flask(__name__).json
+    results.append(measure(
+        "serialization", "to_dict", size,
+        lambda i: [_target_to_dict(t) for t in targets], items_per_call=size,
+    ))
+    dicts = [_target_to_dict(t) for t in targets]
+    results.append(measure(
+        "serialization", "json_dumps", size,
+        lambda i: json_provider.dumps(dicts), items_per_call=size,
+    ))
+    return results
+
+
+def compare(results: list[Result], baseline_path: Path, threshold: float) -> bool:
+    """Print the p50 change against a baseline; returns False on a regression."""
+    with open(baseline_path) as f:
+        baseline = {
+            f"{r['group']}.{r['operation']}@{r['size']}": r for r in json.load(f)["results"]
+        }
+    ok = True
+    print(f"\n{'operation':<42} {'baseline p50':>12} {'p50':>10} {'change':>8}")
+    for result in results:
+        before = baseline.get(result.key)
+        if before is None or before["p50_ms"] == 0:
+            continue
+        change = result.p50_ms / before["p50_ms"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            ok = False
+        print(
+            f"{result.key:<42} {before['p50_ms']:>12.3f} {result.p50_ms:>10.3f} "
+            f"{change:>+8.1%}{flag}"
+        )
+    return ok
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--output", type=Path, help="Results file (JSON)")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="p50 slowdown reported as regression (0.2 = 20%%)"
+    )
+    args = parser.parse_args(argv)
+
+    print(f"{'operation':<42} {'calls':>6} {'ops/s':>14} {'p50 ms':>10} {'p99 ms':>10} {'peak KiB':>12}")
+    results = []
+    # The application's per-call INFO logs would dominate the timings
+    logging.disable(logging.INFO)
+    try:
+        for size in args.sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                results.extend(bench_size(size, Path(tmp)))
+    finally:
+        logging.disable(logging.NOTSET)
+
+    output = args.output or RESULTS_DIR / f"targets-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "benchmark": "targets",
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "results": [dataclasses.asdict(r) for r in results],
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults written to {output}")
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""Load test: drive a mix of target API traffic and report latency percentiles.
+
+Starts the application in-process on a free local port (with its own data
+directory and synthetic targets), or targets a running server with --url:
+
+    python -m benchmarks.load_test [--duration 30] [--concurrency 16] [--rate 0]
+                                   [--mix list=5,get=60,create=10,update=20,delete=5]
+                                   [--targets 1000] [--url http://localhost:5000]
+                                   [--output results.json]
+
+Each of --concurrency threads keeps one HTTP/1.1 connection open and sends
+requests chosen at random by the --mix weights. With --rate (requests per
+second over all threads) requests are sent on a fixed schedule and latency
+is measured from the scheduled time, so a stalled server is not hidden by
+threads that stop sending (coordinated omission). Without it every thread
+sends its next request as soon as the previous one completed.
+
+Everything runs offline: the data is generated with tests/factories. In
+process, the client threads share the interpreter with the server, so use
+--url against `python -m src.server` for capacity numbers.
+"""
+
+import argparse
+import dataclasses
+import http.client
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from tests.factories import create_random_target_create
+
+ENDPOINTS = ("list", "get", "create", "update", "delete")
+DEFAULT_MIX = "list=5,get=60,create=10,update=20,delete=5"
+RESULTS_DIR = Path(__file__).parent / "results"
+BASE_PATH = "/api/v1/targets"
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """Parse "list=5,get=60,..." into endpoint weights."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' in mix, expected one of {ENDPOINTS}")
+        mix[name] = float(weight)
+    if not any(mix.values()):
+        raise ValueError("Mix needs at least one endpoint with a positive weight")
+    return mix
+
+
+def _payload() -> dict:
+    return dataclasses.asdict(create_random_target_create())
+
+
+class TargetPool:
+    """IDs of targets known to exist, shared by all client threads."""
+
+    def __init__(self, ids: list[str]):
+        self._ids = list(ids)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def pick(self, rng: random.Random) -> Optional[str]:
+        with self._lock:
+            return rng.choice(self._ids) if self._ids else None
+
+    def take(self, rng: random.Random) -> Optional[str]:
+        """Remove and return a random ID (for deletes)."""
+        with self._lock:
+            if not self._ids:
+                return None
+            index = rng.randrange(len(self._ids))
+            self._ids[index], self._ids[-1] = self._ids[-1], self._ids[index]
+            return self._ids.pop()
+
+    def add(self, target_id: str) -> None:
+        with self._lock:
+            self._ids.append(target_id)
+
+    def ids(self) -> list[str]:
+        with self._lock:
+            return list(self._ids)
+
+
+@dataclasses.dataclass
+class EndpointStats:
+    """Latency and error summary of one endpoint."""
+
+    endpoint: str
+    requests: int
+    errors: int
+    error_rate: float
+    requests_per_second: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+class Client(threading.Thread):
+    """One client thread with its own keep-alive connection."""
+
+    def __init__(self, url: str, pool: TargetPool, mix: dict[str, float], interval: float,
+                 start_at: float, stop_at: float, seed: int):
+        super().__init__(daemon=True)
+        parts = urlsplit(url)
+        self._host, self._port = parts.hostname, parts.port or 80
+        self._pool = pool
+        self._endpoints = list(mix)
+        self._weights = list(mix.values())
+        self._interval = interval
+        self._start_at = start_at
+        self._stop_at = stop_at
+        self._rng = random.Random(seed)
+        self._connection: Optional[http.client.HTTPConnection] = None
+        # endpoint -> latencies (seconds), endpoint -> errors
+        self.latencies: dict[str, list[float]] = {name: [] for name in ENDPOINTS}
+        self.errors: dict[str, int] = {name: 0 for name in ENDPOINTS}
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None) -> tuple[int, bytes]:
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(self._host, self._port, timeout=30)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            self._connection.request(
+                method, path, body=json.dumps(body) if body is not None else None, headers=headers
+            )
+            response = self._connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self._connection.close()
+            self._connection = None
+            return 0, b""
+
+    def send(self, endpoint: str) -> bool:
+        """Send one request of an endpoint; returns True on the expected status."""
+        rng = self._rng
+        if endpoint == "list":
+            return self._request("GET", BASE_PATH)[0] == 200
+        if endpoint == "create":
+            status, body = self._request("POST", BASE_PATH, _payload())
+            if status == 201:
+                self._pool.add(json.loads(body)["id"])
+            return status == 201
+        if endpoint == "delete":
+            target_id = self._pool.take(rng)
+            if target_id is None:
+                return False
+            return self._request("DELETE", f"{BASE_PATH}/{target_id}")[0] == 200
+        target_id = self._pool.pick(rng)
+        if target_id is None:
+            return False
+        if endpoint == "get":
+            # A concurrent delete may have removed the target
+            return self._request("GET", f"{BASE_PATH}/{target_id}")[0] in (200, 404)
+        update = {"speed": round(rng.uniform(0, 1000), 2), "bearing": round(rng.uniform(0, 360), 2)}
+        return self._request("PUT", f"{BASE_PATH}/{target_id}", update)[0] in (200, 404)
+
+    def run(self) -> None:
+        time.sleep(max(self._start_at - time.perf_counter(), 0))
+        scheduled = self._start_at
+        while True:
+            if self._interval:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                started = scheduled
+                scheduled += self._interval
+            else:
+                started = time.perf_counter()
+            if started >= self._stop_at:
+                break
+            endpoint = self._rng.choices(self._endpoints, self._weights)[0]
+            ok = self.send(endpoint)
+            self.latencies[endpoint].append(time.perf_counter() - started)
+            if not ok:
+                self.errors[endpoint] += 1
+        if self._connection is not None:
+            self._connection.close()
+
+
+def seed_targets(url: str, count: int) -> list[str]:
+    """Create `count` synthetic targets through the API and return their IDs."""
+    pool = TargetPool([])
+    client = Client(url, pool, {"create": 1}, 0, 0, 0, seed=0)
+    for _ in range(count):
+        client.send("create")
+    return pool.ids()
+
+
+def run_load(url: str, duration: float, concurrency: int, rate: float,
+             mix: dict[str, float], ids: list[str]) -> list[EndpointStats]:
+    """Run the load and summarize it per endpoint (plus "total")."""
+    pool = TargetPool(ids)
+    interval = concurrency / rate if rate else 0.0
+    start_at = time.perf_counter() + 0.1
+    stop_at = start_at + duration
+    clients = [
+        # Stagger scheduled clients evenly over one interval
+        Client(url, pool, mix, interval, start_at + interval * i / concurrency, stop_at, seed=i)
+        for i in range(concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = max(time.perf_counter() - start_at, 1e-9)
+
+    stats = []
+    everything: list[float] = []
+    total_errors = 0
+    for endpoint in ENDPOINTS:
+        latencies = sorted(l for c in clients for l in c.latencies[endpoint])
+        errors = sum(c.errors[endpoint] for c in clients)
+        if not latencies:
+            continue
+        everything.extend(latencies)
+        total_errors += errors
+        stats.append(_summarize(endpoint, latencies, errors, elapsed))
+    everything.sort()
+    stats.append(_summarize("total", everything, total_errors, elapsed))
+    return stats
+
+
+def _summarize(endpoint: str, ordered: list[float], errors: int, elapsed: float) -> EndpointStats:
+    return EndpointStats(
+        endpoint=endpoint,
+        requests=len(ordered),
+        errors=errors,
+        error_rate=errors / len(ordered) if ordered else 0.0,
+        requests_per_second=len(ordered) / elapsed,
+        p50_ms=_percentile(ordered, 0.50) * 1000,
+        p90_ms=_percentile(ordered, 0.90) * 1000,
+        p99_ms=_percentile(ordered, 0.99) * 1000,
+        max_ms=(ordered[-1] if ordered else 0.0) * 1000,
+    )
+
+
+class InProcessServer:
+    """The application served by uvicorn on a background thread."""
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = data_dir
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self.url = ""
+
+    def __enter__(self) -> "InProcessServer":
+        import uvicorn
+
+        import src.main
+
+        # The app keeps its data under ./data
+        os.chdir(self.data_dir)
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        config = uvicorn.Config(src.main.get_app(), log_config=None, access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [sock]}, daemon=True
+        )
+        self._thread.start()
+        deadline = time.monotonic() + 30
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("In-process server did not start")
+            time.sleep(0.01)
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def print_report(stats: list[EndpointStats]) -> None:
+    print(
+        f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'err %':>7} {'req/s':>9} "
+        f"{'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    )
+    for s in stats:
+        print(
+            f"{s.endpoint:<10} {s.requests:>9} {s.errors:>7} {s.error_rate:>7.2%} "
+            f"{s.requests_per_second:>9.1f} {s.p50_ms:>9.2f} {s.p90_ms:>9.2f} "
+            f"{s.p99_ms:>9.2f} {s.max_ms:>9.2f}"
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Server to test (default: start the app in-process)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads")
+    parser.add_argument("--rate", type=float, default=0.0, help="Requests/s over all threads (0 = max)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights")
+    parser.add_argument("--targets", type=int, default=1000, help="Synthetic targets created first")
+    parser.add_argument("--output", type=Path, help="Results file (JSON)")
+    args = parser.parse_args(argv)
+    mix = parse_mix(args.mix)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        logging.disable(logging.INFO)
+        try:
+            if args.url:
+                url = args.url.rstrip("/")
+                stats = run_load(url, args.duration, args.concurrency, args.rate, mix,
+                                 seed_targets(url, args.targets))
+            else:
+                with InProcessServer(Path(tmp)) as server:
+                    stats = run_load(server.url, args.duration, args.concurrency, args.rate, mix,
+                                     seed_targets(server.url, args.targets))
+        finally:
+            logging.disable(logging.NOTSET)
+            os.chdir(cwd)
+
+    print_report(stats)
+    output = args.output or RESULTS_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "benchmark": "load",
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "url": args.url or "in-process",
+                "duration": args.duration,
+                "concurrency": args.concurrency,
+                "rate": args.rate,
+                "mix": mix,
+                "targets": args.targets,
+                "results": [dataclasses.asdict(s) for s in stats],
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
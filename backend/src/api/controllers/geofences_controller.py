@@ -0,0 +1,155 @@
+"""Geofences Controller - Geofence endpoint handlers.
+
+Called by Connexion based on operationId values.
+Uses a geofence service on the repository of targets_controller.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+from flask import g
+
+from src.bl.geofence_service import GeofenceService
+from src.models.geofence import GeofenceCreate
+from src.api.controllers import targets_controller
+from src.api.controllers.targets_controller import _target_to_dict
+
+logger = logging.getLogger(__name__)
+
+# Service instance (can be injected for testing)
+_service: GeofenceService | None = None
+
+
+def get_service() -> GeofenceService:
+    """Get or create the geofence service instance."""
+    global _service
+    if _service is None:
+        _service = GeofenceService(targets_controller.get_service().repository)
+    return _service
+
+
+def set_service(service: GeofenceService) -> None:
+    """Set the geofence service instance (for testing)."""
+    global _service
+    _service = service
+
+
+def _geofence_to_dict(fence) -> dict:
+    """Convert a Geofence object to a dictionary for JSON response."""
+    return {
+        "id": fence.id,
+        "name": fence.name,
+        "vertices": [{"latitude": lat, "longitude": lon} for lat, lon in fence.vertices],
+    }
+
+
+def _event_to_dict(event) -> dict:
+    """Convert a GeofenceEvent object to a dictionary for JSON response."""
+    return {
+        "sequence": event.sequence,
+        "kind": event.kind,
+        "geofence_id": event.geofence_id,
+        "target_id": event.target_id,
+        "timestamp": datetime.fromtimestamp(event.timestamp, timezone.utc).isoformat(),
+    }
+
+
+def get_geofences() -> tuple[list[dict], int]:
+    """Handle GET /api/v1/geofences - All geofences, oldest first.
+
+    Returns:
+        Tuple of (list of geofence dicts, status_code)
+    """
+    return [_geofence_to_dict(fence) for fence in get_service().get_all()], 200
+
+
+def create_geofence(body: dict) -> tuple[dict, int]:
+    """Handle POST /api/v1/geofences - Register a geofence.
+
+    Args:
+        body: Request body with the name and vertices (parsed by Connexion)
+
+    Returns:
+        Tuple of (created geofence dict or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    logger.info("[%s] Creating new geofence", request_id)
+
+    try:
+        created = get_service().create(GeofenceCreate(
+            name=body.get("name"),
+            vertices=[(v["latitude"], v["longitude"]) for v in body.get("vertices", [])],
+        ))
+    except ValueError as e:
+        logger.warning("[%s] Validation error: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
+
+    logger.info("[%s] Geofence created: %s", request_id, created.id)
+    return _geofence_to_dict(created), 201
+
+
+def get_geofence(id_: str) -> tuple[dict, int]:
+    """Handle GET /api/v1/geofences/{id} - Get a geofence by ID.
+
+    Args:
+        id_: Geofence UUID
+
+    Returns:
+        Tuple of (geofence dict or error dict, status_code)
+    """
+    fence = get_service().get_by_id(id_)
+    if fence is None:
+        return {"error": "Geofence not found"}, 404
+    return _geofence_to_dict(fence), 200
+
+
+def delete_geofence(id_: str) -> tuple[dict, int]:
+    """Handle DELETE /api/v1/geofences/{id} - Delete a geofence.
+
+    Args:
+        id_: Geofence UUID
+
+    Returns:
+        Tuple of (deleted geofence dict or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    deleted = get_service().delete(id_)
+    if deleted is None:
+        logger.warning("[%s] Geofence not found: %s", request_id, id_)
+        return {"error": "Geofence not found"}, 404
+    logger.info("[%s] Geofence deleted: %s", request_id, id_)
+    return _geofence_to_dict(deleted), 200
+
+
+def get_geofence_targets(id_: str) -> tuple[list[dict] | dict, int]:
+    """Handle GET /api/v1/geofences/{id}/targets - Targets inside a geofence.
+
+    Args:
+        id_: Geofence UUID
+
+    Returns:
+        Tuple of (list of target dicts or error dict, status_code)
+    """
+    targets = get_service().get_targets(id_)
+    if targets is None:
+        return {"error": "Geofence not found"}, 404
+    return [_target_to_dict(t) for t in targets], 200
+
+
+def get_geofence_events(after: int = 0, limit: int = 100) -> tuple[list[dict] | dict, int]:
+    """Handle GET /api/v1/geofences/events - Targets entering or leaving geofences.
+
+    Args:
+        after: Sequence of the last event already seen
+        limit: Events returned at most
+
+    Returns:
+        Tuple of (list of event dicts or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    try:
+        events = get_service().get_events(after, limit)
+    except ValueError as e:
+        logger.warning("[%s] Invalid geofence event request: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
+    return [_event_to_dict(e) for e in events], 200
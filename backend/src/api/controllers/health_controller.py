@@ -18,7 +18,7 @@ def get_health() -> tuple[dict, int]:
         Tuple of (response_dict, status_code)
     """
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Health check requested")
+    logger.info("[%s] Health check requested", request_id)
     
     response = {
         "status": "healthy",
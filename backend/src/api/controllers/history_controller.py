@@ -0,0 +1,166 @@
+"""History Controller - Position history endpoint handlers.
+
+Called by Connexion based on operationId values.
+Uses the history service shared with the target service.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from flask import g
+
+from src.bl.history_service import HistoryService
+from src.api.controllers import targets_controller
+
+logger = logging.getLogger(__name__)
+
+# Service instance (can be injected for testing)
+_service: HistoryService | None = None
+
+
+def get_service() -> HistoryService:
+    """Get the history service used by the target service."""
+    global _service
+    if _service is None:
+        _service = targets_controller.get_service().history
+    return _service
+
+
+def set_service(service: HistoryService) -> None:
+    """Set the history service instance (for testing)."""
+    global _service
+    _service = service
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Parse an ISO 8601 query parameter into epoch seconds."""
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _record_to_dict(record) -> dict:
+    """Convert a PositionRecord object to a dictionary for JSON response."""
+    return {
+        "target_id": record.target_id,
+        "timestamp": datetime.fromtimestamp(record.timestamp, timezone.utc).isoformat(),
+        "latitude": record.latitude,
+        "longitude": record.longitude,
+        "altitude": record.altitude,
+    }
+
+
+def _point_to_dict(record) -> dict:
+    """Convert a PositionRecord to a compact trajectory point dictionary."""
+    return {
+        "timestamp": datetime.fromtimestamp(record.timestamp, timezone.utc).isoformat(),
+        "latitude": record.latitude,
+        "longitude": record.longitude,
+        "altitude": record.altitude,
+    }
+
+
+def get_target_history(
+    id_: str, start: Optional[str] = None, end: Optional[str] = None
+) -> tuple[list[dict] | dict, int]:
+    """Handle GET /api/v1/targets/{id}/history - Track of one target.
+
+    Args:
+        id_: Target UUID
+        start: Window start (ISO 8601, optional)
+        end: Window end (ISO 8601, optional)
+
+    Returns:
+        Tuple of (list of position dicts or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    logger.info("[%s] Getting history for target: %s", request_id, id_)
+
+    try:
+        start_ts = _parse_timestamp(start)
+        end_ts = _parse_timestamp(end)
+    except ValueError as e:
+        logger.warning("[%s] Invalid time window: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
+
+    records = get_service().get_track(id_, start_ts, end_ts)
+    logger.info("[%s] Returning %s positions", request_id, len(records))
+    return [_record_to_dict(r) for r in records], 200
+
+
+def get_positions_in_window(start: str, end: str) -> tuple[list[dict] | dict, int]:
+    """Handle GET /api/v1/history - Positions of all targets in a time window.
+
+    Args:
+        start: Window start (ISO 8601)
+        end: Window end (ISO 8601)
+
+    Returns:
+        Tuple of (list of position dicts or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    logger.info("[%s] Getting positions in window", request_id)
+
+    try:
+        start_ts = _parse_timestamp(start)
+        end_ts = _parse_timestamp(end)
+    except ValueError as e:
+        logger.warning("[%s] Invalid time window: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
+
+    records = get_service().get_window(start_ts, end_ts)
+    logger.info("[%s] Returning %s positions", request_id, len(records))
+    return [_record_to_dict(r) for r in records], 200
+
+
+def get_target_trajectory(
+    id_: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    method: str = "simplify",
+    max_points: Optional[int] = None,
+    tolerance: Optional[float] = None,
+) -> tuple[dict, int]:
+    """Handle GET /api/v1/targets/{id}/trajectory - Downsampled track.
+
+    Args:
+        id_: Target UUID
+        start: Window start (ISO 8601, optional)
+        end: Window end (ISO 8601, optional)
+        method: "simplify" or "decimate"
+        max_points: Maximum number of points to return
+        tolerance: Douglas-Peucker tolerance in meters
+
+    Returns:
+        Tuple of (trajectory dict or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    logger.info("[%s] Getting trajectory for target: %s", request_id, id_)
+
+    try:
+        trajectory = get_service().get_trajectory(
+            id_,
+            _parse_timestamp(start),
+            _parse_timestamp(end),
+            method=method,
+            max_points=max_points,
+            tolerance=tolerance,
+        )
+    except ValueError as e:
+        logger.warning("[%s] Invalid trajectory request: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
+
+    logger.info(
+        "[%s] Returning %s of %s positions",
+        request_id, len(trajectory.points), trajectory.original_count,
+    )
+    return {
+        "target_id": trajectory.target_id,
+        "method": trajectory.method,
+        "original_count": trajectory.original_count,
+        "points": [_point_to_dict(p) for p in trajectory.points],
+    }, 200
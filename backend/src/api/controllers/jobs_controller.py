@@ -0,0 +1,158 @@
+"""Jobs Controller - Background job endpoint handlers.
+
+Called by Connexion based on operationId values.
+Uses a job service running on the target service of targets_controller.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from flask import Response, g, request, send_file
+
+from src.bl.job_service import JobService, QueueFullError
+from src.api.controllers import targets_controller
+
+logger = logging.getLogger(__name__)
+
+# Service instance (can be injected for testing)
+_service: JobService | None = None
+
+
+def get_service() -> JobService:
+    """Get or create the job service (started on first use in each process)."""
+    global _service
+    if _service is None:
+        _service = JobService(targets_controller.get_service())
+    _service.start()
+    return _service
+
+
+def set_service(service: JobService) -> None:
+    """Set the job service instance (for testing)."""
+    global _service
+    _service = service
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return None if value is None else datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+
+def _job_to_dict(job) -> dict:
+    """Convert a Job object to a dictionary for JSON response."""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "params": job.params,
+        "progress": job.progress,
+        "message": job.message,
+        "result": job.result,
+        "error": job.error,
+        "cancel_requested": job.cancel_requested,
+        "created_at": _timestamp(job.created_at),
+        "started_at": _timestamp(job.started_at),
+        "finished_at": _timestamp(job.finished_at),
+    }
+
+
+def _submit(kind: str, params: dict, upload=None) -> tuple[dict, int]:
+    """Submit a job and map its errors to responses."""
+    request_id = getattr(g, "request_id", "unknown")
+    try:
+        service = get_service()
+        job = service.submit(kind, params, upload)
+    except ValueError as e:
+        logger.warning("[%s] Validation error: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
+    except QueueFullError as e:
+        logger.warning("[%s] Job refused: %s", request_id, e)
+        return {"error": "Too many jobs", "details": {"message": str(e)}}, 429
+
+    logger.info("[%s] Job queued: %s (%s)", request_id, job.id, kind)
+    return _job_to_dict(job), 202
+
+
+def submit_job(body: dict) -> tuple[dict, int]:
+    """Handle POST /api/v1/jobs - Queue an export or snapshot job.
+
+    Args:
+        body: Request body with the job kind and parameters
+
+    Returns:
+        Tuple of (job dict or error dict, status_code)
+    """
+    params = {"media_type": body["media_type"]} if "media_type" in body else {}
+    return _submit(body.get("kind"), params)
+
+
+def submit_import_job() -> tuple[dict, int]:
+    """Handle POST /api/v1/jobs/import - Queue an import of the uploaded file.
+
+    The body (CSV or NDJSON) is streamed to the jobs directory; the import
+    itself runs in the background.
+
+    Returns:
+        Tuple of (job dict or error dict, status_code)
+    """
+    return _submit("import", {"media_type": request.mimetype}, request.stream)
+
+
+def get_jobs() -> tuple[list[dict], int]:
+    """Handle GET /api/v1/jobs - All jobs, oldest first.
+
+    Returns:
+        Tuple of (list of job dicts, status_code)
+    """
+    return [_job_to_dict(job) for job in get_service().get_all()], 200
+
+
+def get_job(id_: str) -> tuple[dict, int]:
+    """Handle GET /api/v1/jobs/{id} - State and progress of a job.
+
+    Args:
+        id_: Job UUID
+
+    Returns:
+        Tuple of (job dict or error dict, status_code)
+    """
+    job = get_service().get(id_)
+    if job is None:
+        return {"error": "Job not found"}, 404
+    return _job_to_dict(job), 200
+
+
+def cancel_job(id_: str) -> tuple[dict, int]:
+    """Handle DELETE /api/v1/jobs/{id} - Cancel a queued or running job.
+
+    Args:
+        id_: Job UUID
+
+    Returns:
+        Tuple of (job dict or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    job = get_service().cancel(id_)
+    if job is None:
+        return {"error": "Job not found"}, 404
+    logger.info("[%s] Job %s is %s", request_id, id_, job.status)
+    return _job_to_dict(job), 200
+
+
+def get_job_result(id_: str) -> Response | tuple[dict, int, dict]:
+    """Handle GET /api/v1/jobs/{id}/result - File written by an export job.
+
+    Args:
+        id_: Job UUID
+
+    Returns:
+        File response, or tuple of (error dict, status_code, headers)
+    """
+    service = get_service()
+    job = service.get(id_)
+    path = None if job is None else service.result_path(job)
+    if path is None:
+        return {"error": "Job result not found"}, 404, {"Content-Type": "application/json"}
+    # Relative paths would be resolved against the application root
+    return send_file(path.resolve(), mimetype=job.params["media_type"], as_attachment=True,
+                     download_name=f"targets{path.suffix}")
@@ -0,0 +1,17 @@
+"""Metrics Controller - Prometheus metrics endpoint handler.
+
+Called by Connexion based on operationId: get_metrics
+"""
+
+from src import metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def get_metrics() -> tuple[str, int, dict]:
+    """Handle GET /metrics - Metrics in the Prometheus text format.
+    
+    Returns:
+        Tuple of (metrics_text, status_code, headers)
+    """
+    return metrics.render(), 200, {"Content-Type": CONTENT_TYPE}
@@ -5,15 +5,26 @@ Uses the service layer for business logic.
 """
 
 import logging
-from flask import g
+import sys
+from datetime import datetime, timezone
+
+from flask import Response, g, json, request
 
 from src.bl.target_service import TargetService
+from src.bl.target_import import MEDIA_TYPES
+from src.api.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Formats of density tiles, JSON unless binary is preferred
+TILE_MEDIA_TYPES = ("application/json", "application/octet-stream")
+
 # Service instance (can be injected for testing)
 _service: TargetService | None = None
 
+# Concurrent GET /api/v1/targets requests share one read and serialization
+_all_targets = SingleFlight[bytes]("get_all_targets")
+
 
 def get_service() -> TargetService:
     """Get or create the target service instance."""
@@ -43,41 +54,239 @@ def _target_to_dict(target) -> dict:
     }
 
 
-def get_all_targets() -> tuple[list[dict], int]:
+def _cluster_to_dict(cluster) -> dict:
+    """Convert a Cluster object to a dictionary for JSON response."""
+    return {
+        "count": cluster.count,
+        "latitude": cluster.latitude,
+        "longitude": cluster.longitude,
+        "min_latitude": cluster.min_latitude,
+        "min_longitude": cluster.min_longitude,
+        "max_latitude": cluster.max_latitude,
+        "max_longitude": cluster.max_longitude,
+        "frequency": cluster.frequency,
+        "target_id": cluster.target_id,
+    }
+
+
+def _proximity_event_to_dict(event) -> dict:
+    """Convert a ProximityEvent object to a dictionary for JSON response."""
+    return {
+        "sequence": event.sequence,
+        "kind": event.kind,
+        "target_id": event.target_id,
+        "other_id": event.other_id,
+        "distance": event.distance,
+        "timestamp": datetime.fromtimestamp(event.timestamp, timezone.utc).isoformat(),
+    }
+
+
+def _frequency_counts(counts: dict) -> list[dict]:
+    """Convert frequency -> target count pairs to a list for JSON response."""
+    return [{"frequency": frequency, "count": count} for frequency, count in counts.items()]
+
+
+def _occupancy_to_dict(occupancy) -> dict:
+    """Convert a SpectrumOccupancy object to a dictionary for JSON response."""
+    return {
+        "count": occupancy.count,
+        "bands": [
+            {
+                "name": b.band.name,
+                "min_frequency": b.band.min_frequency,
+                "max_frequency": b.band.max_frequency,
+                "count": b.count,
+                "frequencies": _frequency_counts(b.frequencies),
+                "target_ids": b.target_ids,
+            }
+            for b in occupancy.bands
+        ],
+        "unbanded": _frequency_counts(occupancy.unbanded),
+    }
+
+
+def _report_to_dict(report) -> dict:
+    """Convert an ImportReport object to a dictionary for JSON response."""
+    return {
+        "received": report.received,
+        "imported": report.imported,
+        "rejected": report.rejected,
+        "errors": [{"line": e.line, "message": e.message} for e in report.errors],
+    }
+
+
+def get_all_targets() -> Response:
     """Handle GET /api/v1/targets - Get all targets.
     
+    Requests arriving while an identical one is being answered (at the same
+    change sequence) share its serialized response.
+    
     Returns:
-        Tuple of (list of target dicts, status_code)
+        JSON Response with the list of target dicts
     """
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Getting all targets")
+    logger.info("[%s] Getting all targets", request_id)
     
     service = get_service()
-    targets = service.get_all()
     
-    result = [_target_to_dict(t) for t in targets]
-    logger.info(f"[{request_id}] Returning {len(result)} targets")
+    def read() -> bytes:
+        result = [_target_to_dict(t) for t in service.get_all()]
+        logger.info("[%s] Returning %s targets", request_id, len(result))
+        # Same format Connexion gives a returned list
+        return (json.dumps(result, indent=2) + "\n").encode()
+    
+    body = _all_targets.do(service.sequence(), read)
+    return Response(body, mimetype="application/json")
+
+
+def get_target_clusters(
+    zoom: int,
+    min_latitude: float = -90.0,
+    min_longitude: float = -180.0,
+    max_latitude: float = 90.0,
+    max_longitude: float = 180.0,
+) -> tuple[list[dict] | dict, int]:
+    """Handle GET /api/v1/targets/clusters - Targets of a viewport as map clusters.
+    
+    Args:
+        zoom: Map zoom level
+        min_latitude, min_longitude, max_latitude, max_longitude: Viewport
+        
+    Returns:
+        Tuple of (list of cluster dicts or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    logger.info("[%s] Getting clusters at zoom %s", request_id, zoom)
+    
+    try:
+        clusters = get_service().get_clusters(
+            zoom, min_latitude, min_longitude, max_latitude, max_longitude
+        )
+    except ValueError as e:
+        logger.warning("[%s] Invalid cluster request: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
+    
+    logger.info("[%s] Returning %s clusters", request_id, len(clusters))
+    return [_cluster_to_dict(c) for c in clusters], 200
+
+
+def get_density_tile(z: int, x: int, y: int) -> Response | tuple[dict, int, dict]:
+    """Handle GET /api/v1/tiles/{z}/{x}/{y} - Target counts per bin of a map tile.
+    
+    The format follows the Accept header: JSON, or the raw counts as
+    little-endian uint32 (row by row from the north-west corner).
+    
+    Args:
+        z: Tile zoom level
+        x: Tile column
+        y: Tile row (from the north)
+        
+    Returns:
+        Binary Response, or tuple of (tile dict or error dict, status_code, headers)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    json_headers = {"Content-Type": "application/json"}
+    accept = request.accept_mimetypes
+    media_type = accept.best_match(TILE_MEDIA_TYPES) if accept else TILE_MEDIA_TYPES[0]
+    if media_type is None:
+        logger.warning("[%s] Tile format not acceptable: %s", request_id, accept)
+        return {
+            "error": "Not acceptable",
+            "details": {"message": f"Accept must allow one of {', '.join(TILE_MEDIA_TYPES)}"},
+        }, 406, json_headers
+    
+    try:
+        tile = get_service().get_density_tile(z, x, y)
+    except ValueError as e:
+        logger.warning("[%s] Invalid tile: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400, json_headers
+    
+    logger.debug("[%s] Returning tile %s/%s/%s as %s", request_id, z, x, y, media_type)
+    if media_type == "application/octet-stream":
+        counts = tile.counts
+        if sys.byteorder != "little":
+            counts = counts[:]
+            counts.byteswap()
+        return Response(
+            counts.tobytes(), mimetype=media_type, headers={"X-Tile-Bins": str(tile.bins)}
+        )
+    return {
+        "zoom": tile.zoom,
+        "x": tile.x,
+        "y": tile.y,
+        "bins": tile.bins,
+        "total": tile.total,
+        "counts": tile.counts.tolist(),
+    }, 200, json_headers
+
+
+def get_proximity_events(after: int = 0, limit: int = 100) -> tuple[list[dict] | dict, int]:
+    """Handle GET /api/v1/proximity/events - Targets coming within or leaving the alert distance.
+    
+    Args:
+        after: Sequence of the last event already seen
+        limit: Events returned at most
+        
+    Returns:
+        Tuple of (list of event dicts or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    logger.debug("[%s] Getting proximity events after %s", request_id, after)
+    
+    try:
+        events = get_service().get_proximity_events(after, limit)
+    except ValueError as e:
+        logger.warning("[%s] Invalid proximity event request: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
     
-    return result, 200
+    return [_proximity_event_to_dict(e) for e in events], 200
 
 
-def get_target_by_id(id: str) -> tuple[dict, int]:
+def get_spectrum_occupancy(
+    min_latitude: float = -90.0,
+    min_longitude: float = -180.0,
+    max_latitude: float = 90.0,
+    max_longitude: float = 180.0,
+) -> tuple[dict, int]:
+    """Handle GET /api/v1/spectrum/occupancy - Targets of a viewport per frequency band.
+    
+    Args:
+        min_latitude, min_longitude, max_latitude, max_longitude: Viewport
+        
+    Returns:
+        Tuple of (occupancy dict or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    logger.info("[%s] Getting spectrum occupancy", request_id)
+    
+    try:
+        occupancy = get_service().get_spectrum_occupancy(
+            min_latitude, min_longitude, max_latitude, max_longitude
+        )
+    except ValueError as e:
+        logger.warning("[%s] Invalid spectrum occupancy request: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
+    
+    return _occupancy_to_dict(occupancy), 200
+
+
+def get_target_by_id(id_: str) -> tuple[dict, int]:
     """Handle GET /api/v1/targets/{id} - Get target by ID.
     
     Args:
-        id: Target UUID
+        id_: Target UUID
         
     Returns:
         Tuple of (target dict or error dict, status_code)
     """
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Getting target: {id}")
+    logger.info("[%s] Getting target: %s", request_id, id_)
     
     service = get_service()
-    target = service.get_by_id(id)
+    target = service.get_by_id(id_)
     
     if target is None:
-        logger.warning(f"[{request_id}] Target not found: {id}")
+        logger.warning("[%s] Target not found: %s", request_id, id_)
         return {"error": "Target not found"}, 404
     
     return _target_to_dict(target), 200
@@ -93,7 +302,7 @@ def create_target(body: dict) -> tuple[dict, int]:
         Tuple of (created target dict or error dict, status_code)
     """
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Creating new target")
+    logger.info("[%s] Creating new target", request_id)
     
     try:
         from src.models.target import TargetCreate
@@ -112,29 +321,29 @@ def create_target(body: dict) -> tuple[dict, int]:
         service = get_service()
         created = service.create(create_data)
         
-        logger.info(f"[{request_id}] Target created: {created.id}")
+        logger.info("[%s] Target created: %s", request_id, created.id)
         return _target_to_dict(created), 201
         
     except ValueError as e:
-        logger.warning(f"[{request_id}] Validation error: {e}")
+        logger.warning("[%s] Validation error: %s", request_id, e)
         return {"error": "Validation error", "details": {"message": str(e)}}, 400
     except Exception as e:
-        logger.error(f"[{request_id}] Error creating target: {e}")
+        logger.error("[%s] Error creating target: %s", request_id, e)
         return {"error": "Internal server error"}, 500
 
 
-def update_target(id: str, body: dict) -> tuple[dict, int]:
+def update_target(id_: str, body: dict) -> tuple[dict, int]:
     """Handle PUT /api/v1/targets/{id} - Update a target.
     
     Args:
-        id: Target UUID
+        id_: Target UUID
         body: Request body with update data (parsed by Connexion)
         
     Returns:
         Tuple of (updated target dict or error dict, status_code)
     """
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Updating target: {id}")
+    logger.info("[%s] Updating target: %s", request_id, id_)
     
     try:
         from src.models.target import TargetUpdate
@@ -151,41 +360,100 @@ def update_target(id: str, body: dict) -> tuple[dict, int]:
         )
         
         service = get_service()
-        updated = service.update(id, update_data)
+        updated = service.update(id_, update_data)
         
         if updated is None:
-            logger.warning(f"[{request_id}] Target not found: {id}")
+            logger.warning("[%s] Target not found: %s", request_id, id_)
             return {"error": "Target not found"}, 404
         
-        logger.info(f"[{request_id}] Target updated: {id}")
+        logger.info("[%s] Target updated: %s", request_id, id_)
         return _target_to_dict(updated), 200
         
     except ValueError as e:
-        logger.warning(f"[{request_id}] Validation error: {e}")
+        logger.warning("[%s] Validation error: %s", request_id, e)
         return {"error": "Validation error", "details": {"message": str(e)}}, 400
     except Exception as e:
-        logger.error(f"[{request_id}] Error updating target: {e}")
+        logger.error("[%s] Error updating target: %s", request_id, e)
         return {"error": "Internal server error"}, 500
 
 
-def delete_target(id: str) -> tuple[dict, int]:
+def delete_target(id_: str) -> tuple[dict, int]:
     """Handle DELETE /api/v1/targets/{id} - Delete a target.
     
     Args:
-        id: Target UUID
+        id_: Target UUID
         
     Returns:
         Tuple of (deleted target dict or error dict, status_code)
     """
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Deleting target: {id}")
+    logger.info("[%s] Deleting target: %s", request_id, id_)
     
     service = get_service()
-    deleted = service.delete(id)
+    deleted = service.delete(id_)
     
     if deleted is None:
-        logger.warning(f"[{request_id}] Target not found: {id}")
+        logger.warning("[%s] Target not found: %s", request_id, id_)
         return {"error": "Target not found"}, 404
     
-    logger.info(f"[{request_id}] Target deleted: {id}")
+    logger.info("[%s] Target deleted: %s", request_id, id_)
     return _target_to_dict(deleted), 200
+
+
+def export_targets() -> Response | tuple[dict, int, dict]:
+    """Handle GET /api/v1/targets/export - Stream all targets as a file.
+    
+    The format follows the Accept header (CSV unless NDJSON is preferred).
+    The body is a generator, so targets are read from storage while the
+    response is being sent.
+    
+    Returns:
+        Streaming Response, or tuple of (error dict, status_code, headers)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    accept = request.accept_mimetypes
+    media_type = accept.best_match(MEDIA_TYPES) if accept else MEDIA_TYPES[0]
+    if media_type is None:
+        logger.warning("[%s] Export not acceptable: %s", request_id, accept)
+        return {
+            "error": "Not acceptable",
+            "details": {"message": f"Accept must allow one of {', '.join(MEDIA_TYPES)}"},
+        }, 406, {"Content-Type": "application/json"}
+    logger.info("[%s] Exporting targets as %s", request_id, media_type)
+    
+    service = get_service()
+    chunks = service.export_targets(media_type)
+    extension = "csv" if media_type == "text/csv" else "ndjson"
+    return Response(
+        chunks,
+        mimetype=media_type,
+        headers={"Content-Disposition": f'attachment; filename="targets.{extension}"'},
+    )
+
+
+def import_targets() -> tuple[dict, int]:
+    """Handle POST /api/v1/targets/import - Import targets from a file upload.
+    
+    The body (CSV or NDJSON) is not parsed by Connexion; the service reads
+    it from the request stream in chunks.
+    
+    Returns:
+        Tuple of (import report dict or error dict, status_code)
+    """
+    request_id = getattr(g, "request_id", "unknown")
+    logger.info("[%s] Importing targets from %s", request_id, request.mimetype)
+    
+    try:
+        service = get_service()
+        report = service.import_targets(request.stream, request.mimetype)
+    except ValueError as e:
+        logger.warning("[%s] Import rejected: %s", request_id, e)
+        return {"error": "Validation error", "details": {"message": str(e)}}, 400
+    except Exception as e:
+        logger.error("[%s] Error importing targets: %s", request_id, e)
+        return {"error": "Internal server error"}, 500
+    
+    logger.info(
+        "[%s] Imported %s of %s targets", request_id, report.imported, report.received
+    )
+    return _report_to_dict(report), 200
@@ -51,7 +51,7 @@ def set_service(service: TargetService) -> None:
 def get_health() -> tuple[dict, int]:
     """Handle GET /api/health - Health check endpoint."""
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Health check requested")
+    logger.info("[%s] Health check requested", request_id)
     
     response = HealthResponseDTO(
         status="healthy",
@@ -69,13 +69,13 @@ def get_health() -> tuple[dict, int]:
 def get_all_targets() -> tuple[list[dict], int]:
     """Handle GET /api/v1/targets - Get all targets."""
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Getting all targets")
+    logger.info("[%s] Getting all targets", request_id)
     
     service = get_service()
     targets = service.get_all()
     
     dtos = plain_to_dto_list(targets)
-    logger.info(f"[{request_id}] Returning {len(dtos)} targets")
+    logger.info("[%s] Returning %s targets", request_id, len(dtos))
     
     return [dto.model_dump() for dto in dtos], 200
 
@@ -83,13 +83,13 @@ def get_all_targets() -> tuple[list[dict], int]:
 def get_target_by_id(id: str) -> tuple[dict, int]:
     """Handle GET /api/v1/targets/{id} - Get target by ID."""
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Getting target: {id}")
+    logger.info("[%s] Getting target: %s", request_id, id)
     
     service = get_service()
     target = service.get_by_id(id)
     
     if target is None:
-        logger.warning(f"[{request_id}] Target not found: {id}")
+        logger.warning("[%s] Target not found: %s", request_id, id)
         error = ErrorResponseDTO(
             error="Target not found",
             status=404,
@@ -103,7 +103,7 @@ def get_target_by_id(id: str) -> tuple[dict, int]:
 def create_target() -> tuple[dict, int]:
     """Handle POST /api/v1/targets - Create a new target."""
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Creating new target")
+    logger.info("[%s] Creating new target", request_id)
     
     try:
         # Parse and validate request body
@@ -124,12 +124,12 @@ def create_target() -> tuple[dict, int]:
         
         # Convert back to DTO for response
         dto = plain_to_dto(created)
-        logger.info(f"[{request_id}] Target created: {dto.id}")
+        logger.info("[%s] Target created: %s", request_id, dto.id)
         
         return dto.model_dump(), 201
         
     except ValueError as e:
-        logger.warning(f"[{request_id}] Validation error: {e}")
+        logger.warning("[%s] Validation error: %s", request_id, e)
         error = ErrorResponseDTO(
             error="Validation error",
             details={"message": str(e)},
@@ -137,7 +137,7 @@ def create_target() -> tuple[dict, int]:
         )
         return error.model_dump(), 400
     except Exception as e:
-        logger.error(f"[{request_id}] Error creating target: {e}")
+        logger.error("[%s] Error creating target: %s", request_id, e)
         error = ErrorResponseDTO(
             error="Internal server error",
             status=500,
@@ -148,7 +148,7 @@ def create_target() -> tuple[dict, int]:
 def update_target(id: str) -> tuple[dict, int]:
     """Handle PUT /api/v1/targets/{id} - Update a target."""
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Updating target: {id}")
+    logger.info("[%s] Updating target: %s", request_id, id)
     
     try:
         # Parse and validate request body
@@ -168,7 +168,7 @@ def update_target(id: str) -> tuple[dict, int]:
         updated = service.update(id, plain_update)
         
         if updated is None:
-            logger.warning(f"[{request_id}] Target not found: {id}")
+            logger.warning("[%s] Target not found: %s", request_id, id)
             error = ErrorResponseDTO(
                 error="Target not found",
                 status=404,
@@ -177,12 +177,12 @@ def update_target(id: str) -> tuple[dict, int]:
         
         # Convert back to DTO for response
         dto = plain_to_dto(updated)
-        logger.info(f"[{request_id}] Target updated: {id}")
+        logger.info("[%s] Target updated: %s", request_id, id)
         
         return dto.model_dump(), 200
         
     except ValueError as e:
-        logger.warning(f"[{request_id}] Validation error: {e}")
+        logger.warning("[%s] Validation error: %s", request_id, e)
         error = ErrorResponseDTO(
             error="Validation error",
             details={"message": str(e)},
@@ -190,7 +190,7 @@ def update_target(id: str) -> tuple[dict, int]:
         )
         return error.model_dump(), 400
     except Exception as e:
-        logger.error(f"[{request_id}] Error updating target: {e}")
+        logger.error("[%s] Error updating target: %s", request_id, e)
         error = ErrorResponseDTO(
             error="Internal server error",
             status=500,
@@ -201,13 +201,13 @@ def update_target(id: str) -> tuple[dict, int]:
 def delete_target(id: str) -> tuple[dict, int]:
     """Handle DELETE /api/v1/targets/{id} - Delete a target."""
     request_id = getattr(g, "request_id", "unknown")
-    logger.info(f"[{request_id}] Deleting target: {id}")
+    logger.info("[%s] Deleting target: %s", request_id, id)
     
     service = get_service()
     deleted = service.delete(id)
     
     if deleted is None:
-        logger.warning(f"[{request_id}] Target not found: {id}")
+        logger.warning("[%s] Target not found: %s", request_id, id)
         error = ErrorResponseDTO(
             error="Target not found",
             status=404,
@@ -216,6 +216,6 @@ def delete_target(id: str) -> tuple[dict, int]:
     
     # Convert to DTO for response
     dto = plain_to_dto(deleted)
-    logger.info(f"[{request_id}] Target deleted: {id}")
+    logger.info("[%s] Target deleted: %s", request_id, id)
     
     return dto.model_dump(), 200
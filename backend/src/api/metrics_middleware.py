@@ -0,0 +1,47 @@
+"""Metrics Middleware - Per-operation request metrics.
+
+ASGI middleware placed in front of connexion's exception handling, so it
+also times requests rejected by validation. The OpenAPI operationId is read
+from connexion's routing information once the request completed.
+"""
+
+import time
+
+from src.metrics import REQUEST_DURATION, REQUEST_ROWS, start_row_count
+
+ROUTING_EXTENSION = "connexion_routing"
+
+
+class MetricsMiddleware:
+    """Records latency and rows scanned of every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # Connexion's routing writes into a shallow copy of the scope, so the
+        # extensions dict has to exist beforehand to be shared with it
+        extensions = scope.setdefault("extensions", {})
+        rows = start_row_count()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            routing = extensions.get(ROUTING_EXTENSION, {})
+            # operation_id is "<controller module>.<operationId>"
+            operation = routing.get("operation_id", "unrouted").rsplit(".", 1)[-1]
+            REQUEST_DURATION.labels(operation, scope["method"], str(status)).observe(duration)
+            REQUEST_ROWS.labels(operation).observe(rows[0])
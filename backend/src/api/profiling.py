@@ -0,0 +1,153 @@
+"""Profiling - On-demand profiling of single requests.
+
+Disabled unless PROFILE_REQUESTS is set, in which case a request is profiled
+when it carries the X-Profile header or is picked by PROFILE_SAMPLE_RATE.
+The profile covers the whole controller -> service -> repository chain of
+the request and is written to PROFILE_DIR:
+
+    pstats      cProfile statistics (<name>.pstats), read with pstats or snakeviz
+    collapsed   Stacks sampled every millisecond (<name>.collapsed), one
+                "frame;frame;frame count" line per stack, as expected by
+                flamegraph.pl and speedscope
+
+Profiles are written by the request thread after the response was built, so
+only profiled requests pay for profiling.
+"""
+
+import cProfile
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+FORMATS = ("pstats", "collapsed")
+SAMPLE_INTERVAL_SECONDS = 0.001
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class _CProfile:
+    """Deterministic profile of the calling thread."""
+
+    suffix = ".pstats"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def write(self, path: Path) -> None:
+        self._profile.dump_stats(str(path))
+
+
+class _StackSampler:
+    """Statistical profile of one thread, sampled from a background thread."""
+
+    suffix = ".collapsed"
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self._interval = interval
+        self._thread_id = threading.get_ident()
+        self._stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._sampler = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            self._stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path) -> None:
+        with open(path, "w") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiling:
+    """Decides which requests to profile and stores their profiles."""
+
+    def __init__(self, directory: Path, sample_rate: float = 0.0, output_format: str = "pstats"):
+        """Initialize request profiling.
+
+        Args:
+            directory: Directory the profiles are written to
+            sample_rate: Fraction of requests profiled without the header (0-1)
+            output_format: "pstats" (cProfile) or "collapsed" (sampled stacks)
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown profile format '{output_format}', expected one of {FORMATS}")
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.output_format = output_format
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestProfiling"]:
+        """Create profiling from PROFILE_* variables, or None if disabled."""
+        if os.getenv("PROFILE_REQUESTS", "false").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            directory=Path(os.getenv("PROFILE_DIR", "./data/profiles")),
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            output_format=os.getenv("PROFILE_FORMAT", "pstats").lower(),
+        )
+
+    def should_profile(self, headers: Mapping[str, str]) -> bool:
+        """Return True if a request with these headers is to be profiled."""
+        if headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        """Start profiling the calling thread and return the running profile."""
+        profile = _CProfile() if self.output_format == "pstats" else _StackSampler()
+        profile.start()
+        return profile
+
+    def finish(self, profile, name: str) -> Optional[Path]:
+        """Stop a profile and write it to the profile directory.
+
+        Args:
+            profile: Profile returned by start()
+            name: Description of the request, used in the file name
+
+        Returns:
+            Path of the written profile, or None if it could not be written
+        """
+        profile.stop()
+        file_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{_UNSAFE_CHARS.sub('_', name)[:120]}"
+        path = self.directory / (file_name + profile.suffix)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            profile.write(path)
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", path, e)
+            return None
+        return path
@@ -0,0 +1,86 @@
+"""Single Flight - Coalescing of concurrent identical reads.
+
+When many clients refresh at once, identical reads arrive within
+milliseconds of each other. A SingleFlight runs the first of them (the
+leader) and hands its result to every request with the same key that
+arrives while it is still running, instead of reading and serializing the
+same data once per request. Results are not kept afterwards: a request
+arriving after the leader finished starts a new read.
+
+Keys must change whenever the result may change. Reads of the targets are
+keyed by the sequence number of the last change (see
+TargetService.sequence), so a request made after a write completed never
+receives a result read before it.
+
+Coalescing works across the threads of one worker process. Every request
+is counted in coalesced_requests_total as "leader" or "shared"; the
+coalescing ratio is the share of "shared" requests.
+"""
+
+import threading
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+from src.metrics import COALESCED_REQUESTS
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """A read in progress and the result it is shared with."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[T]):
+    """Runs a read once for all concurrent callers with the same key."""
+
+    def __init__(self, operation: str):
+        """Initialize with no read in progress.
+
+        Args:
+            operation: Name the requests are counted under in the metrics
+        """
+        self._leader = COALESCED_REQUESTS.labels(operation, "leader")
+        self._shared = COALESCED_REQUESTS.labels(operation, "shared")
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, read: Callable[[], T]) -> T:
+        """Return the result of read(), shared with concurrent calls for the same key.
+
+        Args:
+            key: Identifies reads with the same result
+            read: Computes the result (called by the leader only)
+
+        Raises:
+            Exception: Whatever read() raised, in the leader and all callers sharing it
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leading = flight is None
+            if leading:
+                flight = self._flights[key] = _Flight()
+
+        if not leading:
+            self._shared.inc()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        self._leader.inc()
+        try:
+            flight.result = read()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
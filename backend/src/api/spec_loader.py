@@ -0,0 +1,70 @@
+"""OpenAPI Spec Loader - Cached loading of the bundled OpenAPI spec.
+
+Parsing the bundled YAML spec is the most expensive step of building the
+app. The parsed spec is cached as JSON keyed by a hash of the YAML content,
+so every later process start (and every worker) loads it with the much
+faster JSON parser. A stale cache can never be used because any edit to the
+YAML changes the key.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from src.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def default_cache_dir() -> Path:
+    """Return the spec cache directory (OPENAPI_CACHE_DIR or a temp dir)."""
+    return Path(os.getenv("OPENAPI_CACHE_DIR", Path(tempfile.gettempdir()) / "target-api"))
+
+
+def load_spec(spec_path: Path, cache_dir: Optional[Path] = None) -> dict:
+    """Load a YAML OpenAPI spec, using the pre-parsed JSON cache if present.
+
+    Args:
+        spec_path: Path to the YAML spec file
+        cache_dir: Directory for cached specs (defaults to default_cache_dir())
+
+    Returns:
+        Parsed specification dictionary
+    """
+    content = Path(spec_path).read_bytes()
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    cache_path = Path(cache_dir or default_cache_dir()) / f"openapi-{digest}.json"
+
+    try:
+        with open(cache_path, "rb") as f:
+            spec = json.load(f)
+        CACHE_REQUESTS.labels("openapi_spec", "hit").inc()
+        return spec
+    except (OSError, ValueError):
+        CACHE_REQUESTS.labels("openapi_spec", "miss").inc()
+
+    # Round-trip through JSON so the result is identical to a cache hit
+    text = json.dumps(_parse_yaml(content), separators=(",", ":"), default=str)
+    spec = json.loads(text)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, cache_path)
+        logger.info("Cached parsed OpenAPI spec at %s", cache_path)
+    except OSError as e:
+        # Caching is an optimization only; a read-only filesystem is fine
+        logger.warning("Could not cache OpenAPI spec: %s", e)
+    return spec
+
+
+def _parse_yaml(content: bytes) -> dict:
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(content, Loader=loader)
@@ -0,0 +1,111 @@
+"""Geofence Service - Business Logic Layer for geofences.
+
+This service registers geofences and answers which targets are inside
+them and which crossed their borders. It uses only plain objects
+(Geofence, GeofenceCreate, GeofenceEvent, Target).
+"""
+
+import logging
+import uuid
+from typing import Optional
+
+from src.models.geofence import Geofence, GeofenceCreate, GeofenceEvent
+from src.models.target import Target
+from src.dal.target_repository import TargetRepository
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GEOFENCE_EVENTS = 100
+MAX_GEOFENCE_EVENTS = 1000
+
+
+class GeofenceService:
+    """Business logic service for geofence operations."""
+
+    def __init__(self, repository: Optional[TargetRepository] = None):
+        """Initialize service with the target repository tracking the geofences.
+
+        Args:
+            repository: TargetRepository instance (creates default if None)
+        """
+        self.repository = repository or TargetRepository()
+
+    def get_all(self) -> list[Geofence]:
+        """Get all geofences, oldest first."""
+        logger.debug("BL: Getting all geofences")
+        return self.repository.geofences.get_all()
+
+    def get_by_id(self, fence_id: str) -> Optional[Geofence]:
+        """Get a geofence by ID.
+
+        Returns:
+            Geofence if found, None otherwise
+        """
+        logger.debug("BL: Getting geofence by ID: %s", fence_id)
+        return self.repository.geofences.get_by_id(fence_id)
+
+    def create(self, data: GeofenceCreate) -> Geofence:
+        """Register a new geofence.
+
+        Args:
+            data: GeofenceCreate data (without ID)
+
+        Returns:
+            The created Geofence with generated ID
+
+        Raises:
+            ValueError: If the polygon is invalid or crosses the antimeridian
+        """
+        logger.info("BL: Creating new geofence")
+        fence = Geofence(
+            id=str(uuid.uuid4()),
+            name=data.name,
+            vertices=[(float(lat), float(lon)) for lat, lon in data.vertices],
+        )
+        longitudes = [lon for _, lon in fence.vertices]
+        if max(longitudes) - min(longitudes) > 180:
+            raise ValueError(
+                "A geofence must not span more than 180 degrees of longitude (split it at the antimeridian)"
+            )
+        return self.repository.geofences.create(fence)
+
+    def delete(self, fence_id: str) -> Optional[Geofence]:
+        """Delete a geofence.
+
+        Returns:
+            Deleted Geofence if found, None otherwise
+        """
+        logger.info("BL: Deleting geofence: %s", fence_id)
+        return self.repository.geofences.delete(fence_id)
+
+    def get_targets(self, fence_id: str) -> Optional[list[Target]]:
+        """Get the targets inside a geofence.
+
+        Returns:
+            List of Target objects, or None if the geofence does not exist
+        """
+        logger.debug("BL: Getting targets inside geofence: %s", fence_id)
+        return self.repository.get_geofence_targets(fence_id)
+
+    def get_events(self, after: int = 0, limit: int = DEFAULT_GEOFENCE_EVENTS) -> list[GeofenceEvent]:
+        """Get the events of targets entering or leaving geofences.
+
+        Events are numbered in order; pass the sequence of the last event
+        seen as after to poll for new ones.
+
+        Args:
+            after: Sequence of the last event already seen (0 for all kept)
+            limit: Events returned at most (1 to MAX_GEOFENCE_EVENTS)
+
+        Returns:
+            List of GeofenceEvent objects, oldest first
+
+        Raises:
+            ValueError: If after or limit is out of range
+        """
+        logger.debug("BL: Getting geofence events after %s", after)
+        if after < 0:
+            raise ValueError(f"after must not be negative, got {after}")
+        if not 1 <= limit <= MAX_GEOFENCE_EVENTS:
+            raise ValueError(f"limit must be between 1 and {MAX_GEOFENCE_EVENTS}, got {limit}")
+        return self.repository.get_geofence_events(after, limit)
@@ -0,0 +1,158 @@
+"""History Service - Business Logic Layer for target position history.
+
+This service records accepted position changes and answers time-window
+queries. It uses only plain objects (Target, PositionRecord).
+"""
+
+import logging
+import time
+from typing import Optional
+
+from src.models.target import Target
+from src.models.position import PositionRecord, Trajectory
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.bl.trajectory import decimate, douglas_peucker
+
+logger = logging.getLogger(__name__)
+
+TRAJECTORY_METHODS = ("simplify", "decimate")
+DEFAULT_TRAJECTORY_POINTS = 500
+
+
+class HistoryService:
+    """Business logic service for position history operations."""
+
+    def __init__(self, repository: PositionHistoryRepository):
+        """Initialize service with history repository.
+
+        Args:
+            repository: PositionHistoryRepository instance
+        """
+        self.repository = repository
+
+    def share_between_processes(self) -> None:
+        """Prepare storage for use by forked worker processes (call before forking)."""
+        self.repository.share_between_processes()
+
+    def record_position(self, target: Target, timestamp: Optional[float] = None) -> PositionRecord:
+        """Append the current position of a target to its history.
+
+        Args:
+            target: Target whose position was accepted
+            timestamp: Epoch seconds of the change (defaults to now)
+
+        Returns:
+            The stored PositionRecord
+        """
+        record = PositionRecord(
+            target_id=target.id,
+            timestamp=time.time() if timestamp is None else timestamp,
+            latitude=target.latitude,
+            longitude=target.longitude,
+            altitude=target.altitude,
+        )
+        return self.repository.append(record)
+
+    def record_positions(self, targets: list[Target], timestamp: Optional[float] = None) -> int:
+        """Append the current positions of many targets with one repository write.
+
+        Args:
+            targets: Targets whose positions were accepted
+            timestamp: Epoch seconds of the change (defaults to now)
+
+        Returns:
+            Number of records stored
+        """
+        if not targets:
+            return 0
+        timestamp = time.time() if timestamp is None else timestamp
+        records = [
+            PositionRecord(
+                target_id=target.id,
+                timestamp=timestamp,
+                latitude=target.latitude,
+                longitude=target.longitude,
+                altitude=target.altitude,
+            )
+            for target in targets
+        ]
+        return len(self.repository.append_many(records))
+
+    def get_track(
+        self, target_id: str, start: Optional[float] = None, end: Optional[float] = None
+    ) -> list[PositionRecord]:
+        """Get the track of one target within a time window.
+
+        Args:
+            target_id: UUID of the target
+            start: Window start in epoch seconds (defaults to the beginning)
+            end: Window end in epoch seconds (defaults to now)
+
+        Returns:
+            List of PositionRecord objects in timestamp order
+        """
+        start = 0.0 if start is None else start
+        end = time.time() if end is None else end
+        logger.debug("BL: Getting track for %s", target_id)
+        return self.repository.get_track(target_id, start, end)
+
+    def get_window(self, start: float, end: float) -> list[PositionRecord]:
+        """Get the positions of all targets within a time window.
+
+        Args:
+            start: Window start in epoch seconds
+            end: Window end in epoch seconds
+
+        Returns:
+            List of PositionRecord objects in timestamp order
+        """
+        logger.debug("BL: Getting positions in time window")
+        return self.repository.get_window(start, end)
+
+    def get_trajectory(
+        self,
+        target_id: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        method: str = "simplify",
+        max_points: Optional[int] = None,
+        tolerance: Optional[float] = None,
+    ) -> Trajectory:
+        """Get the track of a target downsampled for display.
+
+        Args:
+            target_id: UUID of the target
+            start: Window start in epoch seconds (defaults to the beginning)
+            end: Window end in epoch seconds (defaults to now)
+            method: "simplify" (Douglas-Peucker) or "decimate" (time buckets)
+            max_points: Maximum number of points to return
+            tolerance: Douglas-Peucker tolerance in meters (simplify only)
+
+        Returns:
+            Trajectory with the downsampled points
+
+        Raises:
+            ValueError: If the method or its parameters are invalid
+        """
+        if method not in TRAJECTORY_METHODS:
+            raise ValueError(f"Method must be one of {', '.join(TRAJECTORY_METHODS)}, got {method}")
+        if max_points is not None and max_points < 2:
+            raise ValueError(f"max_points must be at least 2, got {max_points}")
+        if tolerance is not None and tolerance <= 0:
+            raise ValueError(f"tolerance must be positive, got {tolerance}")
+
+        track = self.get_track(target_id, start, end)
+        if method == "decimate":
+            points = decimate(track, max_points or DEFAULT_TRAJECTORY_POINTS)
+        else:
+            if max_points is None and tolerance is None:
+                max_points = DEFAULT_TRAJECTORY_POINTS
+            points = douglas_peucker(track, tolerance=tolerance, max_points=max_points)
+
+        logger.debug("BL: Trajectory for %s: %s -> %s points", target_id, len(track), len(points))
+        return Trajectory(
+            target_id=target_id,
+            method=method,
+            original_count=len(track),
+            points=points,
+        )
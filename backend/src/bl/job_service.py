@@ -0,0 +1,341 @@
+"""Job Service - Business Logic Layer for background jobs.
+
+Bulk operations (import, export, snapshot) run on a small thread pool
+instead of in the request that started them. The request only stores the
+job (and its upload) and returns; clients poll the job for progress and
+its result, and may cancel it.
+
+Jobs work through TargetService in chunks, so the storage locks are held
+for one chunk at a time and interactive requests are served in between.
+At most JOB_WORKERS jobs run at once and JOB_QUEUE_SIZE more may wait;
+further submissions are refused with QueueFullError.
+
+Job state is persisted by JobRepository. A worker process runs only the
+jobs it accepted, but any process can report them or request their
+cancellation, which the running job notices at its next progress report.
+When the service starts, jobs left behind by a process that no longer
+exists are taken over: queued ones are run, running ones are marked
+failed (their partial effect, e.g. imported chunks, is kept).
+
+The thread pool is started on first use, so a pre-forking server can
+create the service before forking its workers.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from src.models.job import Job
+from src.dal.job_repository import JobRepository
+from src.bl.target_import import MEDIA_TYPES
+from src.bl.target_service import TargetService
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("import", "export", "snapshot")
+EXPORT_SUFFIXES = {"text/csv": ".csv", "application/x-ndjson": ".ndjson"}
+# Seconds between progress writes (and cancellation checks) of a running job
+PROGRESS_INTERVAL = 0.5
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+
+class JobCancelledError(Exception):
+    """Raised inside a running job when its cancellation was requested."""
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobContext:
+    """Handle given to a running job to report progress and notice cancellation."""
+
+    def __init__(self, repository: JobRepository, job: Job, cancel_event: threading.Event):
+        self.repository = repository
+        self.job = job
+        self._cancel_event = cancel_event
+        self._last_write = 0.0
+
+    def report(self, progress: float, message: str = "") -> None:
+        """Record progress (written at most every PROGRESS_INTERVAL seconds).
+
+        Raises:
+            JobCancelledError: If the job's cancellation was requested
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelledError()
+        now = time.monotonic()
+        if now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        job = self.repository.update(self.job.id, progress=min(progress, 1.0), message=message)
+        if job is not None and job.cancel_requested:
+            # Requested through another worker process
+            self._cancel_event.set()
+            raise JobCancelledError()
+
+
+class JobService:
+    """Business logic service for background jobs."""
+
+    def __init__(
+        self,
+        targets: TargetService,
+        repository: Optional[JobRepository] = None,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        """Initialize service with the target service its jobs work on.
+
+        Args:
+            targets: TargetService used by the jobs
+            repository: JobRepository instance (creates one on jobs/ next to
+                the CSV file of the targets if None)
+            workers: Jobs run at once (defaults to JOB_WORKERS or 2)
+            queue_size: Jobs waiting at most (defaults to JOB_QUEUE_SIZE or 16)
+        """
+        self.targets = targets
+        self.repository = repository or JobRepository(str(targets.repository.csv_path.with_name("jobs")))
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "2"))
+        self.queue_size = queue_size if queue_size is not None else int(os.getenv("JOB_QUEUE_SIZE", "16"))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = 0
+        self._lock = threading.Lock()
+        # Cancellation events of the jobs queued or running in this process
+        self._cancel_events: dict[str, threading.Event] = {}
+
+    # ------------------------------------------------------------------
+    # Runner
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the thread pool of this process and take over orphaned jobs."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked process must not use the pool (or jobs) of its parent
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="job")
+            self._cancel_events = {}
+            self._pid = os.getpid()
+
+        for job in self.repository.get_all():
+            if job.finished or job.id in self._cancel_events:
+                continue
+            # A job owned by this pid but unknown here was left by an earlier
+            # process that had the same pid
+            if job.owner_pid != self._pid and _pid_alive(job.owner_pid):
+                continue
+            if job.status == "queued":
+                claimed = self.repository.update(
+                    job.id, expect={"owner_pid": job.owner_pid, "status": "queued"}, owner_pid=self._pid
+                )
+                if claimed is not None:
+                    logger.info("BL: Resuming queued job %s (%s)", job.id, job.kind)
+                    # Resumed whatever the capacity: the job was accepted before
+                    with self._lock:
+                        self._cancel_events[job.id] = threading.Event()
+                    self._enqueue(claimed)
+            else:
+                self.repository.update(
+                    job.id,
+                    expect={"owner_pid": job.owner_pid, "status": "running"},
+                    status="failed",
+                    error="Interrupted by a restart",
+                    finished_at=time.time(),
+                )
+
+    def _check_capacity(self) -> None:
+        """Raise QueueFullError if workers + queue_size jobs are pending.
+
+        Must be called with the instance lock held.
+        """
+        if len(self._cancel_events) >= self.workers + self.queue_size:
+            raise QueueFullError(f"{len(self._cancel_events)} jobs are pending, try again later")
+
+    def _reserve(self, job_id: str) -> None:
+        """Take a pending slot for a job before it is stored.
+
+        Raises:
+            QueueFullError: If workers + queue_size jobs are pending
+        """
+        with self._lock:
+            self._check_capacity()
+            self._cancel_events[job_id] = threading.Event()
+
+    def _enqueue(self, job: Job) -> None:
+        """Hand a stored job whose slot is taken to the thread pool."""
+        self._executor.submit(self._run, job.id)
+
+    def _run(self, job_id: str) -> None:
+        """Run a job in a pool thread and store its outcome."""
+        cancel_event = self._cancel_events[job_id]
+        try:
+            job = self.repository.update(
+                job_id,
+                expect={"status": "queued", "cancel_requested": False},
+                status="running",
+                started_at=time.time(),
+            )
+            if job is None:
+                # Cancelled while queued
+                return
+            logger.info("BL: Running job %s (%s)", job.id, job.kind)
+            context = JobContext(self.repository, job, cancel_event)
+            try:
+                result = getattr(self, f"_run_{job.kind}")(job, context)
+            except JobCancelledError:
+                self.repository.update(job_id, status="cancelled", finished_at=time.time())
+                logger.info("BL: Job %s cancelled", job_id)
+            except Exception as e:
+                logger.error("BL: Job %s failed: %s", job_id, e)
+                self.repository.update(job_id, status="failed", error=str(e), finished_at=time.time())
+            else:
+                self.repository.update(
+                    job_id, status="succeeded", progress=1.0, message="", result=result, finished_at=time.time()
+                )
+                logger.info("BL: Job %s succeeded", job_id)
+        finally:
+            self.repository.file_path(job_id, ".upload").unlink(missing_ok=True)
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+    # ------------------------------------------------------------------
+    # Job kinds
+    # ------------------------------------------------------------------
+
+    def _run_import(self, job: Job, context: JobContext) -> dict:
+        upload = self.repository.file_path(job.id, ".upload")
+        size = upload.stat().st_size or 1
+        with open(upload, "rb") as f:
+
+            def progress(report) -> None:
+                context.report(f.tell() / size, f"{report.imported} targets imported")
+
+            report = self.targets.import_targets(f, job.params["media_type"], progress=progress)
+        return asdict(report)
+
+    def _run_export(self, job: Job, context: JobContext) -> dict:
+        media_type = job.params["media_type"]
+        path = self.repository.file_path(job.id, EXPORT_SUFFIXES[media_type])
+        total = max(self.targets.count(), 1)
+        rows = 0
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in self.targets.export_targets(media_type):
+                    f.write(chunk)
+                    rows += chunk.count(b"\n")
+                    context.report(rows / total, f"{rows} lines written")
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return {"media_type": media_type, "lines": rows, "bytes": path.stat().st_size}
+
+    def _run_snapshot(self, job: Job, context: JobContext) -> dict:
+        self.targets.repository.snapshot()
+        return {"targets": self.targets.count()}
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
+    def submit(self, kind: str, params: Optional[dict] = None, upload: Optional[BinaryIO] = None) -> Job:
+        """Store a new job and queue it.
+
+        Args:
+            kind: One of JOB_KINDS
+            params: Job parameters ("media_type" for import and export)
+            upload: Binary stream of the file to import (import only); it is
+                copied to the jobs directory before the job is queued
+
+        Returns:
+            The queued Job
+
+        Raises:
+            ValueError: If the kind or its parameters are invalid
+            QueueFullError: If too many jobs are pending
+        """
+        params = dict(params or {})
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Kind must be one of {', '.join(JOB_KINDS)}, got {kind}")
+        if kind in ("import", "export"):
+            params.setdefault("media_type", MEDIA_TYPES[0])
+            if params["media_type"] not in MEDIA_TYPES:
+                raise ValueError(
+                    f"Media type must be one of {', '.join(MEDIA_TYPES)}, got {params['media_type']}"
+                )
+        if (kind == "import") != (upload is not None):
+            raise ValueError("An upload is required for import jobs only")
+
+        self.start()
+        job = Job(id=str(uuid.uuid4()), kind=kind, params=params, owner_pid=self._pid, created_at=time.time())
+        # The slot is taken before the job is stored, so a stored job is
+        # always queued: a job left queued by a live process is never resumed
+        self._reserve(job.id)
+        try:
+            if upload is not None:
+                with open(self.repository.file_path(job.id, ".upload"), "wb") as f:
+                    shutil.copyfileobj(upload, f, 1024 * 1024)
+            self.repository.create(job)
+        except BaseException:
+            self.repository.file_path(job.id, ".upload").unlink(missing_ok=True)
+            with self._lock:
+                self._cancel_events.pop(job.id, None)
+            raise
+        self._enqueue(job)
+        logger.info("BL: Queued job %s (%s)", job.id, kind)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID.
+
+        Returns:
+            Job if found, None otherwise
+        """
+        return self.repository.get(job_id)
+
+    def get_all(self) -> list[Job]:
+        """Get all jobs, oldest first."""
+        return self.repository.get_all()
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a job: at once if it is queued, at its next progress report if running.
+
+        Returns:
+            The Job in its new state if found (unchanged if finished), None otherwise
+        """
+        job = self.repository.get(job_id)
+        if job is None or job.finished:
+            return job
+        job = self.repository.update(
+            job_id, expect={"status": "queued"}, status="cancelled", cancel_requested=True,
+            finished_at=time.time(),
+        ) or self.repository.update(job_id, expect={"status": "running"}, cancel_requested=True)
+        event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        logger.info("BL: Cancel requested for job %s", job_id)
+        return job or self.repository.get(job_id)
+
+    def result_path(self, job: Job) -> Optional[Path]:
+        """Get the file a finished export job wrote, if it exists."""
+        if job.kind != "export" or job.status != "succeeded":
+            return None
+        path = self.repository.file_path(job.id, EXPORT_SUFFIXES[job.params["media_type"]])
+        return path if path.exists() else None
@@ -0,0 +1,65 @@
+"""Target Export - Serialization of all targets as a stream of chunks.
+
+Targets are read from the repository in batches (see
+TargetRepository.iter_batches) and each batch is encoded into one chunk of
+the response body, so memory stays flat whatever the size of the table
+and the first bytes are sent as soon as the first batch is read.
+
+CSV uses the TargetEntity column layout (the same as targets.csv and as
+accepted by the import); NDJSON has one target object per line.
+"""
+
+import csv
+import io
+import json
+from operator import attrgetter
+from typing import Iterable, Iterator
+
+from src.models.target import Target
+from src.dal.entities.target_entity import TargetEntity
+from src.bl.target_import import MEDIA_TYPES
+
+EXPORT_BATCH_ROWS = 1000
+
+
+def export_chunks(batches: Iterable[list[Target]], media_type: str) -> Iterator[bytes]:
+    """Encode batches of targets into chunks of an export file.
+
+    Args:
+        batches: Lists of targets, in storage order
+        media_type: "text/csv" or "application/x-ndjson"
+
+    Returns:
+        Iterator of UTF-8 chunks, one per batch (plus the CSV header)
+
+    Raises:
+        ValueError: If the media type is not supported
+    """
+    if media_type not in MEDIA_TYPES:
+        raise ValueError(f"Media type must be one of {', '.join(MEDIA_TYPES)}, got {media_type}")
+    if media_type == "text/csv":
+        return _csv_chunks(batches)
+    return _ndjson_chunks(batches)
+
+
+def _csv_chunks(batches: Iterable[list[Target]]) -> Iterator[bytes]:
+    headers = TargetEntity.csv_headers()
+    fields = attrgetter(*headers)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for batch in batches:
+        writer.writerows(map(fields, batch))
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only (no targets)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(batches: Iterable[list[Target]]) -> Iterator[bytes]:
+    dumps = json.dumps
+    for batch in batches:
+        # Target fields are declared in TargetDTO order
+        yield "".join([dumps(vars(target)) + "\n" for target in batch]).encode("utf-8")
@@ -0,0 +1,186 @@
+"""Target Import - Parsing of uploaded target files in fixed-size chunks.
+
+Uploads are CSV files in the TargetEntity column layout (as in targets.csv,
+so the data of one instance can be imported into another), or NDJSON with
+one target object per line. The upload is read line by line from the
+request stream and handed on in chunks of IMPORT_CHUNK_ROWS parsed rows,
+so memory stays bounded whatever the size of the upload.
+
+Rows are checked a chunk at a time by the compiled TargetCreateDTO
+validator (see payload_validator), with the messages the API returns for an
+invalid create; CSV fields are converted to numbers first. Rows without an
+id (or with an empty one) get a new UUID, as on create; rows with the id of
+a stored target replace it. Ids are stored line by line in targets.csv, so
+ids with control characters (line breaks among them) are rejected.
+"""
+
+import csv
+import io
+import json
+import math
+import uuid
+from typing import BinaryIO, Iterator, Optional, Union
+
+from src.models.target import Target
+from src.dal.entities.target_entity import TargetEntity
+from src.api.payload_validator import CompiledValidator, load_validators
+
+IMPORT_CHUNK_ROWS = 5000
+# Rejected rows listed in a report; further ones are only counted
+MAX_REPORTED_ERRORS = 1000
+MEDIA_TYPES = ("text/csv", "application/x-ndjson")
+NUMERIC_FIELDS = ("latitude", "longitude", "altitude", "frequency", "speed", "bearing")
+MAX_ID_LENGTH = 128
+
+# Validator of uploaded rows: the one compiled at startup (set_validator),
+# else compiled from models.yaml on first use
+_validator: Optional[CompiledValidator] = None
+
+# (line number, Target or error message)
+ParsedRow = tuple[int, Union[Target, str]]
+
+
+def set_validator(validator: CompiledValidator) -> None:
+    """Set the TargetCreateDTO validator uploaded rows are checked with."""
+    global _validator
+    _validator = validator
+
+
+def get_validator() -> CompiledValidator:
+    """Return the TargetCreateDTO validator, compiling it if none was set."""
+    global _validator
+    if _validator is None:
+        _validator = load_validators()["TargetCreateDTO"]
+    return _validator
+
+
+def read_chunks(
+    stream: BinaryIO,
+    media_type: str,
+    chunk_rows: int = IMPORT_CHUNK_ROWS,
+    validator: Optional[CompiledValidator] = None,
+) -> Iterator[list[ParsedRow]]:
+    """Parse an upload into chunks of validated rows.
+
+    Args:
+        stream: Binary stream of the upload (UTF-8)
+        media_type: "text/csv" or "application/x-ndjson"
+        chunk_rows: Rows per chunk
+        validator: TargetCreateDTO validator (get_validator() if None)
+
+    Yields:
+        Lists of (line number, Target) for valid rows and (line number,
+        error message) for invalid ones, in upload order
+
+    Raises:
+        ValueError: If the media type is not supported, the CSV header lacks
+            a column or the upload is not valid UTF-8
+    """
+    if media_type not in MEDIA_TYPES:
+        raise ValueError(f"Media type must be one of {', '.join(MEDIA_TYPES)}, got {media_type}")
+    validator = validator or get_validator()
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    records = _csv_records(text) if media_type == "text/csv" else _ndjson_records(text)
+
+    chunk: list[tuple[int, Union[dict, str]]] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_rows:
+            yield _parse_chunk(chunk, validator)
+            chunk = []
+    if chunk:
+        yield _parse_chunk(chunk, validator)
+
+
+def _parse_chunk(
+    records: list[tuple[int, Union[dict, str]]], validator: CompiledValidator
+) -> list[ParsedRow]:
+    """Validate the field dicts of a chunk in one batch and build their Targets."""
+    positions = [index for index, (_, fields) in enumerate(records) if isinstance(fields, dict)]
+    errors = validator.errors_batch(records[index][1] for index in positions)
+
+    parsed: list[ParsedRow] = list(records)
+    for number, index in enumerate(positions):
+        line, fields = records[index]
+        if number in errors:
+            parsed[index] = (line, "; ".join(errors[number]))
+            continue
+        try:
+            parsed[index] = (line, to_target(fields))
+        except ValueError as e:
+            parsed[index] = (line, str(e))
+    return parsed
+
+
+def _csv_records(text: io.TextIOBase) -> Iterator[tuple[int, Union[dict, str]]]:
+    """Read CSV rows as field dicts, keyed by the header line."""
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    missing = [name for name in TargetEntity.csv_headers() if name not in header and name != "id"]
+    if missing:
+        raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != len(header):
+            yield reader.line_num, f"Expected {len(header)} fields, got {len(row)}"
+            continue
+        yield reader.line_num, _csv_fields(dict(zip(header, row)))
+
+
+def _csv_fields(fields: dict) -> dict:
+    """Convert the numeric fields of a CSV row; empty fields count as missing.
+
+    Values that are not numbers stay strings, for the validator to report.
+    """
+    for name in NUMERIC_FIELDS:
+        value = fields.get(name)
+        if value == "":
+            del fields[name]
+        elif value is not None:
+            try:
+                fields[name] = float(value)
+            except ValueError:
+                pass
+    return fields
+
+
+def _ndjson_records(text: io.TextIOBase) -> Iterator[tuple[int, Union[dict, str]]]:
+    """Read NDJSON lines as field dicts."""
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(fields, dict):
+            yield line_number, "Expected a JSON object"
+            continue
+        yield line_number, fields
+
+
+def to_target(fields: dict) -> Target:
+    """Build a Target from the fields of a row that passed the validator.
+
+    Raises:
+        ValueError: If a number is not finite, the id is invalid or a range
+            check of Target fails
+    """
+    for name in NUMERIC_FIELDS:
+        if not math.isfinite(fields[name]):
+            raise ValueError(f"Field '{name}' must be finite, got {fields[name]!r}")
+
+    target_id = fields.get("id") or str(uuid.uuid4())
+    if not isinstance(target_id, str):
+        raise ValueError(f"Field 'id' must be a string, got {target_id!r}")
+    if len(target_id) > MAX_ID_LENGTH or not target_id.isprintable():
+        raise ValueError(
+            f"Field 'id' must be at most {MAX_ID_LENGTH} printable characters, got {target_id!r}"
+        )
+    values = {name: float(fields[name]) for name in NUMERIC_FIELDS}
+    return Target(id=target_id, ip_address=fields["ip_address"], **values)
@@ -6,24 +6,68 @@ It uses only plain objects (Target, TargetCreate, TargetUpdate).
 
 import logging
 import uuid
-from typing import Optional
+from typing import BinaryIO, Callable, Iterator, Optional
 
 from src.models.target import Target, TargetCreate, TargetUpdate
+from src.models.target_import import ImportReport, RowError
+from src.models.cluster import Cluster
+from src.models.tile import DensityTile
+from src.models.proximity import ProximityEvent
+from src.models.spectrum import SpectrumOccupancy
 from src.dal.target_repository import TargetRepository
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.cluster_index import MAX_ZOOM
+from src.dal.density_tiles import MAX_TILE_ZOOM
+from src.bl.history_service import HistoryService
+from src.bl.target_import import IMPORT_CHUNK_ROWS, MAX_REPORTED_ERRORS, read_chunks
+from src.bl.target_export import EXPORT_BATCH_ROWS, export_chunks
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PROXIMITY_EVENTS = 100
+MAX_PROXIMITY_EVENTS = 1000
+
+
+def _validate_viewport(
+    min_latitude: float, min_longitude: float, max_latitude: float, max_longitude: float
+) -> None:
+    """Raise ValueError unless the edges describe a map viewport."""
+    for name, value, limit in (
+        ("min_latitude", min_latitude, 90.0),
+        ("max_latitude", max_latitude, 90.0),
+        ("min_longitude", min_longitude, 180.0),
+        ("max_longitude", max_longitude, 180.0),
+    ):
+        if not -limit <= value <= limit:
+            raise ValueError(f"{name} must be between -{limit:g} and {limit:g}, got {value}")
+    if min_latitude > max_latitude:
+        raise ValueError("min_latitude must not be above max_latitude")
+
 
 class TargetService:
     """Business logic service for Target operations."""
 
-    def __init__(self, repository: Optional[TargetRepository] = None):
+    def __init__(
+        self,
+        repository: Optional[TargetRepository] = None,
+        history: Optional[HistoryService] = None,
+    ):
         """Initialize service with repository.
         
         Args:
             repository: TargetRepository instance (creates default if None)
+            history: HistoryService recording position changes (creates one on
+                history/ next to the repository's CSV file if None)
         """
         self.repository = repository or TargetRepository()
+        self.history = history or HistoryService(
+            PositionHistoryRepository(str(self.repository.csv_path.with_name("history")))
+        )
+
+    def share_between_processes(self) -> None:
+        """Prepare storage for use by forked worker processes (call before forking)."""
+        self.repository.share_between_processes()
+        self.history.share_between_processes()
 
     def get_all(self) -> list[Target]:
         """Get all targets.
@@ -43,9 +87,118 @@ class TargetService:
         Returns:
             Target if found, None otherwise
         """
-        logger.debug(f"BL: Getting target by ID: {target_id}")
+        logger.debug("BL: Getting target by ID: %s", target_id)
         return self.repository.get_by_id(target_id)
 
+    def count(self) -> int:
+        """Get the number of stored targets."""
+        return self.repository.count()
+
+    def sequence(self) -> int:
+        """Get the sequence number of the last change made to the targets.
+        
+        It increases with every change made by any worker process, so reads
+        at the same sequence return the same targets.
+        """
+        return self.repository.sequence
+
+    def get_clusters(
+        self,
+        zoom: int,
+        min_latitude: float = -90.0,
+        min_longitude: float = -180.0,
+        max_latitude: float = 90.0,
+        max_longitude: float = 180.0,
+    ) -> list[Cluster]:
+        """Get the targets in a viewport aggregated into map clusters.
+        
+        Args:
+            zoom: Map zoom level (0 to MAX_ZOOM)
+            min_latitude, min_longitude, max_latitude, max_longitude: Viewport
+                (defaults to the whole map); a min_longitude above
+                max_longitude crosses the antimeridian
+            
+        Returns:
+            List of Cluster objects, one per non-empty grid cell
+            
+        Raises:
+            ValueError: If the zoom or viewport is invalid, or the viewport
+                covers too many cells at this zoom
+        """
+        logger.debug("BL: Getting clusters at zoom %s", zoom)
+        if not 0 <= zoom <= MAX_ZOOM:
+            raise ValueError(f"Zoom must be between 0 and {MAX_ZOOM}, got {zoom}")
+        _validate_viewport(min_latitude, min_longitude, max_latitude, max_longitude)
+        return self.repository.get_clusters(zoom, min_latitude, min_longitude, max_latitude, max_longitude)
+
+    def get_density_tile(self, zoom: int, x: int, y: int) -> DensityTile:
+        """Get the target counts per bin of a Web Mercator map tile.
+        
+        Args:
+            zoom: Tile zoom level (0 to MAX_TILE_ZOOM)
+            x, y: Tile coordinates (0 to 2 ** zoom - 1, y from the north)
+            
+        Returns:
+            DensityTile with the counts of its bins
+            
+        Raises:
+            ValueError: If the tile does not exist
+        """
+        logger.debug("BL: Getting density tile %s/%s/%s", zoom, x, y)
+        if not 0 <= zoom <= MAX_TILE_ZOOM:
+            raise ValueError(f"Zoom must be between 0 and {MAX_TILE_ZOOM}, got {zoom}")
+        size = 1 << zoom
+        if not (0 <= x < size and 0 <= y < size):
+            raise ValueError(f"Tile coordinates at zoom {zoom} must be between 0 and {size - 1}")
+        return self.repository.get_density_tile(zoom, x, y)
+
+    def get_proximity_events(self, after: int = 0, limit: int = DEFAULT_PROXIMITY_EVENTS) -> list[ProximityEvent]:
+        """Get the events of targets coming within or leaving the alert distance.
+        
+        Events are numbered in order; pass the sequence of the last event
+        seen as after to poll for new ones.
+        
+        Args:
+            after: Sequence of the last event already seen (0 for all kept)
+            limit: Events returned at most (1 to MAX_PROXIMITY_EVENTS)
+            
+        Returns:
+            List of ProximityEvent objects, oldest first
+            
+        Raises:
+            ValueError: If after or limit is out of range
+        """
+        logger.debug("BL: Getting proximity events after %s", after)
+        if after < 0:
+            raise ValueError(f"after must not be negative, got {after}")
+        if not 1 <= limit <= MAX_PROXIMITY_EVENTS:
+            raise ValueError(f"limit must be between 1 and {MAX_PROXIMITY_EVENTS}, got {limit}")
+        return self.repository.get_proximity_events(after, limit)
+
+    def get_spectrum_occupancy(
+        self,
+        min_latitude: float = -90.0,
+        min_longitude: float = -180.0,
+        max_latitude: float = 90.0,
+        max_longitude: float = 180.0,
+    ) -> SpectrumOccupancy:
+        """Get the targets of a viewport counted per frequency band.
+        
+        Args:
+            min_latitude, min_longitude, max_latitude, max_longitude: Viewport
+                (defaults to the whole map); a min_longitude above
+                max_longitude crosses the antimeridian
+            
+        Returns:
+            SpectrumOccupancy with the targets of every configured band
+            
+        Raises:
+            ValueError: If the viewport is invalid
+        """
+        logger.debug("BL: Getting spectrum occupancy")
+        _validate_viewport(min_latitude, min_longitude, max_latitude, max_longitude)
+        return self.repository.get_spectrum_occupancy(min_latitude, min_longitude, max_latitude, max_longitude)
+
     def create(self, data: TargetCreate) -> Target:
         """Create a new target.
         
@@ -72,7 +225,9 @@ class TargetService:
             ip_address=data.ip_address,
         )
         
-        return self.repository.create(target)
+        created = self.repository.create(target)
+        self.history.record_position(created)
+        return created
 
     def update(self, target_id: str, data: TargetUpdate) -> Optional[Target]:
         """Update an existing target.
@@ -84,12 +239,12 @@ class TargetService:
         Returns:
             Updated Target if found, None otherwise
         """
-        logger.info(f"BL: Updating target: {target_id}")
+        logger.info("BL: Updating target: %s", target_id)
         
         # Get existing target
         existing = self.repository.get_by_id(target_id)
         if not existing:
-            logger.warning(f"BL: Target not found: {target_id}")
+            logger.warning("BL: Target not found: %s", target_id)
             return None
         
         # Apply updates
@@ -104,7 +259,10 @@ class TargetService:
             ip_address=data.ip_address if data.ip_address is not None else existing.ip_address,
         )
         
-        return self.repository.update(updated)
+        result = self.repository.update(updated)
+        if result is not None and _position_changed(existing, result):
+            self.history.record_position(result)
+        return result
 
     def delete(self, target_id: str) -> Optional[Target]:
         """Delete a target.
@@ -115,5 +273,82 @@ class TargetService:
         Returns:
             Deleted Target if found, None otherwise
         """
-        logger.info(f"BL: Deleting target: {target_id}")
+        logger.info("BL: Deleting target: %s", target_id)
         return self.repository.delete(target_id)
+
+    def export_targets(self, media_type: str, batch_size: int = EXPORT_BATCH_ROWS) -> Iterator[bytes]:
+        """Export all targets as a CSV or NDJSON file, batch by batch.
+        
+        Args:
+            media_type: "text/csv" or "application/x-ndjson"
+            batch_size: Targets read and encoded at a time
+            
+        Returns:
+            Iterator of file chunks; storage is read only as it is consumed
+            
+        Raises:
+            ValueError: If the media type is not supported
+        """
+        logger.info("BL: Exporting targets as %s", media_type)
+        return export_chunks(self.repository.iter_batches(batch_size), media_type)
+
+    def import_targets(
+        self,
+        stream: BinaryIO,
+        media_type: str,
+        chunk_rows: int = IMPORT_CHUNK_ROWS,
+        progress: Optional[Callable[[ImportReport], None]] = None,
+    ) -> ImportReport:
+        """Import targets from a CSV or NDJSON upload, chunk by chunk.
+        
+        Each chunk of valid rows is stored with one repository write, so
+        only one chunk of the upload is held in memory at a time.
+        
+        Args:
+            stream: Binary stream of the upload
+            media_type: "text/csv" or "application/x-ndjson"
+            chunk_rows: Rows parsed and stored at a time
+            progress: Called with the report so far after each chunk (an
+                exception it raises stops the import after that chunk)
+            
+        Returns:
+            ImportReport with counts and the rejected rows
+            
+        Raises:
+            ValueError: If the upload cannot be read at all (see read_chunks)
+        """
+        logger.info("BL: Importing targets from %s", media_type)
+        report = ImportReport()
+        for chunk in read_chunks(stream, media_type, chunk_rows):
+            lines, targets, errors = [], [], []
+            for line, parsed in chunk:
+                if isinstance(parsed, Target):
+                    lines.append(line)
+                    targets.append(parsed)
+                else:
+                    errors.append((line, parsed))
+
+            rejected = self.repository.put_many(targets)
+            errors.extend((lines[index], message) for index, message in rejected.items())
+            stored = [t for index, t in enumerate(targets) if index not in rejected]
+            self.history.record_positions(stored)
+
+            report.received += len(chunk)
+            report.imported += len(stored)
+            report.rejected += len(errors)
+            room = MAX_REPORTED_ERRORS - len(report.errors)
+            report.errors.extend(RowError(line, message) for line, message in sorted(errors)[:room])
+            if progress is not None:
+                progress(report)
+        
+        logger.info("BL: Imported %s targets, rejected %s", report.imported, report.rejected)
+        return report
+
+
+def _position_changed(before: Target, after: Target) -> bool:
+    """Check whether an update moved the target."""
+    return (
+        before.latitude != after.latitude
+        or before.longitude != after.longitude
+        or before.altitude != after.altitude
+    )
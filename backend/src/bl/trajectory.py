@@ -0,0 +1,127 @@
+"""Trajectory simplification - Downsample position tracks for display.
+
+Two strategies are provided:
+- Time-bucket decimation: split the time span into equal buckets and keep
+  one point per bucket. Cheap and preserves the time distribution.
+- Douglas-Peucker simplification: keep the points that deviate most from
+  the simplified line. Preserves the shape of the track.
+
+Coordinates are projected once per track onto a local equirectangular
+plane (meters), and all distance computations run over those flat columns.
+"""
+
+import heapq
+import math
+
+from src.models.position import PositionRecord
+
+EARTH_RADIUS_M = 6_371_000.0
+
+
+def _project(records: list[PositionRecord]) -> tuple[list[float], list[float]]:
+    """Project a track onto a local plane in meters, column-wise."""
+    mean_lat = math.radians(sum(r.latitude for r in records) / len(records))
+    scale_x = EARTH_RADIUS_M * math.cos(mean_lat) * math.pi / 180.0
+    scale_y = EARTH_RADIUS_M * math.pi / 180.0
+    xs = [r.longitude * scale_x for r in records]
+    ys = [r.latitude * scale_y for r in records]
+    return xs, ys
+
+
+def _farthest(xs: list[float], ys: list[float], first: int, last: int) -> tuple[int, float]:
+    """Find the point between first and last farthest from their chord.
+
+    Returns:
+        Tuple of (index, perpendicular distance in meters)
+    """
+    x0, y0, x1, y1 = xs[first], ys[first], xs[last], ys[last]
+    dx, dy = x1 - x0, y1 - y0
+    norm = math.hypot(dx, dy)
+    inner_x = xs[first + 1:last]
+    inner_y = ys[first + 1:last]
+    if norm == 0.0:
+        distances = [math.hypot(x - x0, y - y0) for x, y in zip(inner_x, inner_y)]
+    else:
+        cross = x1 * y0 - y1 * x0
+        distances = [abs(dy * x - dx * y + cross) / norm for x, y in zip(inner_x, inner_y)]
+    best = max(range(len(distances)), key=distances.__getitem__)
+    return first + 1 + best, distances[best]
+
+
+def douglas_peucker(
+    records: list[PositionRecord],
+    tolerance: float | None = None,
+    max_points: int | None = None,
+) -> list[PositionRecord]:
+    """Simplify a track with the Douglas-Peucker algorithm.
+
+    Segments are refined in order of their largest deviation, so the
+    result is the best max_points-point approximation the algorithm can
+    give, and refinement stops early once every deviation is within
+    tolerance.
+
+    Args:
+        records: Track in timestamp order
+        tolerance: Maximum allowed deviation in meters
+        max_points: Maximum number of points to keep
+
+    Returns:
+        Simplified track (first and last points always kept)
+    """
+    limit = len(records) if max_points is None else max(max_points, 2)
+    if len(records) <= 2 or (tolerance is None and limit >= len(records)):
+        return list(records)
+
+    xs, ys = _project(records)
+    last = len(records) - 1
+    keep = {0, last}
+    heap: list[tuple[float, int, int, int]] = []
+
+    def push(first: int, end: int) -> None:
+        if end - first > 1:
+            index, distance = _farthest(xs, ys, first, end)
+            heapq.heappush(heap, (-distance, index, first, end))
+
+    push(0, last)
+    while heap and len(keep) < limit:
+        negative_distance, index, first, end = heapq.heappop(heap)
+        if tolerance is not None and -negative_distance <= tolerance:
+            break
+        keep.add(index)
+        push(first, index)
+        push(index, end)
+
+    return [records[i] for i in sorted(keep)]
+
+
+def decimate(records: list[PositionRecord], max_points: int) -> list[PositionRecord]:
+    """Downsample a track by keeping one point per equal time bucket.
+
+    Args:
+        records: Track in timestamp order
+        max_points: Number of time buckets (maximum points returned)
+
+    Returns:
+        Decimated track (first and last points always kept)
+    """
+    if len(records) <= max_points or len(records) <= 2:
+        return list(records)
+
+    start = records[0].timestamp
+    span = records[-1].timestamp - start
+    if span <= 0:
+        return [records[0], records[-1]]
+
+    buckets = max(max_points - 1, 1)
+    width = span / buckets
+    bucket_ids = [min(int((r.timestamp - start) / width), buckets - 1) for r in records]
+
+    result = []
+    previous = -1
+    for record, bucket in zip(records, bucket_ids):
+        if bucket != previous:
+            result.append(record)
+            previous = bucket
+    if result[-1] is not records[-1]:
+        result.append(records[-1])
+    return result
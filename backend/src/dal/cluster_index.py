@@ -0,0 +1,425 @@
+"""Cluster Index - Targets aggregated into map clusters per zoom level.
+
+Targets are kept sorted by a quadkey: the Morton (Z-order) code of their
+Web Mercator tile position at LEAF_LEVEL, i.e. the bits of the tile x and y
+coordinates interleaved. The cell of a target at any coarser level is a
+prefix of its code (code >> 2 * (LEAF_LEVEL - level)), so all targets of a
+cell form one contiguous range of the sorted columns, found by bisection.
+This pyramid answers every zoom level without scanning the table.
+
+The clusters of map zoom z are the cells of level z + CELL_LEVEL_OFFSET
+(64 pixel squares of the 256 pixel map tiles). A cluster is computed from
+its range the first time it is requested and then kept in the cache of its
+zoom level, where later changes update it in place: count, coordinate sums
+and frequency counts are adjusted, and the bounding box grows in place and
+is only recomputed from the range after a removal on its edge. The caches
+of the CACHED_ZOOMS most recently queried zoom levels are kept.
+
+The index is built on the first query. Changes are queued by the table
+listener and applied at the next query, so writes stay cheap; a batch of
+changes larger than an eighth of the table (e.g. an import) is applied by
+rebuilding the index instead.
+"""
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from typing import Iterable, Optional
+
+from src.models.cluster import Cluster
+from src.dal.target_table import TableListener, TargetRow, TargetTable
+from src.metrics import CACHE_REQUESTS
+
+MAX_ZOOM = 20
+CELL_LEVEL_OFFSET = 2
+LEAF_LEVEL = MAX_ZOOM + CELL_LEVEL_OFFSET
+# Cells a query may cover (a 4K screen shows about 2,000)
+MAX_VIEWPORT_CELLS = 16_384
+CACHED_ZOOMS = 8
+# Cells read at most by a box query (at the finest level with no more)
+MAX_BOX_CELLS = 16
+# Queued changes always applied one by one (below an eighth of the table)
+MIN_REBUILD_CHANGES = 1_000
+# Latitude limit of the Web Mercator projection
+MAX_LATITUDE = 85.05112878
+
+_LEAF_SIZE = 1 << LEAF_LEVEL
+_X_SCALE = _LEAF_SIZE / 360.0
+_Y_SCALE = _LEAF_SIZE / (4.0 * math.pi)
+_Y_CENTER = _LEAF_SIZE / 2.0
+_HALF_BITS = (LEAF_LEVEL + 1) // 2
+_HALF_MASK = (1 << _HALF_BITS) - 1
+
+
+def _spread_bits(value: int) -> int:
+    """Insert a zero bit above every bit of a value (0b111 -> 0b10101)."""
+    spread = 0
+    for bit in range(value.bit_length()):
+        spread |= ((value >> bit) & 1) << (2 * bit)
+    return spread
+
+
+# Spread values of all half-width numbers, so interleaving takes two lookups per axis
+_SPREAD = [_spread_bits(value) for value in range(1 << _HALF_BITS)]
+
+
+def morton_code(x: int, y: int) -> int:
+    """Morton code of a tile (x bits at even positions, y bits at odd ones).
+
+    For tile coordinates of any level up to LEAF_LEVEL this is the cell code
+    of the tile at that level.
+    """
+    spread = _SPREAD
+    return (
+        (spread[x >> _HALF_BITS] << (2 * _HALF_BITS)) | spread[x & _HALF_MASK]
+        | (((spread[y >> _HALF_BITS] << (2 * _HALF_BITS)) | spread[y & _HALF_MASK]) << 1)
+    )
+
+
+def leaf_tile(latitude: float, longitude: float) -> tuple[int, int]:
+    """Web Mercator tile x and y of a position at LEAF_LEVEL.
+
+    Latitudes beyond the projection limit fall into its first or last row.
+    """
+    sin = math.sin(math.radians(min(max(latitude, -MAX_LATITUDE), MAX_LATITUDE)))
+    x = int((longitude + 180.0) * _X_SCALE)
+    y = int(_Y_CENTER - math.log((1.0 + sin) / (1.0 - sin)) * _Y_SCALE)
+    return min(max(x, 0), _LEAF_SIZE - 1), min(max(y, 0), _LEAF_SIZE - 1)
+
+
+def leaf_code(latitude: float, longitude: float) -> int:
+    """Quadkey of a position at LEAF_LEVEL as an integer."""
+    return morton_code(*leaf_tile(latitude, longitude))
+
+
+def leaf_codes(latitudes: Iterable[float], longitudes: Iterable[float]) -> list[int]:
+    """Quadkeys of whole coordinate columns (the same as leaf_code, column by column)."""
+    last = _LEAF_SIZE - 1
+    x_scale, y_scale, y_center = _X_SCALE, _Y_SCALE, _Y_CENTER
+    log = math.log
+    sines = map(math.sin, map(math.radians, (
+        -MAX_LATITUDE if lat < -MAX_LATITUDE else MAX_LATITUDE if lat > MAX_LATITUDE else lat
+        for lat in latitudes
+    )))
+    ys = [int(y_center - log((1.0 + sin) / (1.0 - sin)) * y_scale) for sin in sines]
+    xs = [int((lon + 180.0) * x_scale) for lon in longitudes]
+    spread = _SPREAD
+    high, mask = 2 * _HALF_BITS, _HALF_MASK
+    codes = []
+    append = codes.append
+    for x, y in zip(xs, ys):
+        x = 0 if x < 0 else last if x > last else x
+        y = 0 if y < 0 else last if y > last else y
+        append(
+            (spread[x >> _HALF_BITS] << high) | spread[x & mask]
+            | (((spread[y >> _HALF_BITS] << high) | spread[y & mask]) << 1)
+        )
+    return codes
+
+
+class _CellCluster:
+    """Running aggregate of the targets in one cell."""
+
+    __slots__ = (
+        "count", "sum_lat", "sum_lon", "min_lat", "min_lon", "max_lat", "max_lon",
+        "frequencies", "dominant", "stale",
+    )
+
+    def __init__(self, lats: array, lons: array, freqs: array):
+        self.count = len(lats)
+        self.sum_lat = math.fsum(lats)
+        self.sum_lon = math.fsum(lons)
+        self.min_lat, self.max_lat = min(lats), max(lats)
+        self.min_lon, self.max_lon = min(lons), max(lons)
+        self.frequencies = Counter(freqs)
+        self.dominant: Optional[float] = None
+        self.stale = False
+
+    def add(self, lat: float, lon: float, freq: float) -> None:
+        self.count += 1
+        self.sum_lat += lat
+        self.sum_lon += lon
+        self.min_lat, self.max_lat = min(self.min_lat, lat), max(self.max_lat, lat)
+        self.min_lon, self.max_lon = min(self.min_lon, lon), max(self.max_lon, lon)
+        self.frequencies[freq] += 1
+        dominant = self.dominant
+        if dominant is not None and freq != dominant:
+            if (self.frequencies[freq], -freq) > (self.frequencies[dominant], -dominant):
+                self.dominant = freq
+
+    def discard(self, lat: float, lon: float, freq: float) -> None:
+        self.count -= 1
+        self.sum_lat -= lat
+        self.sum_lon -= lon
+        if lat in (self.min_lat, self.max_lat) or lon in (self.min_lon, self.max_lon):
+            self.stale = True
+        self.frequencies[freq] -= 1
+        if not self.frequencies[freq]:
+            del self.frequencies[freq]
+        if freq == self.dominant:
+            self.dominant = None
+
+    def refresh_bounds(self, lats: array, lons: array) -> None:
+        self.min_lat, self.max_lat = min(lats), max(lats)
+        self.min_lon, self.max_lon = min(lons), max(lons)
+        self.stale = False
+
+    def dominant_frequency(self) -> float:
+        if self.dominant is None:
+            self.dominant = max(self.frequencies.items(), key=lambda item: (item[1], -item[0]))[0]
+        return self.dominant
+
+
+class ClusterIndex(TableListener):
+    """Quadkey-ordered copy of the target positions with per-zoom cluster caches.
+
+    All methods must be called with the repository's table lock held.
+    """
+
+    def __init__(self, cached_zooms: int = CACHED_ZOOMS):
+        """Initialize an empty (not yet built) index.
+
+        Args:
+            cached_zooms: Zoom levels whose clusters are cached
+        """
+        self.cached_zooms = cached_zooms
+        # Columns sorted by code; None until the first query builds them
+        self._codes: Optional[array] = None
+        self._ids: list[str] = []
+        self._lats = array("d")
+        self._lons = array("d")
+        self._freqs = array("d")
+        # Changes (old row or None, new row or None) not applied yet
+        self._pending: list[tuple[Optional[TargetRow], Optional[TargetRow]]] = []
+        # Zoom -> {cell code: cluster}, least recently queried first
+        self._caches: OrderedDict[int, dict[int, _CellCluster]] = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # TableListener
+    # ------------------------------------------------------------------
+
+    def reset(self, table: TargetTable) -> None:
+        self._codes = None
+        self._pending = []
+        self._caches.clear()
+
+    def put(self, old: Optional[TargetRow], row: TargetRow) -> None:
+        if self._codes is not None:
+            self._pending.append((old, row))
+
+    def remove(self, row: TargetRow) -> None:
+        if self._codes is not None:
+            self._pending.append((row, None))
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _build(self, table: TargetTable) -> None:
+        """Sort all live rows of the table by quadkey."""
+        lat_column, lon_column, _, freq_column = table.columns[:4]
+        positions = [p for p, target_id in enumerate(table.ids) if target_id is not None]
+        if len(positions) == len(table.ids):
+            codes = leaf_codes(lat_column, lon_column)
+        else:
+            codes = leaf_codes([lat_column[p] for p in positions], [lon_column[p] for p in positions])
+        order = sorted(range(len(positions)), key=codes.__getitem__)
+        positions = [positions[i] for i in order]
+        self._codes = array("Q", [codes[i] for i in order])
+        self._ids = [table.ids[p] for p in positions]
+        self._lats = array("d", [lat_column[p] for p in positions])
+        self._lons = array("d", [lon_column[p] for p in positions])
+        self._freqs = array("d", [freq_column[p] for p in positions])
+        self._pending = []
+        self._caches.clear()
+
+    def _sync(self, table: TargetTable) -> None:
+        """Apply the queued changes (or rebuild if there are too many)."""
+        if self._codes is None or len(self._pending) > max(MIN_REBUILD_CHANGES, len(self._ids) // 8):
+            self._build(table)
+            return
+        for old, row in self._pending:
+            if old is not None:
+                self._discard(old)
+            if row is not None:
+                self._add(row)
+        self._pending = []
+
+    def _add(self, row: TargetRow) -> None:
+        target_id, lat, lon, freq = row[0], row[1], row[2], row[4]
+        code = leaf_code(lat, lon)
+        index = bisect_right(self._codes, code)
+        self._codes.insert(index, code)
+        self._ids.insert(index, target_id)
+        self._lats.insert(index, lat)
+        self._lons.insert(index, lon)
+        self._freqs.insert(index, freq)
+        for zoom, cache in self._caches.items():
+            cluster = cache.get(code >> _shift(zoom))
+            if cluster is not None:
+                cluster.add(lat, lon, freq)
+
+    def _discard(self, row: TargetRow) -> None:
+        target_id, lat, lon, freq = row[0], row[1], row[2], row[4]
+        code = leaf_code(lat, lon)
+        index = bisect_left(self._codes, code)
+        # Targets at the same leaf tile share a code
+        while self._ids[index] != target_id:
+            index += 1
+        del self._codes[index], self._ids[index], self._lats[index], self._lons[index], self._freqs[index]
+        for zoom, cache in self._caches.items():
+            cell = code >> _shift(zoom)
+            cluster = cache.get(cell)
+            if cluster is not None:
+                cluster.discard(lat, lon, freq)
+                if not cluster.count:
+                    del cache[cell]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _cache(self, zoom: int) -> dict[int, _CellCluster]:
+        """Return the cluster cache of a zoom level, marking it recently used."""
+        cache = self._caches.get(zoom)
+        if cache is None:
+            cache = self._caches[zoom] = {}
+            if len(self._caches) > self.cached_zooms:
+                self._caches.popitem(last=False)
+        else:
+            self._caches.move_to_end(zoom)
+        return cache
+
+    def _range(self, cell: int, shift: int) -> tuple[int, int]:
+        """Return the start and end index of the targets in a cell."""
+        start = bisect_left(self._codes, cell << shift)
+        return start, bisect_left(self._codes, (cell + 1) << shift, start)
+
+    def codes_in_cell(self, table: TargetTable, level: int, cell: int) -> array:
+        """Return the leaf codes of the targets in a cell of a grid level, in order.
+
+        Args:
+            table: The table the index follows (read if the index is rebuilt)
+            level: Grid level (0 to LEAF_LEVEL); map tiles of zoom z are level z
+            cell: Morton code of the cell at that level
+        """
+        self._sync(table)
+        start, end = self._range(cell, 2 * (LEAF_LEVEL - level))
+        return self._codes[start:end]
+
+    def targets_in_box(
+        self,
+        table: TargetTable,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+    ) -> tuple[list[str], array, array]:
+        """Return the targets in the cells covering a box, with their positions.
+
+        The box is covered by at most MAX_BOX_CELLS cells of one level, so
+        targets near the box are returned too; callers filter them.
+
+        Args:
+            table: The table the index follows (read if the index is rebuilt)
+            min_latitude, min_longitude, max_latitude, max_longitude: Box
+                (not crossing the antimeridian)
+
+        Returns:
+            Tuple of (ids, latitudes, longitudes), cell by cell
+        """
+        west, north = leaf_tile(max_latitude, min_longitude)
+        east, south = leaf_tile(min_latitude, max_longitude)
+        level_shift = 0
+        while ((east >> level_shift) - (west >> level_shift) + 1) * (
+            (south >> level_shift) - (north >> level_shift) + 1
+        ) > MAX_BOX_CELLS:
+            level_shift += 1
+
+        self._sync(table)
+        ids, lats, lons = [], array("d"), array("d")
+        for y in range(north >> level_shift, (south >> level_shift) + 1):
+            for x in range(west >> level_shift, (east >> level_shift) + 1):
+                start, end = self._range(morton_code(x, y), 2 * level_shift)
+                ids.extend(self._ids[start:end])
+                lats.extend(self._lats[start:end])
+                lons.extend(self._lons[start:end])
+        return ids, lats, lons
+
+    def query(
+        self,
+        table: TargetTable,
+        zoom: int,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+    ) -> list[Cluster]:
+        """Return the clusters of a zoom level in a viewport.
+
+        Args:
+            table: The table the index follows (read if the index is rebuilt)
+            zoom: Map zoom level (0 to MAX_ZOOM)
+            min_latitude, min_longitude, max_latitude, max_longitude: Viewport;
+                a min_longitude above max_longitude crosses the antimeridian
+
+        Returns:
+            Clusters of the non-empty cells, from north-west to south-east
+
+        Raises:
+            ValueError: If the viewport covers more than MAX_VIEWPORT_CELLS cells
+        """
+        shift = _shift(zoom)
+        level_shift = LEAF_LEVEL - zoom - CELL_LEVEL_OFFSET
+        west, north = (v >> level_shift for v in leaf_tile(max_latitude, min_longitude))
+        east, south = (v >> level_shift for v in leaf_tile(min_latitude, max_longitude))
+        if west <= east:
+            columns = list(range(west, east + 1))
+        else:
+            columns = list(range(west, 1 << (LEAF_LEVEL - level_shift))) + list(range(0, east + 1))
+        cells = len(columns) * (south - north + 1)
+        if cells > MAX_VIEWPORT_CELLS:
+            raise ValueError(
+                f"Viewport covers {cells} cells at zoom {zoom}, at most {MAX_VIEWPORT_CELLS} are allowed"
+            )
+
+        self._sync(table)
+        cache = self._cache(zoom)
+        clusters, misses = [], 0
+        for y in range(north, south + 1):
+            for x in columns:
+                cell = morton_code(x, y)
+                cluster = cache.get(cell)
+                start = end = None
+                if cluster is None:
+                    start, end = self._range(cell, shift)
+                    if start == end:
+                        continue
+                    cluster = cache[cell] = _CellCluster(
+                        self._lats[start:end], self._lons[start:end], self._freqs[start:end]
+                    )
+                    misses += 1
+                elif cluster.stale or cluster.count == 1:
+                    start, end = self._range(cell, shift)
+                    if cluster.stale:
+                        cluster.refresh_bounds(self._lats[start:end], self._lons[start:end])
+                clusters.append(Cluster(
+                    count=cluster.count,
+                    latitude=cluster.sum_lat / cluster.count,
+                    longitude=cluster.sum_lon / cluster.count,
+                    min_latitude=cluster.min_lat,
+                    min_longitude=cluster.min_lon,
+                    max_latitude=cluster.max_lat,
+                    max_longitude=cluster.max_lon,
+                    frequency=cluster.dominant_frequency(),
+                    target_id=self._ids[start] if cluster.count == 1 else None,
+                ))
+        CACHE_REQUESTS.labels("clusters", "hit").inc(len(clusters) - misses)
+        CACHE_REQUESTS.labels("clusters", "miss").inc(misses)
+        return clusters
+
+
+def _shift(zoom: int) -> int:
+    """Bits dropped from a leaf code to get its cell code at a zoom level."""
+    return 2 * (MAX_ZOOM - zoom)
@@ -1,5 +1,23 @@
 """Entity Converters - Convert between plain objects and entities"""
 
-from .entity_converter import plain_to_entity, entity_to_plain
+from .entity_converter import (
+    plain_to_entity,
+    entity_to_plain,
+    plain_to_row,
+    row_to_plain,
+    entity_to_row,
+    row_to_entity,
+    position_to_entity,
+    entity_to_position,
+)
 
-__all__ = ["plain_to_entity", "entity_to_plain"]
+__all__ = [
+    "plain_to_entity",
+    "entity_to_plain",
+    "plain_to_row",
+    "row_to_plain",
+    "entity_to_row",
+    "row_to_entity",
+    "position_to_entity",
+    "entity_to_position",
+]
@@ -6,7 +6,11 @@ This converter is used in the DAL layer to transform:
 """
 
 from src.models.target import Target
+from src.models.position import PositionRecord
 from src.dal.entities.target_entity import TargetEntity
+from src.dal.entities.position_entity import PositionRecordEntity
+from src.dal.ip_codec import pack_ip, unpack_ip
+from src.dal.target_table import TargetRow
 
 
 def plain_to_entity(target: Target) -> TargetEntity:
@@ -49,3 +53,121 @@ def entity_to_plain(entity: TargetEntity) -> Target:
         bearing=float(entity.bearing),
         ip_address=entity.ip_address,
     )
+
+
+def plain_to_row(target: Target) -> TargetRow:
+    """Convert a plain Target object to an in-memory table row.
+    
+    Args:
+        target: Plain Target object from business logic layer
+        
+    Returns:
+        Row tuple in TargetEntity column order, with the IP address packed
+        
+    Raises:
+        ValueError: If the IP address is not a valid IPv4 or IPv6 address
+    """
+    return (
+        target.id,
+        target.latitude,
+        target.longitude,
+        target.altitude,
+        target.frequency,
+        target.speed,
+        target.bearing,
+        pack_ip(target.ip_address),
+    )
+
+
+def row_to_plain(row: TargetRow) -> Target:
+    """Convert an in-memory table row to a plain Target object.
+    
+    Args:
+        row: Row tuple in TargetEntity column order
+        
+    Returns:
+        Plain Target object for business logic layer
+    """
+    target_id, latitude, longitude, altitude, frequency, speed, bearing, ip = row
+    return Target(target_id, latitude, longitude, altitude, frequency, speed, bearing, unpack_ip(ip))
+
+
+def entity_to_row(entity: TargetEntity) -> TargetRow:
+    """Convert a TargetEntity from CSV to an in-memory table row.
+    
+    Args:
+        entity: TargetEntity read from CSV storage
+        
+    Returns:
+        Row tuple with numeric fields parsed and the IP address packed
+        
+    Raises:
+        ValueError: If a field cannot be parsed
+    """
+    return (
+        entity.id,
+        float(entity.latitude),
+        float(entity.longitude),
+        float(entity.altitude),
+        float(entity.frequency),
+        float(entity.speed),
+        float(entity.bearing),
+        pack_ip(entity.ip_address),
+    )
+
+
+def row_to_entity(row: TargetRow) -> TargetEntity:
+    """Convert an in-memory table row to a TargetEntity for CSV storage.
+    
+    Args:
+        row: Row tuple in TargetEntity column order
+        
+    Returns:
+        TargetEntity ready for CSV storage (all fields as strings)
+    """
+    return TargetEntity(
+        id=row[0],
+        latitude=str(row[1]),
+        longitude=str(row[2]),
+        altitude=str(row[3]),
+        frequency=str(row[4]),
+        speed=str(row[5]),
+        bearing=str(row[6]),
+        ip_address=unpack_ip(row[7]),
+    )
+
+
+def position_to_entity(record: PositionRecord) -> PositionRecordEntity:
+    """Convert a plain PositionRecord to a PositionRecordEntity for segment storage.
+    
+    Args:
+        record: Plain PositionRecord from business logic layer
+        
+    Returns:
+        PositionRecordEntity ready for segment storage (all fields as strings)
+    """
+    return PositionRecordEntity(
+        target_id=record.target_id,
+        timestamp=repr(record.timestamp),
+        latitude=str(record.latitude),
+        longitude=str(record.longitude),
+        altitude=str(record.altitude),
+    )
+
+
+def entity_to_position(entity: PositionRecordEntity) -> PositionRecord:
+    """Convert a PositionRecordEntity from a segment to a plain PositionRecord.
+    
+    Args:
+        entity: PositionRecordEntity read from segment storage
+        
+    Returns:
+        Plain PositionRecord for business logic layer
+    """
+    return PositionRecord(
+        target_id=entity.target_id,
+        timestamp=float(entity.timestamp),
+        latitude=float(entity.latitude),
+        longitude=float(entity.longitude),
+        altitude=float(entity.altitude),
+    )
@@ -0,0 +1,128 @@
+"""Density Tiles - Target counts per bin of Web Mercator map tiles.
+
+A density tile splits map tile z/x/y into TILE_BINS x TILE_BINS bins and
+counts the targets in each, for heatmaps that never load the targets
+themselves. Bins are the cells TILE_BIN_LEVELS levels below the tile, so
+the targets of a tile and their bins both come from the ClusterIndex: the
+tile is one range of the quadkey-sorted codes, and the bin of a code is
+its low bits. Counting maps shift and mask over the whole code range and
+tallies them with a Counter, so the per-target loop runs in C.
+
+Computed tiles are kept in an LRU cache of TILE_CACHE_SIZE tiles. A change
+invalidates only the tiles containing the old or new position of the
+changed target (one tile per zoom level), which the listener drops at
+once; every other cached tile stays valid.
+"""
+
+from array import array
+from collections import Counter, OrderedDict
+from itertools import repeat
+from operator import and_, rshift
+from typing import Optional
+
+from src.models.tile import DensityTile
+from src.dal.cluster_index import LEAF_LEVEL, ClusterIndex, leaf_code, morton_code
+from src.dal.target_table import TableListener, TargetRow, TargetTable
+from src.metrics import CACHE_REQUESTS
+
+TILE_BIN_LEVELS = 6
+TILE_BINS = 1 << TILE_BIN_LEVELS
+MAX_TILE_ZOOM = LEAF_LEVEL - TILE_BIN_LEVELS
+# 16 KiB each
+TILE_CACHE_SIZE = 1024
+
+_BIN_MASK = (1 << 2 * TILE_BIN_LEVELS) - 1
+
+
+def _row_major(bin_code: int) -> int:
+    """Row-major index (from the north-west corner) of a bin's Morton code."""
+    x = y = 0
+    for bit in range(TILE_BIN_LEVELS):
+        x |= ((bin_code >> (2 * bit)) & 1) << bit
+        y |= ((bin_code >> (2 * bit + 1)) & 1) << bit
+    return y * TILE_BINS + x
+
+
+_ROW_MAJOR = [_row_major(bin_code) for bin_code in range(TILE_BINS * TILE_BINS)]
+
+
+class DensityTiles(TableListener):
+    """LRU cache of density tiles computed from a ClusterIndex.
+
+    All methods must be called with the repository's table lock held.
+    """
+
+    def __init__(self, index: ClusterIndex, cache_size: int = TILE_CACHE_SIZE):
+        """Initialize an empty cache.
+
+        Args:
+            index: Quadkey index the tiles are counted from
+            cache_size: Tiles kept at most
+        """
+        self.index = index
+        self.cache_size = cache_size
+        # (zoom, tile cell code) -> bin counts, least recently used first
+        self._tiles: OrderedDict[tuple[int, int], array] = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # TableListener
+    # ------------------------------------------------------------------
+
+    def reset(self, table: TargetTable) -> None:
+        self._tiles.clear()
+
+    def put(self, old: Optional[TargetRow], row: TargetRow) -> None:
+        if old is not None:
+            if (old[1], old[2]) == (row[1], row[2]):
+                return
+            self._invalidate(old)
+        self._invalidate(row)
+
+    def remove(self, row: TargetRow) -> None:
+        self._invalidate(row)
+
+    def _invalidate(self, row: TargetRow) -> None:
+        """Drop the cached tiles containing the position of a row."""
+        if not self._tiles:
+            return
+        code = leaf_code(row[1], row[2])
+        pop = self._tiles.pop
+        for zoom in range(MAX_TILE_ZOOM + 1):
+            pop((zoom, code >> 2 * (LEAF_LEVEL - zoom)), None)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _count(self, table: TargetTable, zoom: int, cell: int) -> array:
+        """Count the targets per bin of a tile (row-major from the north-west)."""
+        codes = self.index.codes_in_cell(table, zoom, cell)
+        shift = 2 * (LEAF_LEVEL - zoom - TILE_BIN_LEVELS)
+        bins = map(and_, map(rshift, codes, repeat(shift)), repeat(_BIN_MASK))
+        counts = array("I", bytes(4 * TILE_BINS * TILE_BINS))
+        for bin_code, count in Counter(bins).items():
+            counts[_ROW_MAJOR[bin_code]] = count
+        return counts
+
+    def get(self, table: TargetTable, zoom: int, x: int, y: int) -> DensityTile:
+        """Return a density tile, from the cache if it is there.
+
+        Args:
+            table: The table the index follows
+            zoom: Tile zoom level (0 to MAX_TILE_ZOOM)
+            x, y: Tile coordinates (0 to 2 ** zoom - 1, y from the north)
+
+        Returns:
+            DensityTile whose counts are shared with the cache (do not modify)
+        """
+        key = (zoom, morton_code(x, y))
+        counts = self._tiles.get(key)
+        if counts is None:
+            CACHE_REQUESTS.labels("density_tiles", "miss").inc()
+            counts = self._tiles[key] = self._count(table, zoom, key[1])
+            if len(self._tiles) > self.cache_size:
+                self._tiles.popitem(last=False)
+        else:
+            CACHE_REQUESTS.labels("density_tiles", "hit").inc()
+            self._tiles.move_to_end(key)
+        return DensityTile(zoom, x, y, TILE_BINS, counts)
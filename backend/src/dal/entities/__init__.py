@@ -1,5 +1,6 @@
 """Entity classes for data storage interaction"""
 
 from .target_entity import TargetEntity
+from .position_entity import PositionRecordEntity
 
-__all__ = ["TargetEntity"]
+__all__ = ["TargetEntity", "PositionRecordEntity"]
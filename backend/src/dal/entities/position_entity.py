@@ -0,0 +1,54 @@
+"""Position Record Entity for history segment storage.
+
+This class has the Entity suffix and is used exclusively in the DAL layer
+for reading from and writing to position history segment files.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class PositionRecordEntity:
+    """Entity class for history segment storage.
+
+    All fields are stored as strings in CSV format.
+    Conversion to/from proper types happens in the entity converter.
+    """
+
+    target_id: str
+    timestamp: str
+    latitude: str
+    longitude: str
+    altitude: str
+
+    @classmethod
+    def csv_headers(cls) -> list[str]:
+        """Return CSV column headers in order."""
+        return [
+            "target_id",
+            "timestamp",
+            "latitude",
+            "longitude",
+            "altitude",
+        ]
+
+    def to_csv_row(self) -> list[str]:
+        """Convert entity to CSV row values."""
+        return [
+            self.target_id,
+            self.timestamp,
+            self.latitude,
+            self.longitude,
+            self.altitude,
+        ]
+
+    @classmethod
+    def from_csv_values(cls, values: list[str]) -> "PositionRecordEntity":
+        """Create entity from positional CSV row values."""
+        return cls(
+            target_id=values[0],
+            timestamp=values[1],
+            latitude=values[2],
+            longitude=values[3],
+            altitude=values[4],
+        )
@@ -0,0 +1,116 @@
+"""Event Log - Numbered events shared by all worker processes.
+
+Proximity and geofence events are evaluated by the process that makes a
+change, and only there: it appends them to a JSON lines file while it still
+holds the repository's exclusive file lock, numbering them after the last
+event in the file. Every process serves get() from the same file, reading
+only the lines appended since its last read, so a client polling with
+after=N gets the same events under the same numbers and timestamps from any
+worker, including one that reloaded its table after falling behind.
+
+The file keeps at least the last `kept` events: once it holds twice as many
+it is replaced by one holding the last `kept`. Readers notice the
+replacement by its different first line and read it from the start.
+"""
+
+import json
+import os
+from collections import deque
+from dataclasses import asdict
+from itertools import islice
+from pathlib import Path
+from typing import Generic, TypeVar
+
+EVENTS_KEPT = 10_000
+
+E = TypeVar("E")
+
+
+class EventLog(Generic[E]):
+    """Append-only file of numbered events (dataclasses with a `sequence` field)."""
+
+    def __init__(self, path: str, event_type: type, kept: int = EVENTS_KEPT):
+        """Initialize a log on a file (created by the first append).
+
+        Args:
+            path: Path of the JSON lines file
+            event_type: Dataclass the events are read back as
+            kept: Most recent events kept for get
+        """
+        self.path = Path(path)
+        self.event_type = event_type
+        self.kept = kept
+        self._events: deque = deque(maxlen=kept)
+        # First line of the file read and the byte offset read up to
+        self._first_line = b""
+        self._offset = 0
+        # Events in the file (complete lines), trimmed when over 2 * kept
+        self._lines = 0
+
+    def _refresh(self) -> None:
+        """Read the events appended since the last read."""
+        try:
+            with open(self.path, "rb") as f:
+                first_line = f.readline()
+                if first_line != self._first_line:
+                    self._first_line, self._offset, self._lines = first_line, 0, 0
+                    self._events.clear()
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # A trailing line without newline is still being written
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            self._events.append(self.event_type(**json.loads(line)))
+            self._lines += 1
+        self._offset += end
+
+    def append(self, events: list[E]) -> None:
+        """Number events after the last one logged and append them.
+
+        Must be called with the repository's exclusive file lock held.
+        """
+        if not events:
+            return
+        self._refresh()
+        sequence = self._events[-1].sequence if self._events else 0
+        for event in events:
+            sequence += 1
+            event.sequence = sequence
+        if self._lines + len(events) > 2 * self.kept:
+            self._events.extend(events)
+            self._rewrite()
+            return
+        data = "".join(json.dumps(asdict(event)) + "\n" for event in events).encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(data)
+        if self._offset == 0:
+            self._first_line = data[:data.find(b"\n") + 1]
+        self._events.extend(events)
+        self._offset += len(data)
+        self._lines += len(events)
+
+    def _rewrite(self) -> None:
+        """Replace the file by one holding the kept events."""
+        tmp_path = self.path.with_suffix(f"{self.path.suffix}.{os.getpid()}.tmp")
+        data = "".join(json.dumps(asdict(event)) + "\n" for event in self._events).encode("utf-8")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        self._first_line = data[:data.find(b"\n") + 1]
+        self._offset = len(data)
+        self._lines = len(self._events)
+
+    def get(self, after: int, limit: int) -> list[E]:
+        """Return the kept events numbered above a sequence, oldest first.
+
+        Args:
+            after: Sequence of the last event already seen (0 for all kept)
+            limit: Events returned at most
+        """
+        self._refresh()
+        if not self._events:
+            return []
+        start = max(0, after - self._events[0].sequence + 1)
+        return list(islice(self._events, start, start + limit))
@@ -0,0 +1,145 @@
+"""File Lock - Cross-process reader/writer lock on a lock file.
+
+Readers take the lock shared and writers take it exclusive, using fcntl.flock
+on a dedicated lock file (data files themselves are replaced by rename, so
+they cannot carry the lock). flock does not exclude threads that share a
+file descriptor, so threads of one process are coordinated by an in-process
+reader/writer lock first; only the first reader and the writer of a process
+touch the flock. Waiting writers get priority over new readers.
+
+The file descriptor is opened per process, which keeps locks of forked
+workers independent of each other.
+
+Every acquisition records how long it waited, per mode, and waits longer
+than SLOW_WAIT_MS are logged as warnings.
+"""
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.metrics import LOCK_WAIT
+
+logger = logging.getLogger(__name__)
+
+SLOW_WAIT_MS = 100.0
+
+
+class LockWaitStats:
+    """Wait-time statistics of one lock mode."""
+
+    def __init__(self):
+        self.acquisitions = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def record(self, wait_ms: float) -> None:
+        """Record one acquisition."""
+        self.acquisitions += 1
+        self.total_wait_ms += wait_ms
+        if wait_ms > self.max_wait_ms:
+            self.max_wait_ms = wait_ms
+
+    def to_dict(self) -> dict:
+        """Return the statistics as a dictionary."""
+        return {
+            "acquisitions": self.acquisitions,
+            "total_wait_ms": self.total_wait_ms,
+            "max_wait_ms": self.max_wait_ms,
+        }
+
+
+class FileLock:
+    """Shared/exclusive lock on a file, across processes and threads."""
+
+    def __init__(self, path: Path):
+        """Initialize lock (the lock file is created on first use).
+
+        Args:
+            path: Path of the lock file
+        """
+        self.path = Path(path)
+        self.stats = {"shared": LockWaitStats(), "exclusive": LockWaitStats()}
+        self._pid: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._open_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Reset the in-process reader/writer state."""
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def _fileno(self) -> int:
+        """Return this process's descriptor of the lock file."""
+        if self._pid != os.getpid():
+            with self._open_lock:
+                if self._pid != os.getpid():
+                    # Forked: the inherited descriptor would share the parent's lock
+                    self._reset()
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    self._pid = os.getpid()
+        return self._fd
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        """Hold the lock shared with other readers."""
+        fd = self._fileno()
+        started = time.perf_counter()
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+            if self._readers == 0:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            self._readers += 1
+        self._record("shared", started)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Hold the lock exclusively."""
+        fd = self._fileno()
+        started = time.perf_counter()
+        with self._condition:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                self._writer = False
+                self._condition.notify_all()
+                raise
+        self._record("exclusive", started)
+        try:
+            yield
+        finally:
+            with self._condition:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                self._writer = False
+                self._condition.notify_all()
+
+    def _record(self, mode: str, started: float) -> None:
+        wait_ms = (time.perf_counter() - started) * 1000
+        self.stats[mode].record(wait_ms)
+        LOCK_WAIT.labels(self.path.name, mode).observe(wait_ms / 1000)
+        if wait_ms > SLOW_WAIT_MS:
+            logger.warning("Waited %.1fms for %s lock on %s", wait_ms, mode, self.path.name)
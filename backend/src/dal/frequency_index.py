@@ -0,0 +1,195 @@
+"""Frequency Index - Targets grouped by frequency for spectrum occupancy.
+
+The index files the id of every target under its exact frequency. Targets
+use a handful of distinct frequencies (433, 915, 2.4, 5.2, 5.8 and some
+custom values), so the groups are few and large. Each change moves one id
+between two groups, and an occupancy query only walks the groups instead
+of the table: the targets of a band are the union of the groups of the
+frequencies inside it, and which bands hold a frequency is worked out once
+per distinct frequency.
+
+Bands are configurable (see parse_bands and FREQUENCY_BANDS); they may
+overlap, and a target counts in every band its frequency falls into.
+Frequencies are compared as stored: the default bands follow the values
+the UI offers, 433 and 915 in MHz and 2.4, 5.2 and 5.8 in GHz.
+
+Occupancy in a viewport is counted from the targets the ClusterIndex
+returns for the viewport, grouped by frequency the same way. The groups
+are built at the first occupancy query after the table was (re)loaded;
+changes made before that cost nothing.
+"""
+
+from typing import Optional
+
+from src.models.spectrum import BandOccupancy, FrequencyBand, SpectrumOccupancy
+from src.dal.cluster_index import ClusterIndex
+from src.dal.target_table import TableListener, TargetRow, TargetTable
+
+DEFAULT_BANDS = (
+    FrequencyBand("433 MHz", 430.0, 440.0),
+    FrequencyBand("915 MHz", 902.0, 928.0),
+    FrequencyBand("2.4 GHz", 2.4, 2.5),
+    FrequencyBand("5.2 GHz", 5.15, 5.35),
+    FrequencyBand("5.8 GHz", 5.725, 5.875),
+)
+
+
+def parse_bands(text: str) -> list[FrequencyBand]:
+    """Parse bands written as "name=min-max" separated by semicolons.
+
+    Example: "433 MHz=430-440;2.4 GHz=2.4-2.5"
+
+    Raises:
+        ValueError: If a band is malformed or its range is invalid
+    """
+    bands = []
+    for item in filter(None, (part.strip() for part in text.split(";"))):
+        name, separator, frequencies = item.rpartition("=")
+        low, dash, high = frequencies.partition("-")
+        if not separator or not dash:
+            raise ValueError(f"Frequency band must be written as name=min-max, got {item!r}")
+        bands.append(FrequencyBand(name.strip(), float(low), float(high)))
+    if not bands:
+        raise ValueError("At least one frequency band is required")
+    return bands
+
+
+class FrequencyIndex(TableListener):
+    """Ids of the targets grouped by exact frequency.
+
+    All methods must be called with the repository's table lock held.
+    """
+
+    def __init__(self, index: ClusterIndex, bands: tuple[FrequencyBand, ...] = DEFAULT_BANDS):
+        """Initialize an index following no table yet (see reset).
+
+        Args:
+            index: Quadkey index the targets of a viewport are read from
+            bands: Bands occupancy is reported for, in the order given
+        """
+        self.index = index
+        self.bands = tuple(bands)
+        self._table = TargetTable()
+        # Frequency -> ids of the targets using it; None until the first query
+        self._groups: Optional[dict[float, set[str]]] = None
+        # Frequency -> positions in self.bands of the bands holding it
+        self._bands_of: dict[float, tuple[int, ...]] = {}
+
+    def _build(self) -> dict[float, set[str]]:
+        groups: dict[float, set[str]] = {}
+        for target_id, frequency in zip(self._table.ids, self._table.columns[3]):
+            if target_id is not None:
+                group = groups.get(frequency)
+                if group is None:
+                    group = groups[frequency] = set()
+                group.add(target_id)
+        return groups
+
+    def _band_positions(self, frequency: float) -> tuple[int, ...]:
+        positions = self._bands_of.get(frequency)
+        if positions is None:
+            positions = self._bands_of[frequency] = tuple(
+                i for i, band in enumerate(self.bands) if frequency in band
+            )
+        return positions
+
+    def _in_viewport(
+        self, min_latitude: float, min_longitude: float, max_latitude: float, max_longitude: float
+    ) -> dict[float, set[str]]:
+        """Group the targets of a viewport by frequency."""
+        if min_longitude > max_longitude:
+            # Crossing the antimeridian: the part to the west of it, then to the east
+            boxes = ((min_longitude, 180.0), (-180.0, max_longitude))
+        else:
+            boxes = ((min_longitude, max_longitude),)
+        index, frequencies = self._table.index, self._table.columns[3]
+        groups: dict[float, set[str]] = {}
+        for west, east in boxes:
+            ids, lats, lons = self.index.targets_in_box(self._table, min_latitude, west, max_latitude, east)
+            for target_id, lat, lon in zip(ids, lats, lons):
+                if min_latitude <= lat <= max_latitude and west <= lon <= east:
+                    groups.setdefault(frequencies[index[target_id]], set()).add(target_id)
+        return groups
+
+    # ------------------------------------------------------------------
+    # TableListener
+    # ------------------------------------------------------------------
+
+    def reset(self, table: TargetTable) -> None:
+        self._table = table
+        self._groups = None
+
+    def put(self, old: Optional[TargetRow], row: TargetRow) -> None:
+        groups = self._groups
+        if groups is None:
+            return
+        if old is not None:
+            if old[4] == row[4]:
+                return
+            self._discard(old)
+        group = groups.get(row[4])
+        if group is None:
+            group = groups[row[4]] = set()
+        group.add(row[0])
+
+    def remove(self, row: TargetRow) -> None:
+        if self._groups is not None:
+            self._discard(row)
+
+    def _discard(self, row: TargetRow) -> None:
+        group = self._groups[row[4]]
+        group.discard(row[0])
+        if not group:
+            del self._groups[row[4]]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def occupancy(
+        self,
+        min_latitude: float = -90.0,
+        min_longitude: float = -180.0,
+        max_latitude: float = 90.0,
+        max_longitude: float = 180.0,
+    ) -> SpectrumOccupancy:
+        """Count the targets of a viewport per band.
+
+        Args:
+            min_latitude, min_longitude, max_latitude, max_longitude: Viewport
+                (defaults to the whole map); a min_longitude above
+                max_longitude crosses the antimeridian
+
+        Returns:
+            SpectrumOccupancy with one entry per band, in the order configured
+        """
+        if self._groups is None:
+            self._groups = self._build()
+        if (min_latitude, min_longitude, max_latitude, max_longitude) == (-90.0, -180.0, 90.0, 180.0):
+            groups = self._groups
+        else:
+            groups = self._in_viewport(min_latitude, min_longitude, max_latitude, max_longitude)
+
+        members: list[list[set[str]]] = [[] for _ in self.bands]
+        frequencies: list[dict[float, int]] = [{} for _ in self.bands]
+        unbanded: dict[float, int] = {}
+        for frequency in sorted(groups):
+            group = groups[frequency]
+            positions = self._band_positions(frequency)
+            if not positions:
+                unbanded[frequency] = len(group)
+            for i in positions:
+                members[i].append(group)
+                frequencies[i][frequency] = len(group)
+
+        position_of = self._table.index.__getitem__
+        bands = [
+            BandOccupancy(
+                band,
+                sum(frequencies[i].values()),
+                frequencies[i],
+                sorted(set().union(*members[i]), key=position_of),
+            )
+            for i, band in enumerate(self.bands)
+        ]
+        return SpectrumOccupancy(sum(map(len, groups.values())), bands, unbanded)
@@ -0,0 +1,240 @@
+"""Geofence Index - Targets inside geofences and their enter/exit events.
+
+Geofences are polygons in the plane of latitude and longitude (they may not
+cross the antimeridian). Whether a position lies inside one is decided by
+ray casting: a ray from the position towards the east crosses the border of
+the polygon an odd number of times exactly when the position is inside.
+
+Fences are indexed by bounding box on a grid of GRID_DEGREES cells: each
+cell lists the fences whose box overlaps it. A changed target is therefore
+only tested against the few fences listed in the cells of its old and new
+position, however many fences are registered, and a fence whose membership
+flips raises an "enter" or "exit" event while `reporting` is set, i.e. for
+the writes of this process; the repository numbers the events in the
+shared EventLog (see src.dal.event_log).
+
+The targets inside a fence are computed as a batch when the fence is
+registered (or the index is built): its candidates are read from the
+ClusterIndex, sorted by latitude, and the rays are cast column-wise. An
+edge only crosses the rays of the positions between its two latitudes,
+which form one slice of the sorted columns; the crossing longitudes of the
+whole slice are computed with map(), so the loop over positions runs in C.
+Both ways compute the crossing with the same expression, so they agree on
+every position, also on the border.
+
+The index is built at the first change or query, and reads the registered
+fences from the GeofenceRepository whenever their version changed, so
+fences registered by any worker process are evaluated by all of them.
+"""
+
+import math
+import time
+from bisect import bisect_left, bisect_right
+from itertools import compress, repeat
+from operator import add, and_, ge, le, lt, mul, sub, truediv, xor
+from typing import Iterator, Optional
+
+from src.models.geofence import Geofence, GeofenceEvent
+from src.dal.cluster_index import ClusterIndex
+from src.dal.geofence_repository import GeofenceRepository
+from src.dal.target_table import TableListener, TargetRow, TargetTable
+
+GRID_DEGREES = 1.0
+
+
+class _Fence:
+    """A registered geofence with its edges and the targets inside it."""
+
+    __slots__ = ("id", "edges", "min_lat", "min_lon", "max_lat", "max_lon", "inside")
+
+    def __init__(self, fence: Geofence):
+        self.id = fence.id
+        vertices = fence.vertices
+        # (lat, lon) of both ends of every edge that is not horizontal (those cross no ray)
+        self.edges = [
+            (lat, lon, next_lat, next_lon)
+            for (lat, lon), (next_lat, next_lon) in zip(vertices, vertices[1:] + vertices[:1])
+            if lat != next_lat
+        ]
+        lats, lons = [v[0] for v in vertices], [v[1] for v in vertices]
+        self.min_lat, self.max_lat = min(lats), max(lats)
+        self.min_lon, self.max_lon = min(lons), max(lons)
+        self.inside: set[str] = set()
+
+    def cells(self) -> Iterator[tuple[int, int]]:
+        """Grid cells overlapping the bounding box."""
+        for row in range(_grid(self.min_lat), _grid(self.max_lat) + 1):
+            for column in range(_grid(self.min_lon), _grid(self.max_lon) + 1):
+                yield row, column
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """Cast the ray of one position."""
+        if not (self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon):
+            return False
+        inside = False
+        for lat_i, lon_i, lat_j, lon_j in self.edges:
+            if (lat_i > lat) != (lat_j > lat) and lon < (lon_j - lon_i) * (lat - lat_i) / (lat_j - lat_i) + lon_i:
+                inside = not inside
+        return inside
+
+    def contained(self, ids: list[str], lats: list[float], lons: list[float]) -> set[str]:
+        """Cast the rays of many positions column-wise and return the ids inside."""
+        order = sorted(range(len(lats)), key=lats.__getitem__)
+        lats = [lats[i] for i in order]
+        start, end = bisect_left(lats, self.min_lat), bisect_right(lats, self.max_lat)
+        lats, lons, ids = lats[start:end], [lons[i] for i in order[start:end]], [ids[i] for i in order[start:end]]
+        in_box = list(map(and_, map(le, repeat(self.min_lon), lons), map(ge, repeat(self.max_lon), lons)))
+        lats, lons, ids = list(compress(lats, in_box)), list(compress(lons, in_box)), list(compress(ids, in_box))
+
+        inside = [False] * len(lats)
+        for lat_i, lon_i, lat_j, lon_j in self.edges:
+            # Positions with lat_i > lat != lat_j > lat, i.e. low <= lat < high
+            low, high = (lat_i, lat_j) if lat_i < lat_j else (lat_j, lat_i)
+            first = bisect_left(lats, low)
+            last = bisect_left(lats, high, first)
+            if first == last:
+                continue
+            crossings = map(add, map(truediv, map(
+                mul, repeat(lon_j - lon_i), map(sub, lats[first:last], repeat(lat_i))
+            ), repeat(lat_j - lat_i)), repeat(lon_i))
+            inside[first:last] = map(xor, inside[first:last], map(lt, lons[first:last], crossings))
+        return set(compress(ids, inside))
+
+
+def _grid(degrees: float) -> int:
+    return math.floor(degrees / GRID_DEGREES)
+
+
+class GeofenceIndex(TableListener):
+    """Bounding box grid of the geofences with the targets inside each.
+
+    All methods must be called with the repository's table lock held.
+    """
+
+    def __init__(self, store: GeofenceRepository, index: ClusterIndex):
+        """Initialize an index following no table yet (see reset).
+
+        Args:
+            store: Repository the fences are read from
+            index: Quadkey index the candidates of a fence are read from
+        """
+        self.store = store
+        self.index = index
+        self._table = TargetTable()
+        # Store version the fences were read at
+        self._version: Optional[int] = None
+        self._fences: dict[str, _Fence] = {}
+        # Grid cell -> fences whose bounding box overlaps it
+        self._grid: dict[tuple[int, int], list[_Fence]] = {}
+        # Whether the targets inside the fences follow the table
+        self._built = False
+        # Whether membership changes are reported, and the events found
+        # since the repository last took them (numbered when logged)
+        self.reporting = False
+        self.events: list[GeofenceEvent] = []
+
+    def _refresh(self) -> None:
+        """Register the fences added and drop those deleted since the last read."""
+        version = self.store.version
+        if version == self._version:
+            return
+        fences = {fence.id: fence for fence in self.store.get_all()}
+        for fence_id in self._fences.keys() - fences.keys():
+            fence = self._fences.pop(fence_id)
+            for cell in fence.cells():
+                self._grid[cell].remove(fence)
+                if not self._grid[cell]:
+                    del self._grid[cell]
+        for fence_id, geofence in fences.items():
+            if fence_id not in self._fences:
+                fence = self._fences[fence_id] = _Fence(geofence)
+                for cell in fence.cells():
+                    self._grid.setdefault(cell, []).append(fence)
+                if self._built:
+                    fence.inside = self._contained(fence)
+        self._version = version
+
+    def _contained(self, fence: _Fence) -> set[str]:
+        ids, lats, lons = self.index.targets_in_box(
+            self._table, fence.min_lat, fence.min_lon, fence.max_lat, fence.max_lon
+        )
+        return fence.contained(ids, lats.tolist(), lons.tolist())
+
+    def _build(self) -> None:
+        for fence in self._fences.values():
+            fence.inside = self._contained(fence)
+        self._built = True
+
+    def _candidates(self, lat: float, lon: float) -> list[_Fence]:
+        return self._grid.get((_grid(lat), _grid(lon)), [])
+
+    def _evaluate(self, target_id: str, fences: dict[str, _Fence], position: Optional[TargetRow]) -> None:
+        """Update the memberships of a target in some fences and report the changes."""
+        now = time.time()
+        for fence in fences.values():
+            was_inside = target_id in fence.inside
+            if was_inside == (position is not None and fence.contains(position[1], position[2])):
+                continue
+            if was_inside:
+                fence.inside.discard(target_id)
+            else:
+                fence.inside.add(target_id)
+            if self.reporting:
+                self.events.append(GeofenceEvent(
+                    0, "exit" if was_inside else "enter", fence.id, target_id, now
+                ))
+
+    # ------------------------------------------------------------------
+    # TableListener
+    # ------------------------------------------------------------------
+
+    def reset(self, table: TargetTable) -> None:
+        self._table = table
+        self._built = False
+
+    def put(self, old: Optional[TargetRow], row: TargetRow) -> None:
+        self._refresh()
+        target_id = row[0]
+        if not self._built:
+            # Built from the table after this change: undo it in the fences
+            self._build()
+            for fence in self._candidates(row[1], row[2]):
+                fence.inside.discard(target_id)
+            if old is not None:
+                for fence in self._candidates(old[1], old[2]):
+                    if fence.contains(old[1], old[2]):
+                        fence.inside.add(target_id)
+        if old is not None and (old[1], old[2]) == (row[1], row[2]):
+            return
+        fences = {fence.id: fence for fence in self._candidates(row[1], row[2])}
+        if old is not None:
+            fences.update((fence.id, fence) for fence in self._candidates(old[1], old[2]))
+        self._evaluate(target_id, fences, row)
+
+    def remove(self, row: TargetRow) -> None:
+        self._refresh()
+        candidates = {fence.id: fence for fence in self._candidates(row[1], row[2])}
+        if not self._built:
+            self._build()
+            for fence in candidates.values():
+                if fence.contains(row[1], row[2]):
+                    fence.inside.add(row[0])
+        self._evaluate(row[0], candidates, None)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def target_ids(self, fence_id: str) -> Optional[list[str]]:
+        """Return the ids of the targets inside a fence, in table order.
+
+        Returns:
+            List of ids, or None if the fence does not exist
+        """
+        self._refresh()
+        if not self._built:
+            self._build()
+        fence = self._fences.get(fence_id)
+        if fence is None:
+            return None
+        return sorted(fence.inside, key=self._table.index.__getitem__)
@@ -0,0 +1,100 @@
+"""Geofence Repository - Persisted geofence polygons.
+
+All geofences are kept in one JSON file, rewritten atomically on every
+change under an exclusive FileLock (geofences change rarely; they are read
+far more often than written). Every change bumps the "version" counter
+(SharedCounters), so a process tells cheaply whether the fences another
+process sees differ from the ones it loaded.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from src.models.geofence import Geofence
+from src.dal.file_lock import FileLock
+from src.dal.shared_counters import SharedCounters
+
+logger = logging.getLogger(__name__)
+
+
+class GeofenceRepository:
+    """Repository for geofences using a single JSON file."""
+
+    def __init__(self, path: str = "./data/geofences.json", counters: Optional[SharedCounters] = None):
+        """Initialize repository with the JSON file path.
+
+        Args:
+            path: Path to the JSON file holding all geofences
+            counters: Change counters shared with other repositories on the
+                same file (creates private ones if None)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file_lock = FileLock(self.path.with_suffix(".lock"))
+        self._counters = counters or SharedCounters("version")
+
+    @property
+    def version(self) -> int:
+        """Number of changes made to the geofences (by processes sharing the counters)."""
+        return self._counters["version"]
+
+    def share_between_processes(self) -> None:
+        """Prepare for use by forked worker processes (call before forking)."""
+        self._counters.share()
+
+    def _read(self) -> list[Geofence]:
+        try:
+            with open(self.path) as f:
+                return [
+                    Geofence(item["id"], item["name"], [tuple(vertex) for vertex in item["vertices"]])
+                    for item in json.load(f)
+                ]
+        except FileNotFoundError:
+            return []
+
+    def _write(self, fences: list[Geofence]) -> None:
+        tmp_path = self.path.with_suffix(f".json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                [{"id": fence.id, "name": fence.name, "vertices": fence.vertices} for fence in fences], f
+            )
+        os.replace(tmp_path, self.path)
+        self._counters["version"] += 1
+
+    def get_all(self) -> list[Geofence]:
+        """Get all geofences, oldest first."""
+        with self.file_lock.shared():
+            return self._read()
+
+    def get_by_id(self, fence_id: str) -> Optional[Geofence]:
+        """Get a geofence by ID.
+
+        Returns:
+            Plain Geofence object if found, None otherwise
+        """
+        return next((fence for fence in self.get_all() if fence.id == fence_id), None)
+
+    def create(self, fence: Geofence) -> Geofence:
+        """Store a new geofence."""
+        with self.file_lock.exclusive():
+            self._write(self._read() + [fence])
+        logger.info("Geofence created: %s", fence.id)
+        return fence
+
+    def delete(self, fence_id: str) -> Optional[Geofence]:
+        """Delete a geofence by ID.
+
+        Returns:
+            The deleted Geofence if found, None otherwise
+        """
+        with self.file_lock.exclusive():
+            fences = self._read()
+            deleted = next((fence for fence in fences if fence.id == fence_id), None)
+            if deleted is None:
+                return None
+            self._write([fence for fence in fences if fence is not deleted])
+        logger.info("Geofence deleted: %s", fence_id)
+        return deleted
@@ -0,0 +1,53 @@
+"""IP Codec - Packed integer form of IP addresses for storage and indexes.
+
+The storage layer keeps every address as one 128-bit integer: IPv6
+addresses as is, IPv4 addresses in the IPv4-mapped range ::ffff:0:0/96.
+All IPv4 addresses therefore sort together and in numeric order, so address
+ranges are plain integer comparisons. Text is produced only when rows leave
+the storage layer (CSV files and plain Target objects).
+
+Parsing uses inet_pton, which accepts exactly the canonical dotted-quad
+IPv4 form (no leading zeros, octets up to 255) and any valid IPv6 form.
+"""
+
+import socket
+
+IPV4_MAPPED = 0xFFFF << 32
+_MAPPED_PREFIX = 0xFFFF
+_OCTETS = [str(octet) for octet in range(256)]
+
+_inet_pton = socket.inet_pton
+_inet_ntop = socket.inet_ntop
+_from_bytes = int.from_bytes
+
+
+def pack_ip(text: str) -> int:
+    """Convert an IPv4 or IPv6 address to its packed integer.
+
+    Raises:
+        ValueError: If the text is not a valid address
+    """
+    try:
+        return IPV4_MAPPED | _from_bytes(_inet_pton(socket.AF_INET, text), "big")
+    except OSError:
+        pass
+    except TypeError:
+        raise ValueError(f"IP address must be a string, got {text!r}") from None
+    try:
+        return _from_bytes(_inet_pton(socket.AF_INET6, text), "big")
+    except OSError:
+        raise ValueError(f"Invalid IP address: {text!r}") from None
+
+
+def unpack_ip(value: int) -> str:
+    """Convert a packed integer back to the address text."""
+    if value >> 32 == _MAPPED_PREFIX:
+        # Joining cached octet strings is faster than inet_ntoa
+        return ".".join((
+            _OCTETS[value >> 24 & 255],
+            _OCTETS[value >> 16 & 255],
+            _OCTETS[value >> 8 & 255],
+            _OCTETS[value & 255],
+        ))
+    return _inet_ntop(socket.AF_INET6, value.to_bytes(16, "big"))
+
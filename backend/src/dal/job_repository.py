@@ -0,0 +1,104 @@
+"""Job Repository - Persisted state of background jobs.
+
+Every job is kept as one small JSON file (<id>.json) in the jobs
+directory, next to the files the job reads or writes (uploads, exports).
+Files are replaced atomically, so a job is never seen half-written.
+
+Any worker process may read a job, but only its owner process runs it.
+State changes are read-modify-write under an exclusive FileLock on
+jobs.lock, so a cancel request written by one process is not lost when
+the owner saves progress at the same time.
+"""
+
+import json
+import logging
+import os
+import uuid
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from src.models.job import Job
+from src.dal.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+
+class JobRepository:
+    """Repository for background job state using one JSON file per job."""
+
+    def __init__(self, jobs_dir: str):
+        """Initialize repository with the jobs directory.
+
+        Args:
+            jobs_dir: Directory holding job state and job files
+        """
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.file_lock = FileLock(self.jobs_dir / "jobs.lock")
+
+    def file_path(self, job_id: str, suffix: str) -> Path:
+        """Return the path of a file belonging to a job (e.g. ".upload")."""
+        return self.jobs_dir / f"{job_id}{suffix}"
+
+    def _read(self, job_id: str) -> Optional[Job]:
+        try:
+            # Only ids in canonical UUID form name a job file
+            if str(uuid.UUID(job_id)) != job_id:
+                return None
+            with open(self.file_path(job_id, ".json")) as f:
+                return Job(**json.load(f))
+        except (ValueError, TypeError, FileNotFoundError):
+            return None
+
+    def _write(self, job: Job) -> None:
+        path = self.file_path(job.id, ".json")
+        tmp_path = path.with_suffix(f".json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(job), f)
+        os.replace(tmp_path, path)
+
+    def create(self, job: Job) -> Job:
+        """Store a new job."""
+        with self.file_lock.exclusive():
+            self._write(job)
+        logger.debug("Stored job %s (%s)", job.id, job.kind)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID.
+
+        Returns:
+            Plain Job object if found, None otherwise
+        """
+        with self.file_lock.shared():
+            return self._read(job_id)
+
+    def get_all(self) -> list[Job]:
+        """Get all jobs, oldest first."""
+        with self.file_lock.shared():
+            jobs = [self._read(path.stem) for path in self.jobs_dir.glob("*.json")]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job.created_at)
+
+    def update(self, job_id: str, expect: Optional[dict] = None, **changes) -> Optional[Job]:
+        """Change fields of a stored job, optionally only if it is in a given state.
+
+        Args:
+            job_id: UUID of the job
+            expect: Field values the stored job must have for the change to
+                apply (compare-and-set across processes)
+            changes: Job fields to set
+
+        Returns:
+            The updated Job, or None if not found or not in the expected state
+        """
+        with self.file_lock.exclusive():
+            job = self._read(job_id)
+            if job is None:
+                return None
+            if expect and any(getattr(job, name) != value for name, value in expect.items()):
+                return None
+            for name, value in changes.items():
+                setattr(job, name, value)
+            self._write(job)
+        return job
@@ -0,0 +1,350 @@
+"""Position History Repository - Append-only segment storage for positions.
+
+Every accepted position change is appended as one CSV line to the active
+segment file. Segments roll over after a fixed number of records, so each
+segment covers a contiguous, non-overlapping time range. Next to every
+segment a sparse index file records the timestamp and byte offset of every
+Nth record, which lets a time-window query seek close to the first matching
+line instead of scanning the whole segment.
+
+Layout of the history directory:
+    segment-<start_us>.csv   Position records in timestamp order
+    segment-<start_us>.idx   Sparse index: "timestamp,offset" lines
+
+When several processes share the directory, appends hold the FileLock on
+history.lock exclusive and reads hold it shared, so no one reads a partially
+written line. Every append bumps the "version" counter (SharedCounters); a
+process that sees a newer version reloads the metadata of the newest segment
+and of segments created since. Sealed segments never change and are not
+re-read.
+"""
+
+import bisect
+import csv
+import io
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.models.position import PositionRecord
+from src.dal.entities.position_entity import PositionRecordEntity
+from src.dal.converters.entity_converter import position_to_entity, entity_to_position
+from src.dal.file_lock import FileLock
+from src.dal.shared_counters import SharedCounters
+from src.metrics import REPOSITORY_DURATION, count_rows, timed
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".csv"
+INDEX_SUFFIX = ".idx"
+
+
+@dataclass
+class _Segment:
+    """In-memory metadata for one segment file."""
+
+    path: Path
+    start_ts: float
+    index_ts: list[float] = field(default_factory=list)
+    index_offsets: list[int] = field(default_factory=list)
+    record_count: int = 0
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_suffix(INDEX_SUFFIX)
+
+
+class PositionHistoryRepository:
+    """Repository for append-only position history using rolling segment files."""
+
+    def __init__(
+        self,
+        history_dir: str,
+        segment_max_records: int = 100_000,
+        index_interval: int = 256,
+        counters: Optional[SharedCounters] = None,
+    ):
+        """Initialize repository and load segment metadata.
+
+        Args:
+            history_dir: Directory holding segment and index files
+            segment_max_records: Records per segment before rolling to a new one
+            index_interval: Write one sparse index entry every N records
+            counters: Change counters shared with other repositories on the
+                same directory (creates private ones if None)
+        """
+        self.history_dir = Path(history_dir)
+        self.segment_max_records = segment_max_records
+        self.index_interval = index_interval
+        self._segments: list[_Segment] = []
+        self._segment_starts: list[float] = []
+        self._active_file: Optional[io.TextIOWrapper] = None
+        self._active_writer = None
+        self._last_ts = float("-inf")
+        self._counters = counters or SharedCounters("version")
+        self._version = 0
+        self._lock = threading.Lock()
+
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        self.file_lock = FileLock(self.history_dir / "history.lock")
+        with self.file_lock.shared():
+            self._load_segments()
+        logger.info(
+            "Loaded %s history segments from %s", len(self._segments), self.history_dir
+        )
+
+    # ------------------------------------------------------------------
+    # Segment bookkeeping
+    # ------------------------------------------------------------------
+
+    def _load_segments(self) -> None:
+        """Load sparse indexes of segments not loaded yet (segment data is not read).
+
+        The newest known segment is reloaded as well, since it may have grown.
+        """
+        if self._segments:
+            self._segments.pop()
+            self._segment_starts.pop()
+        loaded_up_to = self._segments[-1].path.name if self._segments else ""
+
+        for path in sorted(self.history_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")):
+            if path.name <= loaded_up_to:
+                continue
+            start_us = int(path.stem[len(SEGMENT_PREFIX):])
+            segment = _Segment(path=path, start_ts=start_us / 1_000_000)
+            if segment.index_path.exists():
+                with open(segment.index_path, "r", newline="") as f:
+                    reader = csv.reader(f)
+                    next(reader, None)
+                    for ts, offset in reader:
+                        segment.index_ts.append(float(ts))
+                        segment.index_offsets.append(int(offset))
+            self._segments.append(segment)
+            self._segment_starts.append(segment.start_ts)
+
+        if self._segments:
+            self._recover_active_segment(self._segments[-1])
+
+    def _refresh(self) -> None:
+        """Reload metadata if another process appended since the last look.
+
+        Must be called with the file lock and the instance lock held.
+        """
+        version = self._counters["version"]
+        if version == self._version:
+            return
+        self._close_active()
+        self._load_segments()
+        self._version = version
+
+    def _recover_active_segment(self, segment: _Segment) -> None:
+        """Restore record count and last timestamp of the newest segment.
+
+        Only the lines after the last sparse index entry are scanned.
+        """
+        indexed = len(segment.index_offsets)
+        offset = segment.index_offsets[-1] if indexed else None
+        tail = 0
+        last_ts = segment.start_ts
+        for entity in self._iter_entities(segment, offset):
+            tail += 1
+            last_ts = float(entity.timestamp)
+        segment.record_count = max(indexed - 1, 0) * self.index_interval + tail
+        self._last_ts = last_ts
+
+    def _open_segment(self, start_ts: float) -> _Segment:
+        """Create a new segment file and make it the active one."""
+        self._close_active()
+        start_us = int(start_ts * 1_000_000)
+        if self._segments:
+            # Segment names must stay unique even if timestamps were clamped
+            start_us = max(start_us, int(self._segments[-1].start_ts * 1_000_000) + 1)
+        path = self.history_dir / f"{SEGMENT_PREFIX}{start_us:020d}{SEGMENT_SUFFIX}"
+        segment = _Segment(path=path, start_ts=start_us / 1_000_000)
+
+        with open(path, "w", newline="") as f:
+            csv.writer(f).writerow(PositionRecordEntity.csv_headers())
+        with open(segment.index_path, "w", newline="") as f:
+            csv.writer(f).writerow(["timestamp", "offset"])
+
+        self._segments.append(segment)
+        self._segment_starts.append(segment.start_ts)
+        logger.info("Opened history segment: %s", path.name)
+        return segment
+
+    def _active_segment(self, timestamp: float) -> _Segment:
+        """Return the segment the next record goes to, rolling if it is full."""
+        if not self._segments or self._segments[-1].record_count >= self.segment_max_records:
+            return self._open_segment(timestamp)
+        return self._segments[-1]
+
+    def _close_active(self) -> None:
+        if self._active_file is not None:
+            self._active_file.close()
+            self._active_file = None
+            self._active_writer = None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    @timed(REPOSITORY_DURATION.labels("history", "append"))
+    def append(self, record: PositionRecord) -> PositionRecord:
+        """Append a position record to the active segment in O(1).
+
+        Timestamps are kept non-decreasing across the whole history; a record
+        older than the last one written is stored with the last timestamp.
+
+        Args:
+            record: Plain PositionRecord to store
+
+        Returns:
+            The stored PositionRecord (with its effective timestamp)
+        """
+        with self.file_lock.exclusive(), self._lock:
+            self._refresh()
+            record = self._append(record)
+            self._version += 1
+            self._counters["version"] = self._version
+        return record
+
+    @timed(REPOSITORY_DURATION.labels("history", "append_many"))
+    def append_many(self, records: list[PositionRecord]) -> list[PositionRecord]:
+        """Append a batch of position records under one lock.
+
+        Args:
+            records: Plain PositionRecords to store, in order
+
+        Returns:
+            The stored PositionRecords (with their effective timestamps)
+        """
+        with self.file_lock.exclusive(), self._lock:
+            self._refresh()
+            records = [self._append(record) for record in records]
+            self._version += 1
+            self._counters["version"] = self._version
+        return records
+
+    def _append(self, record: PositionRecord) -> PositionRecord:
+        if record.timestamp < self._last_ts:
+            record = PositionRecord(
+                target_id=record.target_id,
+                timestamp=self._last_ts,
+                latitude=record.latitude,
+                longitude=record.longitude,
+                altitude=record.altitude,
+            )
+
+        segment = self._active_segment(record.timestamp)
+        if self._active_file is None:
+            self._active_file = open(segment.path, "a", newline="")
+            self._active_writer = csv.writer(self._active_file)
+
+        if segment.record_count % self.index_interval == 0:
+            offset = self._active_file.tell()
+            segment.index_ts.append(record.timestamp)
+            segment.index_offsets.append(offset)
+            with open(segment.index_path, "a", newline="") as f:
+                csv.writer(f).writerow([repr(record.timestamp), offset])
+
+        self._active_writer.writerow(position_to_entity(record).to_csv_row())
+        self._active_file.flush()
+        segment.record_count += 1
+        self._last_ts = record.timestamp
+        return record
+
+    def close(self) -> None:
+        """Close the active segment file handle."""
+        self._close_active()
+
+    def share_between_processes(self) -> None:
+        """Prepare for use by forked worker processes (call before forking)."""
+        self._counters.share()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _iter_entities(
+        self, segment: _Segment, offset: Optional[int] = None
+    ) -> Iterator[PositionRecordEntity]:
+        """Iterate entities of a segment starting at a byte offset."""
+        with open(segment.path, "r", newline="") as f:
+            if offset is None:
+                f.readline()  # Skip header
+            else:
+                f.seek(offset)
+            for values in csv.reader(f):
+                if values:
+                    yield PositionRecordEntity.from_csv_values(values)
+
+    def _overlapping_segments(self, start: float, end: float) -> list[_Segment]:
+        """Return the segments whose time range overlaps [start, end]."""
+        # A segment covers [its start, next segment's start]; the boundary is
+        # inclusive because clamped timestamps can repeat across a rollover
+        first = max(bisect.bisect_left(self._segment_starts, start) - 1, 0)
+        last = bisect.bisect_right(self._segment_starts, end)
+        return self._segments[first:last]
+
+    def _scan(
+        self, start: float, end: float, target_id: Optional[str] = None
+    ) -> Iterator[PositionRecord]:
+        """Yield records in [start, end], reading only overlapping segments."""
+        if self._active_file is not None:
+            self._active_file.flush()
+
+        scanned = 0
+        try:
+            for segment in self._overlapping_segments(start, end):
+                position = bisect.bisect_left(segment.index_ts, start) - 1
+                offset = segment.index_offsets[position] if position >= 0 else None
+                for entity in self._iter_entities(segment, offset):
+                    scanned += 1
+                    if target_id is not None and entity.target_id != target_id:
+                        # Timestamp must still be checked to stop early
+                        if float(entity.timestamp) > end:
+                            break
+                        continue
+                    record = entity_to_position(entity)
+                    if record.timestamp > end:
+                        break
+                    if record.timestamp >= start:
+                        yield record
+        finally:
+            count_rows(scanned)
+
+    @timed(REPOSITORY_DURATION.labels("history", "get_track"))
+    def get_track(self, target_id: str, start: float, end: float) -> list[PositionRecord]:
+        """Get the positions of one target within a time window.
+
+        Args:
+            target_id: UUID of the target
+            start: Window start (epoch seconds, inclusive)
+            end: Window end (epoch seconds, inclusive)
+
+        Returns:
+            List of PositionRecord objects in timestamp order
+        """
+        logger.debug("Fetching track for %s in [%s, %s]", target_id, start, end)
+        with self.file_lock.shared(), self._lock:
+            self._refresh()
+            return list(self._scan(start, end, target_id))
+
+    @timed(REPOSITORY_DURATION.labels("history", "get_window"))
+    def get_window(self, start: float, end: float) -> list[PositionRecord]:
+        """Get the positions of all targets within a time window.
+
+        Args:
+            start: Window start (epoch seconds, inclusive)
+            end: Window end (epoch seconds, inclusive)
+
+        Returns:
+            List of PositionRecord objects in timestamp order
+        """
+        logger.debug("Fetching all positions in [%s, %s]", start, end)
+        with self.file_lock.shared(), self._lock:
+            self._refresh()
+            return list(self._scan(start, end))
@@ -0,0 +1,42 @@
+"""Shared Counters - Change counters visible to all worker processes.
+
+A repository publishes a few named counters (e.g. the sequence number of
+the last logged change) so that readers can tell cheaply whether the files
+changed since they last looked, without touching the file system.
+
+By default the counters live in the process. share() moves them into shared
+memory; it must be called before worker processes are forked, so that all
+workers see the same values. Writers update them while holding the
+repository's exclusive file lock.
+"""
+
+import multiprocessing
+
+
+class SharedCounters:
+    """Named integer counters, optionally shared across forked processes."""
+
+    def __init__(self, *names: str):
+        """Initialize zeroed counters.
+
+        Args:
+            names: Names of the counters to keep
+        """
+        self._slots = {name: slot for slot, name in enumerate(names)}
+        self._values = [0] * len(names)
+        self.shared = False
+
+    def __getitem__(self, name: str) -> int:
+        return self._values[self._slots[name]]
+
+    def __setitem__(self, name: str, value: int) -> None:
+        self._values[self._slots[name]] = value
+
+    def share(self) -> None:
+        """Move the counters to shared memory (call before forking)."""
+        if self.shared:
+            return
+        values = multiprocessing.get_context("fork").RawArray("Q", len(self._values))
+        values[:] = self._values
+        self._values = values
+        self.shared = True
@@ -0,0 +1,228 @@
+"""Table Versions - Immutable copy-on-write versions of the target table.
+
+Readers of the whole table (GET /api/v1/targets) used to hold the table lock
+while converting every row, stalling writers for the whole read, and writes
+holding the lock while the CSV is rewritten stalled reads. TableVersions
+follows the table as a TableListener and publishes an immutable TableVersion
+after every write; readers take the current version without any lock and
+keep a consistent view of the table for as long as they use it.
+
+A version stores the rows in chunks of CHUNK_ROWS positions, each chunk
+holding its own id list and column arrays, and finds ids through
+INDEX_BUCKETS small dicts selected by the hash of the id. A write copies
+only the chunks and buckets it changes, the first time it changes them, and
+shares all others with the previous version, so publishing costs a few
+kilobytes per changed row instead of a copy of the table. Deleted rows
+leave tombstones that are dropped by rebuilding the version from the table
+once they make up a quarter of it, like TargetTable.compact.
+
+The first version is a copy of the whole table (about 0.8 s and 130 MB for
+1,000,000 targets), so it is built by the first read that lists the table
+rather than at startup; until then changes are not followed and other
+reads use the table itself.
+"""
+
+from array import array
+from typing import Iterator, Optional
+
+from src.dal.target_table import (
+    _LOW_BITS,
+    _LOW_MASK,
+    NUMERIC_COLUMNS,
+    TableListener,
+    TargetRow,
+    TargetTable,
+)
+
+CHUNK_ROWS = 1024
+INDEX_BUCKETS = 1024  # a power of two
+
+_BUCKET_MASK = INDEX_BUCKETS - 1
+
+
+def _new_chunk() -> list:
+    """Return an empty chunk: ids, the numeric columns and the two IP halves."""
+    return [[]] + [array("d") for _ in NUMERIC_COLUMNS] + [array("Q"), array("Q")]
+
+
+class TableVersion:
+    """The rows of the table as of one change sequence, never modified once published."""
+
+    __slots__ = ("sequence", "chunks", "buckets", "_size")
+
+    def __init__(self, sequence: int, chunks: tuple, buckets: tuple, size: int):
+        """Initialize a version from its chunks and id buckets.
+
+        Args:
+            sequence: Sequence number of the last change the version includes
+            chunks: Lists of CHUNK_ROWS positions (ids, numeric columns, IP halves)
+            buckets: INDEX_BUCKETS dicts mapping ids to positions
+            size: Number of live rows
+        """
+        self.sequence = sequence
+        self.chunks = chunks
+        self.buckets = buckets
+        self._size = size
+
+    @classmethod
+    def of_table(cls, table: TargetTable, sequence: int) -> "TableVersion":
+        """Build a version holding the live rows of a table, in order."""
+        if len(table) < len(table.ids):
+            table = table.copy()
+            table.compact()
+        columns = [table.ids, *table.columns, table.ip_high, table.ip_low]
+        chunks = tuple(
+            [column[start:start + CHUNK_ROWS] for column in columns]
+            for start in range(0, len(table.ids), CHUNK_ROWS)
+        )
+        buckets = tuple({} for _ in range(INDEX_BUCKETS))
+        for position, target_id in enumerate(table.ids):
+            buckets[hash(target_id) & _BUCKET_MASK][target_id] = position
+        return cls(sequence, chunks, buckets, len(table.ids))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, target_id: str) -> bool:
+        return target_id in self.buckets[hash(target_id) & _BUCKET_MASK]
+
+    def get(self, target_id: str) -> Optional[TargetRow]:
+        """Return the row of a target, or None if it does not exist."""
+        position = self.buckets[hash(target_id) & _BUCKET_MASK].get(target_id)
+        if position is None:
+            return None
+        chunk, offset = divmod(position, CHUNK_ROWS)
+        ids, lat, lon, alt, freq, speed, bearing, ip_high, ip_low = self.chunks[chunk]
+        return (
+            ids[offset],
+            lat[offset],
+            lon[offset],
+            alt[offset],
+            freq[offset],
+            speed[offset],
+            bearing[offset],
+            (ip_high[offset] << _LOW_BITS) | ip_low[offset],
+        )
+
+    def rows(self) -> Iterator[TargetRow]:
+        """Iterate live rows in insertion order."""
+        for ids, *columns, ip_high, ip_low in self.chunks:
+            if not any(ip_high):
+                rows = zip(ids, *columns, ip_low)
+            else:
+                ips = ((high << _LOW_BITS) | low for high, low in zip(ip_high, ip_low))
+                rows = zip(ids, *columns, ips)
+            yield from (row for row in rows if row[0] is not None)
+
+
+class TableVersions(TableListener):
+    """Follows a TargetTable and publishes its versions.
+
+    put, remove, reset, build and publish are called with the table lock of
+    the repository held; current may be read at any time without a lock.
+    """
+
+    def __init__(self):
+        # Latest published version, None until build is called
+        self.current: Optional[TableVersion] = None
+        self._table: Optional[TargetTable] = None
+        # Next version while changes are applied (None when nothing changed
+        # since the last publish), with the chunks and buckets already copied
+        self._chunks: Optional[list] = None
+        self._buckets: list[dict] = []
+        self._copied_chunks: set[int] = set()
+        self._copied_buckets: set[int] = set()
+        self._size = 0
+        self._length = 0
+
+    def build(self, sequence: int) -> TableVersion:
+        """Publish a version of the whole table and follow its changes from now on."""
+        self._chunks = None
+        self.current = TableVersion.of_table(self._table, sequence)
+        return self.current
+
+    def reset(self, table: TargetTable) -> None:
+        self._table = table
+        self._chunks = None
+        self.current = None
+
+    def put(self, old: Optional[TargetRow], row: TargetRow) -> None:
+        if self.current is None:
+            return
+        self._edit()
+        bucket = self._bucket(row[0])
+        position = bucket.get(row[0])
+        if position is None:
+            position = bucket[row[0]] = self._length
+            self._length += 1
+            self._size += 1
+            if position % CHUNK_ROWS == 0:
+                self._copied_chunks.add(len(self._chunks))
+                self._chunks.append(_new_chunk())
+            ids, *columns, ip_high, ip_low = self._chunk(position // CHUNK_ROWS)
+            ids.append(row[0])
+            for column, value in zip(columns, row[1:7]):
+                column.append(value)
+            ip_high.append(row[7] >> _LOW_BITS)
+            ip_low.append(row[7] & _LOW_MASK)
+        else:
+            chunk, offset = divmod(position, CHUNK_ROWS)
+            _, *columns, ip_high, ip_low = self._chunk(chunk)
+            for column, value in zip(columns, row[1:7]):
+                column[offset] = value
+            ip_high[offset] = row[7] >> _LOW_BITS
+            ip_low[offset] = row[7] & _LOW_MASK
+
+    def remove(self, row: TargetRow) -> None:
+        if self.current is None:
+            return
+        self._edit()
+        position = self._bucket(row[0]).pop(row[0])
+        chunk, offset = divmod(position, CHUNK_ROWS)
+        self._chunk(chunk)[0][offset] = None
+        self._size -= 1
+
+    def publish(self, sequence: int) -> None:
+        """Make the changes applied since the last publish visible to readers."""
+        if self.current is None:
+            return
+        if self._chunks is None:
+            if sequence != self.current.sequence:
+                version = self.current
+                self.current = TableVersion(sequence, version.chunks, version.buckets, len(version))
+            return
+        if (self._length - self._size) * 4 > self._length:
+            version = TableVersion.of_table(self._table, sequence)
+        else:
+            version = TableVersion(sequence, tuple(self._chunks), tuple(self._buckets), self._size)
+        self._chunks = None
+        self.current = version
+
+    def _edit(self) -> None:
+        """Start the next version from the current one, sharing all chunks and buckets."""
+        if self._chunks is not None:
+            return
+        version = self.current
+        self._chunks = list(version.chunks)
+        self._buckets = list(version.buckets)
+        self._copied_chunks.clear()
+        self._copied_buckets.clear()
+        self._size = len(version)
+        self._length = 0
+        if version.chunks:
+            self._length = (len(version.chunks) - 1) * CHUNK_ROWS + len(version.chunks[-1][0])
+
+    def _chunk(self, number: int) -> list:
+        """Return a chunk of the next version, copying it on its first change."""
+        if number not in self._copied_chunks:
+            self._chunks[number] = [column[:] for column in self._chunks[number]]
+            self._copied_chunks.add(number)
+        return self._chunks[number]
+
+    def _bucket(self, target_id: str) -> dict:
+        """Return the id bucket of the next version holding an id, copying it on its first change."""
+        number = hash(target_id) & _BUCKET_MASK
+        if number not in self._copied_buckets:
+            self._buckets[number] = self._buckets[number].copy()
+            self._copied_buckets.add(number)
+        return self._buckets[number]
@@ -2,17 +2,78 @@
 
 This repository handles all CSV file operations for targets.
 It receives plain objects from BL and converts to/from entities internally.
+
+The table is held in memory as a columnar TargetTable. Every write is applied
+to the in-memory table and appended to a binary change log, which costs the
+same however many targets are stored. A compact binary snapshot of the
+table is written periodically, so startup loads the latest snapshot and
+replays only the changes logged after it. The snapshot and the log are the
+source of truth: targets.csv is an export of the table written with every
+snapshot, parsed only when there is no usable snapshot or when it was
+edited by hand.
+
+Several processes may serve the same files (see src.server). Access to the
+files is guarded by a reader/writer FileLock on targets.lock: writers hold it
+exclusive, while loading or catching up holds it shared. Before every read
+or write a process applies the changes other processes logged since its
+table was last updated (published through SharedCounters), so all workers
+stay consistent with the files. The CSV is exported to a temporary file
+that atomically replaces targets.csv, so it is never seen half-written.
+
+Listing, counting and looking up targets by id do not take the table lock:
+they read the latest immutable TableVersion published after every write
+(see src.dal.table_versions), so they neither wait for a write in progress
+nor hold writers off while rows are converted. The locks are only taken to
+catch up with changes of other processes first, and by the first listing,
+which builds the first version.
+
+Clusters and density tiles for map views are read from a ClusterIndex and
+a DensityTiles cache that follow the table through its listeners (see
+src.dal.cluster_index and src.dal.density_tiles), as do the
+ProximityIndex reporting targets that come close to each other, the
+GeofenceIndex tracking the targets inside the geofences of a
+GeofenceRepository and the FrequencyIndex counting spectrum occupancy (see
+src.dal.proximity_index, src.dal.geofence_index and src.dal.frequency_index).
+Proximity and geofence events are evaluated by the process making a write
+and numbered in event logs shared by all processes (see src.dal.event_log).
 """
 
 import csv
 import logging
 import os
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from src.models.target import Target
+from src.models.cluster import Cluster
+from src.models.tile import DensityTile
+from src.models.proximity import ProximityEvent
+from src.models.geofence import GeofenceEvent
+from src.models.spectrum import FrequencyBand, SpectrumOccupancy
 from src.dal.entities.target_entity import TargetEntity
-from src.dal.converters.entity_converter import plain_to_entity, entity_to_plain
+from src.dal.snapshot_store import LogGapError, SnapshotStore
+from src.dal.target_table import TargetRow, TargetTable
+from src.dal.table_versions import TableVersion, TableVersions
+from src.dal.cluster_index import ClusterIndex
+from src.dal.density_tiles import DensityTiles
+from src.dal.event_log import EventLog
+from src.dal.proximity_index import DEFAULT_DISTANCE_M, ProximityIndex
+from src.dal.geofence_index import GeofenceIndex
+from src.dal.geofence_repository import GeofenceRepository
+from src.dal.frequency_index import DEFAULT_BANDS, FrequencyIndex, parse_bands
+from src.dal.csv_loader import load_table
+from src.dal.file_lock import FileLock
+from src.dal.ip_codec import pack_ip
+from src.dal.shared_counters import SharedCounters
+from src.metrics import REPOSITORY_DURATION, STORE_SEQUENCE, STORE_SIZE, count_rows, timed
+from src.dal.converters.entity_converter import (
+    plain_to_row,
+    row_to_plain,
+    row_to_entity,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -20,137 +81,682 @@ logger = logging.getLogger(__name__)
 class TargetRepository:
     """Repository for Target data persistence using CSV storage."""
 
-    def __init__(self, csv_path: str = "./data/targets.csv"):
-        """Initialize repository with CSV file path.
+    def __init__(
+        self,
+        csv_path: str = "./data/targets.csv",
+        snapshot_interval: int = 10_000,
+        counters: Optional[SharedCounters] = None,
+        load_workers: Optional[int] = None,
+        proximity_distance: Optional[float] = None,
+        geofences: Optional[GeofenceRepository] = None,
+        frequency_bands: Optional[list[FrequencyBand]] = None,
+    ):
+        """Initialize repository with CSV file path and load the table.
         
         Args:
             csv_path: Path to the CSV file for storage
+            snapshot_interval: Number of changes between binary snapshots
+            counters: Change counters shared with other repositories on the
+                same files (creates private ones if None)
+            load_workers: Processes parsing a large CSV file (defaults to
+                CSV_LOAD_WORKERS or the CPU count)
+            proximity_distance: Distance in meters at which targets raise
+                proximity events (defaults to PROXIMITY_DISTANCE_M or 500)
+            geofences: Repository of the geofences whose targets are tracked
+                (creates one on geofences.json next to the CSV file if None)
+            frequency_bands: Bands spectrum occupancy is counted for
+                (defaults to FREQUENCY_BANDS or frequency_index.DEFAULT_BANDS)
         """
         self.csv_path = Path(csv_path)
-        self._ensure_csv_exists()
+        self.snapshot_interval = snapshot_interval
+        self.load_workers = load_workers
+        self._snapshots = SnapshotStore(self.csv_path.parent, self.csv_path.stem)
+        self._table = TargetTable()
+        # Sequence number of the last change applied to the in-memory table
+        self._sequence = 0
+        self._counters = counters or SharedCounters("sequence", "log_start")
+        self._table_lock = threading.Lock()
+        self.file_lock = FileLock(self.csv_path.with_suffix(".lock"))
+        self._snapshot_thread: Optional[threading.Thread] = None
+        # Startup time in ms of reading the table ("table") and of building
+        # the indexes that follow it ("indexes"); load_time_ms is their sum
+        self.load_phases_ms: dict[str, float] = {}
+        self.load_time_ms = 0.0
 
-    def _ensure_csv_exists(self) -> None:
-        """Ensure CSV file and directory exist with headers."""
         self.csv_path.parent.mkdir(parents=True, exist_ok=True)
-        
+        with self.file_lock.exclusive():
+            self._ensure_csv_exists()
+            source = self._load()
+        started = time.perf_counter()
+        self._clusters = ClusterIndex()
+        self._tiles = DensityTiles(self._clusters)
+        self._proximity = ProximityIndex(
+            proximity_distance or float(os.getenv("PROXIMITY_DISTANCE_M", DEFAULT_DISTANCE_M))
+        )
+        self._proximity.reset(self._table)
+        self.geofences = geofences or GeofenceRepository(str(self.csv_path.with_name("geofences.json")))
+        self._geofences = GeofenceIndex(self.geofences, self._clusters)
+        self._proximity_events = EventLog[ProximityEvent](
+            str(self.csv_path.with_name("proximity_events.jsonl")), ProximityEvent
+        )
+        self._geofence_events = EventLog[GeofenceEvent](
+            str(self.csv_path.with_name("geofence_events.jsonl")), GeofenceEvent
+        )
+        self._geofences.reset(self._table)
+        if frequency_bands is None:
+            bands_text = os.getenv("FREQUENCY_BANDS")
+            frequency_bands = parse_bands(bands_text) if bands_text else DEFAULT_BANDS
+        self._frequencies = FrequencyIndex(self._clusters, frequency_bands)
+        self._frequencies.reset(self._table)
+        self._versions = TableVersions()
+        self._versions.reset(self._table)
+        self._table.listeners.extend(
+            (self._versions, self._clusters, self._tiles, self._proximity, self._geofences, self._frequencies)
+        )
+        self.load_phases_ms["indexes"] = (time.perf_counter() - started) * 1000
+        self.load_time_ms = sum(self.load_phases_ms.values())
+        logger.info(
+            "Loaded %s targets from %s in %.1fms (indexes %.1fms)",
+            len(self._table), source, self.load_time_ms, self.load_phases_ms["indexes"],
+        )
+
+    def _ensure_csv_exists(self) -> None:
+        """Ensure CSV file exists with headers."""
         if not self.csv_path.exists():
-            logger.info(f"Creating new CSV file: {self.csv_path}")
+            logger.info("Creating new CSV file: %s", self.csv_path)
             with open(self.csv_path, "w", newline="") as f:
                 writer = csv.writer(f)
                 writer.writerow(TargetEntity.csv_headers())
 
-    def _read_all_entities(self) -> list[TargetEntity]:
-        """Read all entities from CSV file."""
-        entities = []
-        with open(self.csv_path, "r", newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                entities.append(TargetEntity.from_csv_row(row))
-        return entities
-
-    def _write_all_entities(self, entities: list[TargetEntity]) -> None:
-        """Write all entities to CSV file."""
-        with open(self.csv_path, "w", newline="") as f:
+    @timed(REPOSITORY_DURATION.labels("targets", "load"))
+    def _load(self) -> str:
+        """Load the table from the latest snapshot and change log, or from CSV.
+        
+        The CSV is only parsed when there is no snapshot yet, when it was
+        modified after the last snapshot/log write (e.g. edited by hand), or
+        when the snapshot has an older format. In the last case the CSV is
+        the export written with that snapshot, so the changes logged after
+        the snapshot are replayed on it.
+        
+        Returns:
+            Description of the source the table was loaded from
+        """
+        started = time.perf_counter()
+        csv_mtime = self.csv_path.stat().st_mtime_ns
+        source = None
+        # Sequence of the snapshot the CSV was exported with, if it is unreadable
+        export_sequence = None
+
+        if self._snapshots.has_snapshot() and csv_mtime <= self._snapshots.newest_mtime_ns():
+            try:
+                self._table, snapshot_sequence = self._snapshots.load_snapshot()
+            except ValueError as e:
+                logger.warning("Rebuilding from CSV: %s", e)
+                export_sequence = self._snapshots.snapshot_sequence()
+            else:
+                replayed, self._sequence = self._snapshots.replay(self._table, snapshot_sequence)
+                source = f"snapshot + {replayed} log entries"
+        if source is None:
+            self._table = self._parse_csv()
+            source = "CSV"
+            replayed = 0
+            if export_sequence is not None:
+                try:
+                    replayed, self._sequence = self._snapshots.replay(self._table, export_sequence)
+                except LogGapError as e:
+                    logger.warning("Not replaying the change log on the CSV: %s", e)
+                    self._table = self._parse_csv()
+                else:
+                    source = f"CSV + {replayed} log entries"
+            self._snapshots.discard_logs()
+            if replayed:
+                self._write_snapshot(self._table.copy(), self._sequence)
+            else:
+                self._snapshots.write_snapshot(self._table.copy(), self._sequence)
+
+        self._snapshots.open_log(self._sequence + 1)
+        self._counters["sequence"] = self._sequence
+        self._counters["log_start"] = self._sequence + 1
+        self._publish_gauges()
+        self.load_phases_ms["table"] = (time.perf_counter() - started) * 1000
+        return source
+
+    @timed(REPOSITORY_DURATION.labels("targets", "csv_parse"))
+    def _parse_csv(self) -> TargetTable:
+        """Parse the whole CSV file into a table (in parallel for large files)."""
+        table = load_table(self.csv_path, self.load_workers)
+        count_rows(len(table))
+        return table
+
+    @timed(REPOSITORY_DURATION.labels("targets", "csv_write"))
+    def _write_all_rows(self, table: TargetTable) -> None:
+        """Atomically replace the CSV file with the rows of a table."""
+        tmp_path = self.csv_path.with_suffix(f".csv.{os.getpid()}.tmp")
+        with open(tmp_path, "w", newline="") as f:
             writer = csv.writer(f)
             writer.writerow(TargetEntity.csv_headers())
-            for entity in entities:
-                writer.writerow(entity.to_csv_row())
+            for row in table.rows():
+                writer.writerow(row_to_entity(row).to_csv_row())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.csv_path)
+        count_rows(len(table))
 
+    def _write_snapshot(self, table: TargetTable, sequence: int) -> None:
+        """Export a table to the CSV file, then write its snapshot.
+        
+        The CSV is written first so that it is not newer than the snapshot,
+        which would make the next startup parse it as edited by hand.
+        """
+        self._write_all_rows(table)
+        self._snapshots.write_snapshot(table, sequence)
+
+    # ------------------------------------------------------------------
+    # Change log and snapshots
+    # ------------------------------------------------------------------
+
+    def _catch_up(self) -> None:
+        """Apply changes logged by other processes since the table was updated.
+        
+        Must be called with the file lock and the table lock held.
+        """
+        if self._counters["sequence"] <= self._sequence:
+            return
+        try:
+            _, self._sequence = self._snapshots.replay(self._table, self._sequence)
+        except LogGapError:
+            # Another process snapshotted and dropped the logs we still needed
+            listeners = self._table.listeners
+            self._table, snapshot_sequence = self._snapshots.load_snapshot()
+            _, self._sequence = self._snapshots.replay(self._table, snapshot_sequence)
+            self._table.listeners = listeners
+            for listener in listeners:
+                listener.reset(self._table)
+        self._versions.publish(self._sequence)
+        self._publish_gauges()
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the exclusive file lock with an up-to-date table."""
+        # Changes are evaluated against the proximity hash, which is built in
+        # the background after loading; waiting here keeps it out of the locks
+        self._proximity.wait_until_built()
+        with self.file_lock.exclusive(), self._table_lock:
+            self._catch_up()
+            # Events are evaluated for the changes of this write only
+            self._proximity.reporting = self._geofences.reporting = True
+            try:
+                yield
+            finally:
+                self._proximity.reporting = self._geofences.reporting = False
+                # Reads are keyed by the sequence (see SingleFlight), so it
+                # is shown only once the version holding its changes is
+                self._versions.publish(self._sequence)
+                self._counters["sequence"] = self._sequence
+                self._log_events()
+
+    def _log_events(self) -> None:
+        """Number the events of a write in the shared event logs."""
+        self._proximity_events.append(self._proximity.events)
+        self._geofence_events.append(self._geofences.events)
+        self._proximity.events = []
+        self._geofences.events = []
+
+    @contextmanager
+    def _reading(self) -> Iterator[None]:
+        """Hold the table lock with an up-to-date table."""
+        if self._counters["sequence"] > self._sequence:
+            # The file lock is always taken before the table lock
+            with self.file_lock.shared(), self._table_lock:
+                self._catch_up()
+        with self._table_lock:
+            yield
+
+    def _version(self) -> Optional[TableVersion]:
+        """Return the latest version of the table, without holding the table lock.
+        
+        Returns None until the first version was built (see _build_version).
+        """
+        if self._counters["sequence"] > self._sequence:
+            with self.file_lock.shared(), self._table_lock:
+                self._catch_up()
+        return self._versions.current
+
+    @timed(REPOSITORY_DURATION.labels("targets", "version_build"))
+    def _build_version(self) -> TableVersion:
+        """Return the latest version of the table, building the first one if needed."""
+        with self._reading():
+            version = self._versions.current
+            if version is None:
+                started = time.perf_counter()
+                version = self._versions.build(self._sequence)
+                logger.info(
+                    "Built the first table version of %s targets in %.1fms",
+                    len(version), (time.perf_counter() - started) * 1000,
+                )
+        return version
+
+    @contextmanager
+    def _persisting(self, changes: list[tuple[str, Optional[TargetRow]]]) -> Iterator[None]:
+        """Undo the table changes not logged yet if logging them fails.
+        
+        Changes that reached the log stay applied: other processes replay
+        them and a restart recovers them, so the table must keep them too.
+        
+        Args:
+            changes: Target id and previous row (None if it did not exist) of
+                every change applied to the table, in the order they are logged
+        """
+        sequence = self._sequence
+        try:
+            yield
+        except BaseException:
+            for target_id, old in reversed(changes[self._sequence - sequence:]):
+                if old is None:
+                    self._table.remove(target_id)
+                else:
+                    self._table.put(old)
+            raise
+
+    def _log_put(self, row: TargetRow) -> None:
+        self._prepare_log()
+        self._snapshots.append_put(self._sequence + 1, row)
+        self._after_change()
+
+    def _log_delete(self, target_id: str) -> None:
+        self._prepare_log()
+        self._snapshots.append_delete(self._sequence + 1, target_id)
+        self._after_change()
+
+    def _prepare_log(self) -> None:
+        """Switch to the current log file if another process rotated it."""
+        log_start = self._counters["log_start"]
+        if self._snapshots.log_start != log_start:
+            self._snapshots.open_log(log_start)
+
+    def _after_change(self) -> None:
+        """Count the logged change and snapshot every snapshot_interval changes.
+        
+        The shared sequence is updated when the write ends (see _writing).
+        """
+        self._sequence += 1
+        self._publish_gauges()
+        if self._sequence % self.snapshot_interval:
+            return
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return
+
+        # Later changes go to a new log file, so the old one can be dropped
+        # as soon as the snapshot is on disk
+        table = self._table.copy()
+        sequence = self._sequence
+        self._rotate_log()
+        self._snapshot_thread = threading.Thread(
+            target=self._write_snapshot,
+            args=(table, sequence),
+            name="target-snapshot",
+            daemon=True,
+        )
+        self._snapshot_thread.start()
+
+    def _publish_gauges(self) -> None:
+        STORE_SIZE.labels("targets").set(len(self._table))
+        STORE_SEQUENCE.labels().set(self._sequence)
+
+    def _rotate_log(self) -> None:
+        """Start a new log file for changes after the current sequence."""
+        self._counters["log_start"] = self._sequence + 1
+        self._snapshots.open_log(self._sequence + 1)
+
+    def snapshot(self) -> None:
+        """Write a snapshot and a CSV export of the current table synchronously."""
+        with self._writing():
+            if self._snapshot_thread is not None:
+                self._snapshot_thread.join()
+            self._rotate_log()
+            self._write_snapshot(self._table.copy(), self._sequence)
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the last change made to the targets (by any process)."""
+        return self._counters["sequence"]
+
+    def share_between_processes(self) -> None:
+        """Prepare for use by forked worker processes (call before forking)."""
+        self._counters.share()
+        self.geofences.share_between_processes()
+        # Built once here, the hash is shared copy-on-write by the workers
+        self._proximity.wait_until_built()
+
+    def close(self) -> None:
+        """Wait for a running snapshot and close the change log."""
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        self._snapshots.close()
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
+    @timed(REPOSITORY_DURATION.labels("targets", "get_all"))
     def get_all(self) -> list[Target]:
         """Get all targets from storage.
         
         Returns:
             List of plain Target objects
         """
-        logger.debug("Fetching all targets from CSV")
-        entities = self._read_all_entities()
-        targets = [entity_to_plain(e) for e in entities]
-        logger.debug(f"Found {len(targets)} targets")
+        logger.debug("Fetching all targets")
+        version = self._version()
+        if version is None:
+            version = self._build_version()
+        targets = [row_to_plain(row) for row in version.rows()]
+        count_rows(len(targets))
+        logger.debug("Found %s targets", len(targets))
         return targets
 
+    def count(self) -> int:
+        """Get the number of stored targets."""
+        version = self._version()
+        if version is None:
+            with self._reading():
+                return len(self._table)
+        return len(version)
+
+    def iter_batches(self, batch_size: int = 1000) -> Iterator[list[Target]]:
+        """Iterate all targets in storage order, one batch at a time.
+        
+        Unlike get_all, the table is neither copied nor converted as a whole:
+        the table lock is held only while one batch is read, so writers are
+        not blocked for the whole iteration. Compaction is held off until the
+        iteration ends, so row positions stay stable: every target stored
+        throughout is returned exactly once, updates and deletes of rows not
+        reached yet are seen, and targets created meanwhile are included.
+        
+        Args:
+            batch_size: Table positions read per batch
+        
+        Yields:
+            Lists of plain Target objects
+        """
+        with self._reading():
+            table = self._table
+            table.hold_compaction()
+        position = 0
+        last_id = None
+        try:
+            while True:
+                with self._reading():
+                    if self._table is not table:
+                        # Reloaded from a snapshot by _catch_up: continue after
+                        # the last target returned, if it is still there
+                        table.release_compaction()
+                        table = self._table
+                        table.hold_compaction()
+                        position = table.index.get(last_id, -1) + 1
+                    rows = table.rows_between(position, position + batch_size)
+                    position += batch_size
+                    done = position >= len(table.ids)
+                count_rows(len(rows))
+                if rows:
+                    last_id = rows[-1][0]
+                    yield [row_to_plain(row) for row in rows]
+                if done:
+                    return
+        finally:
+            with self._table_lock:
+                table.release_compaction()
+
+    @timed(REPOSITORY_DURATION.labels("targets", "get_by_id"))
     def get_by_id(self, target_id: str) -> Optional[Target]:
         """Get a target by ID.
         
         Args:
             target_id: UUID of the target
-            
+        
         Returns:
             Plain Target object if found, None otherwise
         """
-        logger.debug(f"Fetching target by ID: {target_id}")
-        entities = self._read_all_entities()
+        logger.debug("Fetching target by ID: %s", target_id)
+        version = self._version()
+        if version is None:
+            with self._reading():
+                row = self._table.get(target_id)
+        else:
+            row = version.get(target_id)
+        count_rows(1)
+
+        if row is None:
+            logger.debug("Target not found: %s", target_id)
+            return None
+
+        logger.debug("Found target: %s", target_id)
+        return row_to_plain(row)
+
+    @timed(REPOSITORY_DURATION.labels("targets", "get_by_ip_range"))
+    def get_by_ip_range(self, first: str, last: str) -> list[Target]:
+        """Get all targets whose IP address lies in an address range.
         
-        for entity in entities:
-            if entity.id == target_id:
-                logger.debug(f"Found target: {target_id}")
-                return entity_to_plain(entity)
+        Args:
+            first: First address of the range (inclusive)
+            last: Last address of the range (inclusive)
+        
+        Returns:
+            List of plain Target objects in storage order
         
-        logger.debug(f"Target not found: {target_id}")
-        return None
+        Raises:
+            ValueError: If an address is invalid
+        """
+        low, high = pack_ip(first), pack_ip(last)
+        with self._reading():
+            positions = self._table.positions_in_ip_range(low, high)
+            rows = [self._table.row_at(p) for p in positions]
+            count_rows(len(self._table.ids))
+        return [row_to_plain(row) for row in rows]
+
+    @timed(REPOSITORY_DURATION.labels("targets", "get_clusters"))
+    def get_clusters(
+        self,
+        zoom: int,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+    ) -> list[Cluster]:
+        """Get the targets in a viewport aggregated into clusters for a zoom level.
+        
+        Args:
+            zoom: Map zoom level (0 to cluster_index.MAX_ZOOM)
+            min_latitude, min_longitude, max_latitude, max_longitude: Viewport
+        
+        Returns:
+            List of plain Cluster objects
+        
+        Raises:
+            ValueError: If the viewport covers too many cells at this zoom
+        """
+        with self._reading():
+            return self._clusters.query(
+                self._table, zoom, min_latitude, min_longitude, max_latitude, max_longitude
+            )
+
+    @timed(REPOSITORY_DURATION.labels("targets", "get_density_tile"))
+    def get_density_tile(self, zoom: int, x: int, y: int) -> DensityTile:
+        """Get the target counts per bin of a map tile.
+        
+        Args:
+            zoom: Tile zoom level (0 to density_tiles.MAX_TILE_ZOOM)
+            x, y: Tile coordinates
+        
+        Returns:
+            Plain DensityTile object (its counts are shared, do not modify)
+        """
+        with self._reading():
+            return self._tiles.get(self._table, zoom, x, y)
+
+    def get_proximity_events(self, after: int, limit: int) -> list[ProximityEvent]:
+        """Get the proximity events numbered above a sequence.
+        
+        Args:
+            after: Sequence of the last event already seen
+            limit: Events returned at most
+        
+        Returns:
+            List of plain ProximityEvent objects, oldest first
+        """
+        with self._table_lock:
+            return self._proximity_events.get(after, limit)
+
+    @timed(REPOSITORY_DURATION.labels("targets", "get_geofence_targets"))
+    def get_geofence_targets(self, fence_id: str) -> Optional[list[Target]]:
+        """Get the targets inside a geofence.
+        
+        Args:
+            fence_id: UUID of the geofence
+        
+        Returns:
+            List of plain Target objects in storage order, or None if the
+            geofence does not exist
+        """
+        with self._reading():
+            ids = self._geofences.target_ids(fence_id)
+            if ids is None:
+                return None
+            rows = [self._table.get(target_id) for target_id in ids]
+        count_rows(len(rows))
+        return [row_to_plain(row) for row in rows]
+
+    def get_geofence_events(self, after: int, limit: int) -> list[GeofenceEvent]:
+        """Get the geofence events numbered above a sequence.
+        
+        Args:
+            after: Sequence of the last event already seen
+            limit: Events returned at most
+        
+        Returns:
+            List of plain GeofenceEvent objects, oldest first
+        """
+        with self._table_lock:
+            return self._geofence_events.get(after, limit)
+
+    @timed(REPOSITORY_DURATION.labels("targets", "get_spectrum_occupancy"))
+    def get_spectrum_occupancy(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+    ) -> SpectrumOccupancy:
+        """Get the targets of a viewport counted per frequency band.
+        
+        Args:
+            min_latitude, min_longitude, max_latitude, max_longitude: Viewport
+        
+        Returns:
+            Plain SpectrumOccupancy object
+        """
+        with self._reading():
+            return self._frequencies.occupancy(min_latitude, min_longitude, max_latitude, max_longitude)
 
+    @timed(REPOSITORY_DURATION.labels("targets", "create"))
     def create(self, target: Target) -> Target:
         """Create a new target.
         
         Args:
             target: Plain Target object to create
-            
+        
         Returns:
             The created Target object
         """
-        logger.info(f"Creating new target: {target.id}")
-        entities = self._read_all_entities()
+        logger.info("Creating new target: %s", target.id)
+        row = plain_to_row(target)
+
+        with self._writing():
+            changes = [(row[0], self._table.get(row[0]))]
+            self._table.put(row)
+            with self._persisting(changes):
+                self._log_put(row)
+
+        logger.info("Target created successfully: %s", target.id)
+        return target
+
+    @timed(REPOSITORY_DURATION.labels("targets", "put_many"))
+    def put_many(self, targets: list[Target]) -> dict[int, str]:
+        """Create or replace a batch of targets.
         
-        # Convert plain object to entity
-        new_entity = plain_to_entity(target)
-        entities.append(new_entity)
+        Args:
+            targets: Plain Target objects to store
         
-        self._write_all_entities(entities)
-        logger.info(f"Target created successfully: {target.id}")
-        return target
+        Returns:
+            Error messages by index, for the targets that were not stored
+        """
+        rows, errors = [], {}
+        for index, target in enumerate(targets):
+            try:
+                rows.append(plain_to_row(target))
+            except ValueError as e:
+                errors[index] = str(e)
+        if not rows:
+            return errors
 
+        with self._writing():
+            changes = []
+            for row in rows:
+                changes.append((row[0], self._table.get(row[0])))
+                self._table.put(row)
+            with self._persisting(changes):
+                for row in rows:
+                    self._log_put(row)
+
+        logger.info("Stored %s targets", len(rows))
+        return errors
+
+    @timed(REPOSITORY_DURATION.labels("targets", "update"))
     def update(self, target: Target) -> Optional[Target]:
         """Update an existing target.
         
         Args:
             target: Plain Target object with updated values
-            
+        
         Returns:
             The updated Target object if found, None otherwise
         """
-        logger.info(f"Updating target: {target.id}")
-        entities = self._read_all_entities()
-        
-        for i, entity in enumerate(entities):
-            if entity.id == target.id:
-                # Convert plain object to entity and replace
-                entities[i] = plain_to_entity(target)
-                self._write_all_entities(entities)
-                logger.info(f"Target updated successfully: {target.id}")
-                return target
-        
-        logger.warning(f"Target not found for update: {target.id}")
-        return None
+        logger.info("Updating target: %s", target.id)
+        row = plain_to_row(target)
+
+        with self._writing():
+            if target.id not in self._table:
+                logger.warning("Target not found for update: %s", target.id)
+                return None
 
+            # Replacing the value keeps the row at its position in the table
+            changes = [(row[0], self._table.get(row[0]))]
+            self._table.put(row)
+            with self._persisting(changes):
+                self._log_put(row)
+
+        logger.info("Target updated successfully: %s", target.id)
+        return target
+
+    @timed(REPOSITORY_DURATION.labels("targets", "delete"))
     def delete(self, target_id: str) -> Optional[Target]:
         """Delete a target by ID.
         
         Args:
             target_id: UUID of the target to delete
-            
+        
         Returns:
             The deleted Target object if found, None otherwise
         """
-        logger.info(f"Deleting target: {target_id}")
-        entities = self._read_all_entities()
-        
-        for i, entity in enumerate(entities):
-            if entity.id == target_id:
-                # Convert to plain object before removing
-                deleted_target = entity_to_plain(entity)
-                entities.pop(i)
-                self._write_all_entities(entities)
-                logger.info(f"Target deleted successfully: {target_id}")
-                return deleted_target
-        
-        logger.warning(f"Target not found for deletion: {target_id}")
-        return None
+        logger.info("Deleting target: %s", target_id)
+
+        with self._writing():
+            row = self._table.remove(target_id)
+            if row is None:
+                logger.warning("Target not found for deletion: %s", target_id)
+                return None
+
+            with self._persisting([(target_id, row)]):
+                self._log_delete(target_id)
+
+        logger.info("Target deleted successfully: %s", target_id)
+        return row_to_plain(row)
@@ -0,0 +1,217 @@
+"""Target Table - Columnar in-memory storage for target rows.
+
+Numeric fields are kept in float64 arrays (one per column) next to a list
+of ids, with a dict mapping each id to its row position. IP addresses are
+held packed (see src.dal.ip_codec) in two uint64 arrays, the high and low
+halves of the 128-bit value, instead of one string object per row. This is
+several times smaller than one object per target, loads straight from the
+binary snapshot columns and keeps rows in insertion order like the CSV.
+
+Deleted rows leave a tombstone (id None) so positions stay stable; the table
+is compacted once tombstones make up a quarter of it, unless a reader
+iterating by position holds compaction off (see hold_compaction).
+
+Indexes derived from the table are kept up to date by registering a
+TableListener in its listeners list: every put and remove is passed on,
+whether it comes from a local write or from replaying the change log.
+"""
+
+from array import array
+from typing import Iterable, Iterator, Optional
+
+# Row tuple: (id, latitude, longitude, altitude, frequency, speed, bearing, packed ip_address)
+TargetRow = tuple[str, float, float, float, float, float, float, int]
+
+NUMERIC_COLUMNS = ("latitude", "longitude", "altitude", "frequency", "speed", "bearing")
+
+_LOW_BITS = 64
+_LOW_MASK = (1 << _LOW_BITS) - 1
+
+
+class TableListener:
+    """Receives the changes applied to a TargetTable.
+
+    Listeners are called with the table lock of the repository held, so
+    they must be quick; costly work is better deferred to their next query.
+    """
+
+    def reset(self, table: "TargetTable") -> None:
+        """Called when the table was replaced as a whole (e.g. reloaded from a snapshot)."""
+
+    def put(self, old: Optional[TargetRow], row: TargetRow) -> None:
+        """Called after a row was inserted (old is None) or replaced."""
+
+    def remove(self, row: TargetRow) -> None:
+        """Called after a row was deleted."""
+
+
+class TargetTable:
+    """Columnar table of target rows keyed by id."""
+
+    def __init__(
+        self,
+        ids: Optional[list[Optional[str]]] = None,
+        columns: Optional[list[array]] = None,
+        ip_columns: Optional[tuple[array, array]] = None,
+    ):
+        """Initialize table from existing columns (all of equal length).
+
+        Args:
+            ids: Target ids (None marks a deleted row)
+            columns: One float64 array per numeric column, in NUMERIC_COLUMNS order
+            ip_columns: uint64 arrays with the high and low halves of the packed IPs
+        """
+        self.ids: list[Optional[str]] = ids if ids is not None else []
+        self.columns: list[array] = (
+            columns if columns is not None else [array("d") for _ in NUMERIC_COLUMNS]
+        )
+        self.ip_high, self.ip_low = (
+            ip_columns if ip_columns is not None else (array("Q"), array("Q"))
+        )
+        self.index: dict[str, int] = {}
+        self.listeners: list[TableListener] = []
+        self._deleted = 0
+        self._compaction_holds = 0
+        self._reindex()
+
+    def _reindex(self) -> None:
+        """Rebuild the id -> position index from the id column."""
+        self.index = dict(zip(self.ids, range(len(self.ids))))
+        self.index.pop(None, None)
+        self._deleted = len(self.ids) - len(self.index)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[TargetRow]) -> "TargetTable":
+        """Build a table from row tuples."""
+        table = cls()
+        for row in rows:
+            table.put(row)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, target_id: str) -> bool:
+        return target_id in self.index
+
+    def row_at(self, position: int) -> TargetRow:
+        """Return the row stored at a position."""
+        lat, lon, alt, freq, speed, bearing = self.columns
+        return (
+            self.ids[position],
+            lat[position],
+            lon[position],
+            alt[position],
+            freq[position],
+            speed[position],
+            bearing[position],
+            (self.ip_high[position] << _LOW_BITS) | self.ip_low[position],
+        )
+
+    def get(self, target_id: str) -> Optional[TargetRow]:
+        """Return the row of a target, or None if it does not exist."""
+        position = self.index.get(target_id)
+        return None if position is None else self.row_at(position)
+
+    def put(self, row: TargetRow) -> None:
+        """Insert a row, or replace it in place if the id exists."""
+        position = self.index.get(row[0])
+        old = None if position is None or not self.listeners else self.row_at(position)
+        if position is None:
+            self.index[row[0]] = len(self.ids)
+            self.ids.append(row[0])
+            for column, value in zip(self.columns, row[1:7]):
+                column.append(value)
+            self.ip_high.append(row[7] >> _LOW_BITS)
+            self.ip_low.append(row[7] & _LOW_MASK)
+        else:
+            for column, value in zip(self.columns, row[1:7]):
+                column[position] = value
+            self.ip_high[position] = row[7] >> _LOW_BITS
+            self.ip_low[position] = row[7] & _LOW_MASK
+        for listener in self.listeners:
+            listener.put(old, row)
+
+    def remove(self, target_id: str) -> Optional[TargetRow]:
+        """Delete a row and return it, or None if the id does not exist."""
+        position = self.index.pop(target_id, None)
+        if position is None:
+            return None
+        row = self.row_at(position)
+        self.ids[position] = None
+        self._deleted += 1
+        if self._deleted * 4 > len(self.ids) and not self._compaction_holds:
+            self.compact()
+        for listener in self.listeners:
+            listener.remove(row)
+        return row
+
+    def hold_compaction(self) -> None:
+        """Keep row positions stable until release_compaction is called."""
+        self._compaction_holds += 1
+
+    def release_compaction(self) -> None:
+        """Release a hold, compacting if removals made it due meanwhile."""
+        self._compaction_holds -= 1
+        if not self._compaction_holds and self._deleted * 4 > len(self.ids):
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop tombstones, keeping the remaining rows in order."""
+        live = [position for position, target_id in enumerate(self.ids) if target_id is not None]
+        self.ids = [self.ids[p] for p in live]
+        self.columns = [array("d", [column[p] for p in live]) for column in self.columns]
+        self.ip_high = array("Q", [self.ip_high[p] for p in live])
+        self.ip_low = array("Q", [self.ip_low[p] for p in live])
+        self._reindex()
+
+    def rows(self) -> Iterator[TargetRow]:
+        """Iterate live rows in insertion order."""
+        if not any(self.ip_high):
+            # Only IPv4 addresses (or none): the low half is the packed value
+            rows = zip(self.ids, *self.columns, self.ip_low)
+        else:
+            ips = ((high << _LOW_BITS) | low for high, low in zip(self.ip_high, self.ip_low))
+            rows = zip(self.ids, *self.columns, ips)
+        if self._deleted:
+            return (row for row in rows if row[0] is not None)
+        return rows
+
+    def rows_between(self, start: int, stop: int) -> list[TargetRow]:
+        """Return the live rows at positions start to stop (exclusive)."""
+        return [
+            self.row_at(position)
+            for position in range(start, min(stop, len(self.ids)))
+            if self.ids[position] is not None
+        ]
+
+    def positions_in_ip_range(self, first: int, last: int) -> list[int]:
+        """Return the positions of live rows whose packed IP is in [first, last]."""
+        first_high, first_low = first >> _LOW_BITS, first & _LOW_MASK
+        last_high, last_low = last >> _LOW_BITS, last & _LOW_MASK
+        ids = self.ids
+        if first_high == last_high:
+            # One high half (e.g. all of IPv4): compare the low halves only
+            return [
+                position
+                for position, (high, low) in enumerate(zip(self.ip_high, self.ip_low))
+                if high == first_high and first_low <= low <= last_low and ids[position] is not None
+            ]
+        return [
+            position
+            for position, (high, low) in enumerate(zip(self.ip_high, self.ip_low))
+            if first <= (high << _LOW_BITS) | low <= last and ids[position] is not None
+        ]
+
+    def copy(self) -> "TargetTable":
+        """Return an independent copy of the table (columns are memcpy'd, listeners are not copied)."""
+        clone = TargetTable.__new__(TargetTable)
+        clone.ids = self.ids[:]
+        clone.columns = [column[:] for column in self.columns]
+        clone.ip_high = self.ip_high[:]
+        clone.ip_low = self.ip_low[:]
+        clone.index = self.index.copy()
+        clone.listeners = []
+        clone._deleted = self._deleted
+        clone._compaction_holds = 0
+        return clone
@@ -0,0 +1,133 @@
+"""Logging Pipeline - Asynchronous, sampled log output.
+
+Request threads only put log records on a queue. Formatting and writing
+happen on one background thread (QueueListener), so a slow stream never
+blocks a request. Records are queued as they are and formatted only by the
+listener, so log calls must pass their values as %-style arguments:
+
+    logger.info("[%s] Returning %s targets", request_id, len(result))
+
+Per-request INFO/DEBUG logs can be sampled: sample_request() decides once
+per request whether its logs are kept, so a sampled request keeps all its
+lines. Warnings and errors are never dropped.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_request_sampled: ContextVar[bool] = ContextVar("log_request_sampled", default=True)
+_pipelines: list["LogPipeline"] = []
+
+
+def sample_request(rate: float) -> bool:
+    """Decide whether the INFO/DEBUG logs of the current request are kept.
+
+    Args:
+        rate: Fraction of requests whose logs are kept (0-1)
+
+    Returns:
+        True if the request's logs are kept
+    """
+    sampled = rate >= 1 or random.random() < rate
+    _request_sampled.set(sampled)
+    return sampled
+
+
+def skip_unused_record_attributes(log_format: str) -> None:
+    """Stop collecting caller, thread and process details the format never shows.
+
+    Finding the calling frame alone is about half the cost of creating a
+    record (see "Optimization" in the logging HOWTO).
+    """
+    caller_fields = ("pathname", "filename", "module", "funcName", "lineno")
+    if not any(f"%({name})" in log_format for name in caller_fields):
+        logging._srcfile = None
+    if "%(thread" not in log_format:
+        logging.logThreads = False
+    if "%(process)" not in log_format:
+        logging.logProcesses = False
+    if "%(processName)" not in log_format:
+        logging.logMultiprocessing = False
+
+
+class RequestSampleFilter(logging.Filter):
+    """Drops INFO and DEBUG records of requests not picked by sample_request()."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.INFO or _request_sampled.get()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class LogPipeline:
+    """Routes the records of a logger through a queue to background handlers."""
+
+    def __init__(self, handlers: list[logging.Handler]):
+        self.handlers = handlers
+        self.queue_handler = _DeferredQueueHandler(queue.SimpleQueue())
+        self.queue_handler.addFilter(RequestSampleFilter())
+        self._listener: Optional[QueueListener] = None
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        self._listener = QueueListener(
+            self.queue_handler.queue, *self.handlers, respect_handler_level=True
+        )
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Write all queued records and stop the writer thread."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _restart_after_fork(self) -> None:
+        # Only the forking thread survives in the child, so the child needs
+        # its own queue and writer thread
+        if self._listener is None:
+            return
+        self.queue_handler.queue = queue.SimpleQueue()
+        self.start()
+
+
+def install_pipeline(
+    handlers: list[logging.Handler], logger: Optional[logging.Logger] = None
+) -> LogPipeline:
+    """Replace the handlers of a logger (default: root) with a LogPipeline.
+
+    The pipeline is stopped (flushing queued records) at interpreter exit and
+    restarted in forked worker processes.
+    """
+    logger = logger or logging.getLogger()
+    pipeline = LogPipeline(handlers)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(pipeline.queue_handler)
+    pipeline.start()
+    _pipelines.append(pipeline)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=pipeline._restart_after_fork)
+    return pipeline
+
+
+def shutdown() -> None:
+    """Write all queued records of all pipelines and stop their writers.
+
+    Runs at interpreter exit; processes leaving with os._exit() call it first.
+    """
+    for pipeline in _pipelines:
+        pipeline.stop()
+
+
+atexit.register(shutdown)
@@ -4,19 +4,30 @@ This module creates and configures the Flask application with:
 - Connexion for OpenAPI-based routing
 - CORS support
 - Request ID middleware for tracing
+- Request bodies checked by compiled validators (src.api.payload_validator)
+- Opt-in request profiling (PROFILE_REQUESTS)
 - Logging configuration
 - Swagger UI at /api/docs (provided by connexion)
+
+The application is built once per process, on first access to the
+module-level `app` / `connexion_app` attributes (or by run()). Connexion,
+Flask and the service layer are imported only then, so importing this
+module stays cheap.
 """
 
+# The import time of the module is measured from its first statement, so
+# the imports after it are deliberately not at the top of the file
+# ruff: noqa: E402
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import logging
 import os
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 
-import connexion
-from flask import g, request, Response
-from flask_cors import CORS
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -24,29 +35,83 @@ load_dotenv()
 
 
 def configure_logging() -> None:
-    """Configure application logging based on environment."""
+    """Configure application logging based on environment.
+    
+    Records are written by a background thread (see src.logging_pipeline).
+    LOG_SAMPLE_RATE keeps the INFO/DEBUG logs of only that fraction of
+    requests. Does nothing if the root logger already has handlers.
+    """
+    from src.logging_pipeline import install_pipeline, skip_unused_record_attributes
+    
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    
     log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    root.setLevel(getattr(logging, log_level, logging.INFO))
     
-    logging.basicConfig(
-        level=getattr(logging, log_level, logging.INFO),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    skip_unused_record_attributes(log_format)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(log_format, datefmt="%Y-%m-%d %H:%M:%S"))
+    install_pipeline([stream_handler], root)
     
     # Reduce noise from third-party libraries
     logging.getLogger("werkzeug").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
 
 
+class StartupTimer:
+    """Measures the duration of each application startup phase."""
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self._started = self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        """Record the time since the previous mark as a phase."""
+        now = time.perf_counter()
+        self.phases[phase] = (now - self._last) * 1000
+        self._last = now
+
+    def split(self, phase: str, parts: dict[str, float]) -> None:
+        """Report parts of a marked phase separately; the phase keeps the rest of its time."""
+        self.phases.update(parts)
+        self.phases[phase] -= sum(parts.values())
+
+    @property
+    def total_ms(self) -> float:
+        """Total time since the timer was created, up to the last mark."""
+        return (self._last - self._started) * 1000
+
+    def report(self) -> str:
+        """Format a one-line summary of all phases."""
+        phases = ", ".join(f"{name} {ms:.1f}ms" for name, ms in self.phases.items())
+        return f"Startup completed in {self.total_ms:.1f}ms ({phases})"
+
+
 def create_app():
     """Create and configure the Connexion/Flask application.
     
     Returns:
         Configured Connexion application instance
     """
+    timer = StartupTimer()
     configure_logging()
     logger = logging.getLogger(__name__)
     
+    import connexion
+    from flask import g, request, Response
+    from flask_cors import CORS
+    from connexion.middleware import MiddlewarePosition
+    from src.api.metrics_middleware import MetricsMiddleware
+    from src.api.profiling import RequestProfiling
+    from src.logging_pipeline import sample_request
+    from src.api.spec_loader import load_spec
+    from src.api.payload_validator import MODELS_SPEC, body_validator_map, load_validators
+    from src.bl import target_import
+    timer.mark("imports")
+    
     # Determine OpenAPI spec location
     # In Docker/Render: generated spec is at src/generated/openapi/
     # Locally: use shared/openapi/bundled/openapi/ (bundled spec with resolved refs)
@@ -58,7 +123,16 @@ def create_app():
     else:
         spec_dir = bundled_spec
     
-    logger.info(f"Using OpenAPI spec from: {spec_dir}")
+    logger.info("Using OpenAPI spec from: %s", spec_dir)
+    specification = load_spec(spec_dir / "openapi.yaml")
+    timer.mark("spec")
+    
+    # Request bodies are checked by validators compiled from the DTO schemas
+    # (the generated/bundled spec carries the same schemas if models.yaml is absent)
+    validators = load_validators(MODELS_SPEC if MODELS_SPEC.exists() else spec_dir / "openapi.yaml")
+    # Uploaded rows are checked by the same validator as create requests
+    target_import.set_validator(validators["TargetCreateDTO"])
+    timer.mark("validators")
     
     # Create Connexion app
     connexion_app = connexion.App(
@@ -69,13 +143,15 @@ def create_app():
     # Add API with OpenAPI spec
     # x-openapi-router-controller tells connexion where to find the controller functions
     connexion_app.add_api(
-        "openapi.yaml",
-        arguments={"title": "Target Management API"},
+        specification,
         pythonic_params=True,
         strict_validation=True,
         validate_responses=False,  # Don't validate responses for flexibility
+        validator_map=body_validator_map(validators),
     )
     
+    timer.mark("routes")
+    
     # Get the underlying Flask app
     flask_app = connexion_app.app
     
@@ -109,6 +185,14 @@ def create_app():
     cors_origins = os.getenv("CORS_ORIGINS", "*")
     CORS(flask_app, origins=cors_origins.split(",") if cors_origins != "*" else "*")
     
+    # Fraction of requests whose INFO/DEBUG logs are written
+    log_sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+    
+    # None unless PROFILE_REQUESTS is set
+    profiling = RequestProfiling.from_env()
+    if profiling is not None:
+        logger.info("Request profiling enabled, writing %s to %s", profiling.output_format, profiling.directory)
+    
     # Request ID middleware
     @flask_app.before_request
     def before_request():
@@ -116,8 +200,12 @@ def create_app():
         request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
         g.request_id = request_id
         g.request_start = datetime.now(timezone.utc)
+        sample_request(log_sample_rate)
         
-        logger.debug(f"[{request_id}] {request.method} {request.path}")
+        logger.debug("[%s] %s %s", request_id, request.method, request.path)
+        
+        if profiling is not None and profiling.should_profile(request.headers):
+            g.profile = profiling.start()
     
     @flask_app.after_request
     def after_request(response: Response) -> Response:
@@ -125,23 +213,74 @@ def create_app():
         request_id = getattr(g, "request_id", "unknown")
         response.headers["X-Request-ID"] = request_id
         
+        profile = g.pop("profile", None)
+        if profile is not None:
+            path = profiling.finish(profile, f"{request.method}-{request.path}-{request_id}")
+            if path is not None:
+                response.headers["X-Profile-File"] = path.name
+                logger.info("[%s] Profile written to %s", request_id, path)
+        
         # Log request completion
         start = getattr(g, "request_start", None)
         if start:
             duration = (datetime.now(timezone.utc) - start).total_seconds() * 1000
             logger.info(
-                f"[{request_id}] {request.method} {request.path} "
-                f"-> {response.status_code} ({duration:.2f}ms)"
+                "[%s] %s %s -> %s (%.2fms)",
+                request_id, request.method, request.path, response.status_code, duration,
             )
         
         return response
     
+    # Request metrics, placed before exception handling so that requests
+    # rejected by validation are recorded too
+    connexion_app.add_middleware(MetricsMiddleware, position=MiddlewarePosition.BEFORE_EXCEPTION)
+    
+    timer.mark("middleware")
+    
+    # Load the target table now instead of on the first request
+    from src.api.controllers.targets_controller import get_service
+    repository = get_service().repository
+    timer.mark("target store")
+    timer.split(
+        "target store", {f"target {name}": ms for name, ms in repository.load_phases_ms.items()}
+    )
+    
+    flask_app.config["STARTUP_PHASES_MS"] = timer.phases
+    logger.info(timer.report())
     logger.info("Application initialized successfully")
     return connexion_app
 
+
+_connexion_app = None
+
+
+def get_app():
+    """Return the process-wide application, creating it on first use.
+    
+    Returns:
+        Configured Connexion application instance
+    """
+    global _connexion_app
+    if _connexion_app is None:
+        logger = logging.getLogger(__name__)
+        started = time.perf_counter()
+        _connexion_app = create_app()
+        logger.info("Module import took %.1fms", (started - _IMPORT_STARTED) * 1000)
+    return _connexion_app
+
+
+def __getattr__(name: str):
+    """Build the app lazily for WSGI/ASGI servers (`src.main:app`)."""
+    if name == "connexion_app":
+        return get_app()
+    if name == "app":
+        return get_app().app  # Flask app for WSGI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def run() -> None:
     """Run the application."""
-    connexion_app = create_app()
+    connexion_app = get_app()
     
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "5000"))
@@ -149,10 +288,5 @@ def run() -> None:
     connexion_app.run(host=host, port=port)
 
 
-# Create app instance for WSGI servers
-connexion_app = create_app()
-app = connexion_app.app  # Flask app for WSGI
-
-
 if __name__ == "__main__":
     run()
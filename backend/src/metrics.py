@@ -0,0 +1,412 @@
+"""Metrics - Prometheus-style counters, gauges and histograms.
+
+Recording a value must cost almost nothing on the request path, so metric
+updates take no lock: every thread increments its own shard of plain Python
+numbers (created once per thread), and shards are only summed when the
+metrics are rendered.
+
+The metric families of the whole application are defined at the bottom of
+this module and rendered in the Prometheus text exposition format by
+render().
+
+With several worker processes (src.server), every worker writes its
+counters and histograms to METRICS_DIR/worker-<pid>.json once per second
+from a background thread, and render() adds the files of all other workers to its own live
+values. Gauges describe the shared data and are reported as seen by the
+rendering worker.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Optional
+
+DURATION_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+FLUSH_INTERVAL_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class _Shards:
+    """Per-thread value arrays that are only summed on read."""
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._all: list[list[float]] = []
+        self._lock = threading.Lock()
+
+    def mine(self) -> list[float]:
+        """Return the calling thread's values (created on first use)."""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self._size
+            with self._lock:
+                self._all.append(values)
+            self._local.values = values
+            return values
+
+    def reset(self) -> None:
+        """Zero the values of all threads."""
+        with self._lock:
+            for values in self._all:
+                values[:] = [0.0] * self._size
+
+    def totals(self) -> list[float]:
+        with self._lock:
+            shards = list(self._all)
+        return [sum(column) for column in zip(*shards)] if shards else [0.0] * self._size
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter."""
+        self._shards.mine()[0] += amount
+
+    def values(self) -> list[float]:
+        return self._shards.totals()
+
+    def reset(self) -> None:
+        self._shards.reset()
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple):
+        self._buckets = buckets
+        # One slot per bucket, one for +Inf and one for the sum
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        values = self._shards.mine()
+        values[bisect.bisect_left(self._buckets, value)] += 1
+        values[-1] += value
+
+    def time(self) -> "_Timer":
+        """Return a context manager observing its duration in seconds."""
+        return _Timer(self)
+
+    def values(self) -> list[float]:
+        return self._shards.totals()
+
+    def reset(self) -> None:
+        self._shards.reset()
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self._value = value
+
+    def values(self) -> list[float]:
+        return [self._value]
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: _HistogramChild):
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class _Family:
+    """A named metric with one child per combination of label values."""
+
+    kind = ""
+    aggregated = True
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child for a combination of label values."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> dict[tuple, list[float]]:
+        return {labels: child.values() for labels, child in list(self._children.items())}
+
+    def reset(self) -> None:
+        for child in list(self._children.values()):
+            child.reset()
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+
+class Gauge(_Family):
+    kind = "gauge"
+    aggregated = False
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self.families: list[_Family] = []
+        self._flush_lock = threading.Lock()
+
+    def register(self, family: _Family) -> _Family:
+        """Add a family to the registry and return it."""
+        self.families.append(family)
+        return family
+
+    def reset_after_fork(self) -> None:
+        """Zero the counters and histograms inherited from the parent process.
+
+        The parent flushes them to its own file before forking, so they are
+        still reported once.
+        """
+        for family in self.families:
+            if family.aggregated:
+                family.reset()
+
+    # ------------------------------------------------------------------
+    # Worker files
+    # ------------------------------------------------------------------
+
+    def _snapshot(self) -> dict:
+        return {
+            family.name: {json.dumps(labels): values for labels, values in family.samples().items()}
+            for family in self.families
+            if family.aggregated
+        }
+
+    def flush(self, directory: Optional[Path] = None) -> None:
+        """Write this process's values to its file in METRICS_DIR."""
+        directory = directory or _metrics_dir()
+        if directory is None:
+            return
+        with self._flush_lock:
+            path = Path(directory) / f"worker-{os.getpid()}.json"
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._snapshot(), f)
+            os.replace(tmp_path, path)
+
+    def start_flushing(self, interval: float = FLUSH_INTERVAL_SECONDS) -> threading.Thread:
+        """Flush this process's values periodically from a daemon thread."""
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except OSError as e:
+                    logger.warning("Could not write metrics: %s", e)
+
+        thread = threading.Thread(target=loop, name="metrics-flush", daemon=True)
+        thread.start()
+        return thread
+
+    def _other_workers(self, directory: Path) -> list[dict]:
+        own = f"worker-{os.getpid()}.json"
+        snapshots = []
+        for path in Path(directory).glob("worker-*.json"):
+            if path.name == own:
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    # ------------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------------
+
+    def render(self) -> str:
+        """Render all families in the Prometheus text exposition format."""
+        directory = _metrics_dir()
+        others = self._other_workers(directory) if directory is not None else []
+        lines = []
+        for family in self.families:
+            samples = family.samples()
+            if family.aggregated:
+                for snapshot in others:
+                    for key, values in snapshot.get(family.name, {}).items():
+                        labels = tuple(json.loads(key))
+                        current = samples.get(labels)
+                        samples[labels] = (
+                            values if current is None else [a + b for a, b in zip(current, values)]
+                        )
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, values in sorted(samples.items()):
+                pairs = list(zip(family.labelnames, labels))
+                if family.kind == "histogram":
+                    cumulative = 0.0
+                    for bound, count in zip(family.buckets + (float("inf"),), values):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else _number(bound)
+                        lines.append(
+                            f"{family.name}_bucket{_labels(pairs + [('le', le)])} {_number(cumulative)}"
+                        )
+                    lines.append(f"{family.name}_sum{_labels(pairs)} {_number(values[-1])}")
+                    lines.append(f"{family.name}_count{_labels(pairs)} {_number(cumulative)}")
+                else:
+                    lines.append(f"{family.name}{_labels(pairs)} {_number(values[0])}")
+        return "\n".join(lines) + "\n"
+
+
+def _metrics_dir() -> Optional[Path]:
+    directory = os.getenv("METRICS_DIR")
+    return Path(directory) if directory else None
+
+
+def _labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# ----------------------------------------------------------------------
+# Per-request row counting
+# ----------------------------------------------------------------------
+
+_rows_scanned: ContextVar[Optional[list]] = ContextVar("rows_scanned", default=None)
+
+
+def start_row_count() -> list:
+    """Start counting rows scanned by the current request; returns the counter."""
+    counter = [0]
+    _rows_scanned.set(counter)
+    return counter
+
+
+def count_rows(rows: int) -> None:
+    """Add rows scanned by the data layer to the current request's count."""
+    counter = _rows_scanned.get()
+    if counter is not None:
+        counter[0] += rows
+
+
+def timed(histogram: _HistogramChild) -> Callable:
+    """Decorator observing the duration of every call in a histogram."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+# ----------------------------------------------------------------------
+# Application metrics
+# ----------------------------------------------------------------------
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by OpenAPI operationId",
+    ("operation", "method", "status"),
+))
+REQUEST_ROWS = REGISTRY.register(Histogram(
+    "http_request_rows_scanned",
+    "Rows read from the data layer per request",
+    ("operation",),
+    buckets=ROW_BUCKETS,
+))
+REPOSITORY_DURATION = REGISTRY.register(Histogram(
+    "repository_operation_duration_seconds",
+    "Duration of data layer operations",
+    ("repository", "operation"),
+))
+LOCK_WAIT = REGISTRY.register(Histogram(
+    "file_lock_wait_seconds",
+    "Time spent waiting for data file locks",
+    ("lock", "mode"),
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "cache_requests_total",
+    "Cache lookups by result (hit or miss)",
+    ("cache", "result"),
+))
+COALESCED_REQUESTS = REGISTRY.register(Counter(
+    "coalesced_requests_total",
+    "Reads that ran (leader) or shared the result of a concurrent identical read (shared)",
+    ("operation", "result"),
+))
+STORE_SIZE = REGISTRY.register(Gauge(
+    "store_size",
+    "Number of items held by a data store",
+    ("store",),
+))
+STORE_SEQUENCE = REGISTRY.register(Gauge(
+    "target_store_sequence",
+    "Sequence number of the last change applied to the target table",
+))
+
+
+def render() -> str:
+    """Render the application metrics."""
+    return REGISTRY.render()
@@ -1,5 +1,15 @@
 """Plain objects for business logic layer"""
 
 from .target import Target
+from .position import PositionRecord, Trajectory
+from .target_import import ImportReport, RowError
+from .job import Job
+from .cluster import Cluster
+from .tile import DensityTile
+from .proximity import ProximityEvent
+from .geofence import Geofence, GeofenceCreate, GeofenceEvent
+from .spectrum import FrequencyBand, BandOccupancy, SpectrumOccupancy
 
-__all__ = ["Target"]
+__all__ = ["Target", "PositionRecord", "Trajectory", "ImportReport", "RowError", "Job", "Cluster", "DensityTile", "ProximityEvent",
+           "Geofence", "GeofenceCreate", "GeofenceEvent",
+           "FrequencyBand", "BandOccupancy", "SpectrumOccupancy"]
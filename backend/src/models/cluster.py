@@ -0,0 +1,23 @@
+"""Plain Cluster object for business logic layer.
+
+A cluster aggregates the targets in one grid cell of a map zoom level, so
+a map can show a few hundred markers instead of every target.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class Cluster:
+    """Targets of one map grid cell returned by cluster queries."""
+
+    count: int
+    latitude: float  # Centroid
+    longitude: float
+    min_latitude: float  # Bounding box of the targets
+    min_longitude: float
+    max_latitude: float
+    max_longitude: float
+    frequency: float  # Most common frequency (the lowest on a tie)
+    target_id: Optional[str] = None  # Set for a cluster of one target
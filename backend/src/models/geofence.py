@@ -0,0 +1,51 @@
+"""Plain Geofence objects for business logic layer.
+
+A geofence is a polygon on the map (an exclusion zone, a sector). The
+targets inside each fence are tracked, and a target crossing its border
+raises an enter or exit event.
+"""
+
+from dataclasses import dataclass
+
+MAX_GEOFENCE_VERTICES = 1000
+
+
+@dataclass
+class Geofence:
+    """Plain Geofence object for business logic operations."""
+
+    id: str
+    name: str
+    # (latitude, longitude) corners in order; the last one connects to the first
+    vertices: list[tuple[float, float]]
+
+    def __post_init__(self):
+        """Validate fields after initialization."""
+        if not 3 <= len(self.vertices) <= MAX_GEOFENCE_VERTICES:
+            raise ValueError(
+                f"A geofence must have 3 to {MAX_GEOFENCE_VERTICES} vertices, got {len(self.vertices)}"
+            )
+        for latitude, longitude in self.vertices:
+            if not (-90 <= latitude <= 90):
+                raise ValueError(f"Latitude must be between -90 and 90, got {latitude}")
+            if not (-180 <= longitude <= 180):
+                raise ValueError(f"Longitude must be between -180 and 180, got {longitude}")
+
+
+@dataclass
+class GeofenceCreate:
+    """Data for creating a new Geofence (no ID yet)."""
+
+    name: str
+    vertices: list[tuple[float, float]]
+
+
+@dataclass
+class GeofenceEvent:
+    """A target entering or leaving a geofence."""
+
+    sequence: int  # Increases by one per event (0 until logged)
+    kind: str  # "enter" or "exit"
+    geofence_id: str
+    target_id: str
+    timestamp: float  # Epoch seconds the change was applied
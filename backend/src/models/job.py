@@ -0,0 +1,36 @@
+"""Plain Job object for business logic layer.
+
+A job is a long-running bulk operation (import, export, snapshot) run in
+the background by the job service. Its state is persisted, so it can be
+polled from any worker process and survives restarts.
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+@dataclass
+class Job:
+    """Plain background job state for business logic operations."""
+
+    id: str
+    kind: str
+    status: str = "queued"
+    params: dict = field(default_factory=dict)
+    progress: float = 0.0  # Fraction done, 0 to 1
+    message: str = ""
+    result: dict = field(default_factory=dict)
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    owner_pid: int = 0  # Process running (or about to run) the job
+    created_at: float = 0.0  # Seconds since the Unix epoch (UTC)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        """Check whether the job reached a final status."""
+        return self.status in FINISHED_STATUSES
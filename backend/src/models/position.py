@@ -0,0 +1,28 @@
+"""Plain PositionRecord object for business logic layer.
+
+A position record is one accepted position of a target at a point in time.
+Records are appended to the position history and never modified.
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PositionRecord:
+    """Plain position history record for business logic operations."""
+
+    target_id: str
+    timestamp: float  # Seconds since the Unix epoch (UTC)
+    latitude: float
+    longitude: float
+    altitude: float
+
+
+@dataclass
+class Trajectory:
+    """Downsampled track of a target returned by trajectory queries."""
+
+    target_id: str
+    method: str
+    original_count: int
+    points: list[PositionRecord] = field(default_factory=list)
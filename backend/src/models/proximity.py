@@ -0,0 +1,19 @@
+"""Plain ProximityEvent object for business logic layer.
+
+A proximity event is reported when a change brings two targets within the
+alert distance of each other (enter) or takes them apart again (exit).
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class ProximityEvent:
+    """Two targets coming within or leaving the alert distance."""
+
+    sequence: int  # Increases by one per event (0 until logged)
+    kind: str  # "enter" or "exit"
+    target_id: str  # The target that was changed
+    other_id: str
+    distance: float  # Meters between the two targets after the change
+    timestamp: float  # Epoch seconds the change was applied
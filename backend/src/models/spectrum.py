@@ -0,0 +1,49 @@
+"""Plain spectrum objects for business logic layer.
+
+Spectrum occupancy counts the targets per frequency band (e.g. the 433 MHz
+or the 2.4 GHz band), so spectrum planning sees which bands are crowded.
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class FrequencyBand:
+    """A named range of frequencies, from min_frequency up to (not including) max_frequency."""
+
+    name: str
+    min_frequency: float
+    max_frequency: float
+
+    def __post_init__(self):
+        """Validate fields after initialization."""
+        if not self.name:
+            raise ValueError("A frequency band must have a name")
+        if not 0 <= self.min_frequency < self.max_frequency:
+            raise ValueError(
+                f"Band {self.name} must have 0 <= min_frequency < max_frequency, "
+                f"got {self.min_frequency} to {self.max_frequency}"
+            )
+
+    def __contains__(self, frequency: float) -> bool:
+        return self.min_frequency <= frequency < self.max_frequency
+
+
+@dataclass
+class BandOccupancy:
+    """The targets using the frequencies of one band."""
+
+    band: FrequencyBand
+    count: int
+    frequencies: dict[float, int]  # Exact frequency -> targets using it
+    target_ids: list[str]  # In storage order
+
+
+@dataclass
+class SpectrumOccupancy:
+    """Targets per frequency band returned by occupancy queries."""
+
+    count: int  # Targets matched (in the viewport)
+    bands: list[BandOccupancy]
+    # Exact frequency -> targets using it, for frequencies in no band
+    unbanded: dict[float, int] = field(default_factory=dict)
@@ -0,0 +1,25 @@
+"""Plain import report objects for business logic layer.
+
+An import reads targets from an uploaded CSV or NDJSON file. Rows that
+cannot be stored are reported by their line number in the upload.
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class RowError:
+    """Rejected row of an import."""
+
+    line: int  # 1-based line number in the uploaded file
+    message: str
+
+
+@dataclass
+class ImportReport:
+    """Outcome of a bulk import."""
+
+    received: int = 0
+    imported: int = 0
+    rejected: int = 0
+    errors: list[RowError] = field(default_factory=list)  # First rejected rows only
@@ -0,0 +1,24 @@
+"""Plain DensityTile object for business logic layer.
+
+A density tile counts the targets in each bin of a Web Mercator map tile,
+so dashboards can draw heatmaps without loading the targets.
+"""
+
+from array import array
+from dataclasses import dataclass
+
+
+@dataclass
+class DensityTile:
+    """Target counts per bin of one map tile."""
+
+    zoom: int
+    x: int
+    y: int
+    bins: int  # Bins per side
+    counts: array  # uint32 counts, bins * bins, row by row from the north-west corner
+
+    @property
+    def total(self) -> int:
+        """Number of targets in the tile."""
+        return sum(self.counts)
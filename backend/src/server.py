@@ -0,0 +1,145 @@
+"""Target Management System - Production Server.
+
+Pre-forking multi-worker entry point:
+
+    python -m src.server
+
+The master process builds the application once, which loads the target
+table before any worker exists. Workers are forked from it, so they start
+without loading anything and share the loaded table copy-on-write. The
+master binds the listening socket, runs WEB_CONCURRENCY workers (default:
+number of CPUs) that each serve it with uvicorn, restarts workers that die
+and forwards SIGTERM/SIGINT to them.
+
+Any worker may write. Writes are serialized by the repositories' file
+locks, and every worker applies the changes made by the others before it
+reads (signalled through shared-memory counters), so all workers answer
+from the same data.
+
+Workers publish their metrics through files in METRICS_DIR (a fresh
+temporary directory unless set), so /metrics reports all workers together.
+"""
+
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from src import logging_pipeline
+from src.main import get_app
+from src.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    """Create the listening socket shared by all workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(connexion_app, sock: socket.socket) -> None:
+    """Serve requests in a worker process until it is told to stop."""
+    import uvicorn
+
+    # uvicorn installs its own handlers for graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(connexion_app, log_config=None, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(connexion_app, sock: socket.socket) -> int:
+    """Fork a worker process and return its pid."""
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        REGISTRY.reset_after_fork()
+        REGISTRY.start_flushing()
+        try:
+            _serve(connexion_app, sock)
+        except BaseException:
+            logger.exception("Worker failed")
+            exit_code = 1
+        finally:
+            logging_pipeline.shutdown()
+            os._exit(exit_code)
+    logger.info("Started worker %s", pid)
+    return pid
+
+
+def run(workers: Optional[int] = None) -> None:
+    """Run the application with several worker processes.
+
+    Args:
+        workers: Number of worker processes (defaults to WEB_CONCURRENCY or CPU count)
+    """
+    from src.api.controllers.targets_controller import get_service
+
+    own_metrics_dir = "METRICS_DIR" not in os.environ
+    if own_metrics_dir:
+        os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="target-metrics-")
+    metrics_dir = Path(os.environ["METRICS_DIR"])
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    for stale in metrics_dir.glob("worker-*.json"):
+        stale.unlink()
+
+    # Build the app and load the data once, before forking
+    connexion_app = get_app()
+    get_service().share_between_processes()
+
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "5000"))
+    workers = workers or int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    sock = _bind(host, port)
+    # Startup metrics of the master, inherited by every worker, are reported once
+    REGISTRY.flush()
+
+    # Keep the garbage collector from touching (and so copying) the
+    # preloaded objects in every worker
+    gc.freeze()
+
+    stopping = False
+    children: set[int] = set()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children.add(_spawn(connexion_app, sock))
+    logger.info("Serving on %s:%s with %s workers", host, port, workers)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning("Worker %s exited with status %s, restarting", pid, status)
+            children.add(_spawn(connexion_app, sock))
+
+    sock.close()
+    if own_metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+    logger.info("Server stopped")
+
+
+if __name__ == "__main__":
+    run()
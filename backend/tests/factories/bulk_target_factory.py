@@ -0,0 +1,226 @@
+"""Bulk Target Factory - Generate millions of valid targets quickly.
+
+target_factory builds one target at a time with Faker (~0.1ms each). This
+factory generates whole columns per chunk with a seeded random.Random
+instead (numpy-free), which is about eight times faster with writing the
+CSV included, and streams them to storage chunk by chunk:
+
+    python -m tests.factories.bulk_target_factory --count 5000000 \\
+        --output data/targets.csv [--format csv|snapshot] [--clusters 50] [--seed 1]
+
+All values satisfy the constraints of Target.__post_init__ and use the same
+ranges and rounding as target_factory. Optionally positions are grouped
+around a number of cluster centers (normally distributed, spread given in
+km) and frequencies follow COMMON_FREQUENCIES weights, like real emitters.
+"""
+
+import argparse
+import csv
+import math
+import random
+import socket
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.models.target import Target
+from src.dal.entities.target_entity import TargetEntity
+from src.dal.ip_codec import pack_ip
+from src.dal.snapshot_store import SnapshotStore
+from src.dal.target_table import NUMERIC_COLUMNS, TargetTable
+
+from .target_factory import COMMON_FREQUENCIES
+
+CHUNK_SIZE = 100_000
+KM_PER_DEGREE = 111.32
+FORMATS = ("csv", "snapshot")
+
+# Share of targets on one of COMMON_FREQUENCIES (the rest is uniform), as in
+# target_factory, with the common frequencies weighted towards ISM bands
+COMMON_FREQUENCY_SHARE = 0.7
+COMMON_FREQUENCY_WEIGHTS = (0.3, 0.2, 0.3, 0.1, 0.1)
+
+# Row tuple as in the CSV: (id, latitude, ..., bearing, ip_address)
+CsvRow = tuple[str, float, float, float, float, float, float, str]
+
+# Version 4 / RFC 4122 variant bits of a random UUID
+_UUID_MASK = ~((0xF << 76) | (0xC << 60))
+_UUID_BITS = (0x4 << 76) | (0x8 << 60)
+
+
+class BulkTargetGenerator:
+    """Generates target rows column by column, in chunks."""
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        clusters: int = 0,
+        cluster_spread_km: float = 50.0,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        """Initialize the generator.
+
+        Args:
+            seed: Seed for reproducible datasets (random if None)
+            clusters: Number of cluster centers positions are grouped around
+                (0 = uniform over the globe)
+            cluster_spread_km: Standard deviation of positions around their center
+            chunk_size: Rows generated per chunk
+        """
+        self._rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.cluster_spread_km = cluster_spread_km
+        self.centers = [
+            (self._rng.uniform(-70, 70), self._rng.uniform(-180, 180)) for _ in range(clusters)
+        ]
+
+    def _positions(self, count: int) -> tuple[list[float], list[float]]:
+        rng = self._rng
+        if not self.centers:
+            latitudes = [round(rng.uniform(-90, 90), 6) for _ in range(count)]
+            longitudes = [round(rng.uniform(-180, 180), 6) for _ in range(count)]
+            return latitudes, longitudes
+
+        gauss = rng.gauss
+        spread = self.cluster_spread_km / KM_PER_DEGREE
+        latitudes, longitudes = [], []
+        for center_lat, center_lon in rng.choices(self.centers, k=count):
+            lat = min(max(gauss(center_lat, spread), -90.0), 90.0)
+            # A degree of longitude gets shorter towards the poles
+            lon_spread = spread / max(math.cos(math.radians(lat)), 0.01)
+            lon = (gauss(center_lon, lon_spread) + 180.0) % 360.0 - 180.0
+            latitudes.append(round(lat, 6))
+            longitudes.append(round(lon, 6))
+        return latitudes, longitudes
+
+    def _frequencies(self, count: int) -> list[float]:
+        rng = self._rng
+        common = rng.choices(COMMON_FREQUENCIES, COMMON_FREQUENCY_WEIGHTS, k=count)
+        random_value = rng.random
+        return [
+            frequency if random_value() < COMMON_FREQUENCY_SHARE
+            else round(rng.uniform(0.1, 100), 2)
+            for frequency in common
+        ]
+
+    def _ids(self, count: int) -> list[str]:
+        # Formatting the hex digits directly is 3x faster than uuid.UUID()
+        bits = self._rng.getrandbits
+        ids = []
+        for _ in range(count):
+            h = f"{(bits(128) & _UUID_MASK) | _UUID_BITS:032x}"
+            ids.append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+        return ids
+
+    def chunk_columns(self, count: int) -> tuple[list[str], list[list[float]], list[str]]:
+        """Generate one chunk as (ids, numeric columns in NUMERIC_COLUMNS order, ips)."""
+        rng = self._rng
+        bits = rng.getrandbits
+        uniform = rng.uniform
+        ids = self._ids(count)
+        latitudes, longitudes = self._positions(count)
+        columns = [
+            latitudes,
+            longitudes,
+            [round(uniform(-500, 50000), 2) for _ in range(count)],
+            self._frequencies(count),
+            [round(uniform(0, 1000), 2) for _ in range(count)],
+            [round(uniform(0, 360), 2) for _ in range(count)],
+        ]
+        ntoa = socket.inet_ntoa
+        ips = [ntoa(bits(32).to_bytes(4, "big")) for _ in range(count)]
+        return ids, columns, ips
+
+    def chunks(self, count: int) -> Iterator[tuple[list[str], list[list[float]], list[str]]]:
+        """Yield chunks of columns until `count` rows were generated."""
+        remaining = count
+        while remaining > 0:
+            size = min(self.chunk_size, remaining)
+            remaining -= size
+            yield self.chunk_columns(size)
+
+    def rows(self, count: int) -> Iterator[CsvRow]:
+        """Yield `count` row tuples (id, latitude, ..., bearing, ip_address)."""
+        for ids, columns, ips in self.chunks(count):
+            yield from zip(ids, *columns, ips)
+
+    def targets(self, count: int) -> Iterator[Target]:
+        """Yield `count` validated plain Target objects."""
+        for row in self.rows(count):
+            yield Target(*row)
+
+
+def write_csv(path: Path, count: int, generator: Optional[BulkTargetGenerator] = None) -> int:
+    """Stream `count` generated targets to a CSV file in the repository's format.
+
+    Returns:
+        Number of rows written
+    """
+    generator = generator or BulkTargetGenerator()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(TargetEntity.csv_headers())
+        for ids, columns, ips in generator.chunks(count):
+            writer.writerows(zip(ids, *columns, ips))
+            written += len(ids)
+    return written
+
+
+def write_snapshot(path: Path, count: int, generator: Optional[BulkTargetGenerator] = None) -> int:
+    """Write a CSV file plus the binary snapshot the repository loads instead.
+
+    The snapshot is written after the CSV, so TargetRepository(path) takes it
+    as up to date and skips parsing the CSV.
+
+    Returns:
+        Number of rows written
+    """
+    generator = generator or BulkTargetGenerator()
+    ids: list[str] = []
+    columns = [array("d") for _ in NUMERIC_COLUMNS]
+    # Generated addresses are IPv4, so the high halves of the packed values are 0
+    ip_high, ip_low = array("Q"), array("Q")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(TargetEntity.csv_headers())
+        for chunk_ids, chunk_columns, chunk_ips in generator.chunks(count):
+            writer.writerows(zip(chunk_ids, *chunk_columns, chunk_ips))
+            ids.extend(chunk_ids)
+            for column, values in zip(columns, chunk_columns):
+                column.extend(values)
+            ip_high.frombytes(bytes(8 * len(chunk_ips)))
+            ip_low.extend(map(pack_ip, chunk_ips))
+    table = TargetTable(ids, columns, (ip_high, ip_low))
+    SnapshotStore(path.parent, path.stem).write_snapshot(table, 0)
+    return len(table)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic target dataset")
+    parser.add_argument("--count", type=int, required=True, help="Number of targets")
+    parser.add_argument("--output", type=Path, default=Path("data/targets.csv"))
+    parser.add_argument("--format", choices=FORMATS, default="csv",
+                        help="csv, or csv plus binary snapshot")
+    parser.add_argument("--clusters", type=int, default=0, help="Spatial clusters (0 = uniform)")
+    parser.add_argument("--spread-km", type=float, default=50.0, help="Cluster standard deviation")
+    parser.add_argument("--seed", type=int, help="Seed for a reproducible dataset")
+    args = parser.parse_args(argv)
+
+    generator = BulkTargetGenerator(args.seed, args.clusters, args.spread_km)
+    started = time.perf_counter()
+    write = write_csv if args.format == "csv" else write_snapshot
+    written = write(args.output, args.count, generator)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {written} targets to {args.output} in {elapsed:.1f}s "
+          f"({written / max(elapsed, 1e-9):,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,12 +5,18 @@ All generated values respect the validation constraints.
 """
 
 import uuid
+from typing import TYPE_CHECKING
+
 from faker import Faker
 
 from src.models.target import Target, TargetCreate, TargetUpdate
-from src.generated.dtos import TargetDTO, TargetCreateDTO
 from src.dal.entities.target_entity import TargetEntity
 
+if TYPE_CHECKING:
+    # Generated from OpenAPI (poetry run generate-api); imported on use so the
+    # plain object and entity factories work without generated code
+    from src.generated.dtos import TargetDTO, TargetCreateDTO
+
 fake = Faker()
 
 # Common frequency values for realistic data
@@ -137,7 +143,7 @@ def create_random_target_update(partial: bool = True) -> TargetUpdate:
         )
 
 
-def create_random_target_dto(id: str | None = None) -> TargetDTO:
+def create_random_target_dto(id: str | None = None) -> "TargetDTO":
     """Create a random TargetDTO.
     
     Args:
@@ -146,6 +152,8 @@ def create_random_target_dto(id: str | None = None) -> TargetDTO:
     Returns:
         Random TargetDTO with valid values
     """
+    from src.generated.dtos import TargetDTO
+
     return TargetDTO(
         id=id or str(uuid.uuid4()),
         latitude=_random_latitude(),
@@ -158,12 +166,14 @@ def create_random_target_dto(id: str | None = None) -> TargetDTO:
     )
 
 
-def create_random_target_create_dto() -> TargetCreateDTO:
+def create_random_target_create_dto() -> "TargetCreateDTO":
     """Create a random TargetCreateDTO.
     
     Returns:
         Random TargetCreateDTO with valid values
     """
+    from src.generated.dtos import TargetCreateDTO
+
     return TargetCreateDTO(
         latitude=_random_latitude(),
         longitude=_random_longitude(),
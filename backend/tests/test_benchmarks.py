@@ -0,0 +1,37 @@
+"""
+Unit tests for the benchmark suite
+"""
+import json
+
+from benchmarks import bench_targets
+
+
+class TestTargetBenchmarks:
+    """Tests for running and comparing target benchmarks"""
+
+    def test_small_run_writes_results(self, tmp_path, monkeypatch):
+        """Test every layer is measured and written as JSON"""
+        monkeypatch.setattr(bench_targets, "TIME_BUDGET_SECONDS", 0)
+        monkeypatch.setattr(bench_targets, "MAX_WRITES", 5)
+        monkeypatch.setattr(bench_targets, "BATCH_SIZE", 10)
+        output = tmp_path / "results.json"
+
+        assert bench_targets.main(["--sizes", "20", "--output", str(output)]) == 0
+
+        results = json.loads(output.read_text())["results"]
+        groups = {r["group"] for r in results}
+        assert groups == {"repository", "service", "converter", "serialization"}
+        assert all(r["size"] == 20 and r["p50_ms"] >= 0 for r in results)
+        assert {"get_all", "get_by_id", "create", "update", "delete"} <= {
+            r["operation"] for r in results if r["group"] == "service"
+        }
+
+    def test_compare_flags_regressions(self, tmp_path):
+        """Test a p50 slowdown above the threshold fails the comparison"""
+        result = bench_targets.Result("repository", "get_all", 10, 3, 1, 100.0, 2.0, 2.0, 1.0)
+        baseline = tmp_path / "baseline.json"
+        entry = dict(vars(result), p50_ms=1.0)
+        baseline.write_text(json.dumps({"results": [entry]}))
+
+        assert not bench_targets.compare([result], baseline, threshold=0.5)
+        assert bench_targets.compare([result], baseline, threshold=1.5)
@@ -0,0 +1,87 @@
+"""
+Unit tests for the bulk synthetic target generator
+"""
+import math
+
+import pytest
+
+from src.dal.target_repository import TargetRepository
+from tests.factories.bulk_target_factory import (
+    KM_PER_DEGREE,
+    BulkTargetGenerator,
+    main,
+    write_csv,
+    write_snapshot,
+)
+from tests.factories.target_factory import COMMON_FREQUENCIES
+
+
+class TestBulkTargetGenerator:
+    """Tests for generated columns"""
+
+    def test_targets_are_valid(self):
+        """Test every generated row passes Target validation"""
+        targets = list(BulkTargetGenerator(seed=1, chunk_size=300).targets(1000))
+        assert len(targets) == 1000
+        assert len({t.id for t in targets}) == 1000
+        assert all(len(t.ip_address.split(".")) == 4 for t in targets)
+
+    def test_seed_is_reproducible(self):
+        """Test the same seed generates the same dataset"""
+        first = list(BulkTargetGenerator(seed=7, clusters=3).rows(200))
+        second = list(BulkTargetGenerator(seed=7, clusters=3).rows(200))
+        assert first == second
+        assert first != list(BulkTargetGenerator(seed=8, clusters=3).rows(200))
+
+    def test_clustered_positions_stay_near_centers(self):
+        """Test clustered positions lie within a few spreads of a center"""
+        generator = BulkTargetGenerator(seed=3, clusters=4, cluster_spread_km=20)
+        limit_km = 6 * 20
+        for target in generator.targets(500):
+            distances = [
+                KM_PER_DEGREE * math.hypot(
+                    target.latitude - lat,
+                    ((target.longitude - lon + 180) % 360 - 180) * math.cos(math.radians(lat)),
+                )
+                for lat, lon in generator.centers
+            ]
+            assert min(distances) < limit_km
+
+    def test_common_frequencies_dominate(self):
+        """Test most frequencies come from COMMON_FREQUENCIES"""
+        targets = list(BulkTargetGenerator(seed=5).targets(2000))
+        common = sum(t.frequency in COMMON_FREQUENCIES for t in targets)
+        assert common / len(targets) == pytest.approx(0.7, abs=0.05)
+
+
+class TestBulkTargetWriters:
+    """Tests for streaming generated targets to storage"""
+
+    def test_write_csv_loads_in_repository(self, tmp_path):
+        """Test the CSV is read by TargetRepository"""
+        path = tmp_path / "targets.csv"
+        assert write_csv(path, 250, BulkTargetGenerator(seed=1, chunk_size=100)) == 250
+
+        repository = TargetRepository(str(path))
+        assert len(repository.get_all()) == 250
+        repository.close()
+
+    def test_write_snapshot_skips_csv_parsing(self, tmp_path, monkeypatch):
+        """Test the repository loads the snapshot instead of parsing the CSV"""
+        path = tmp_path / "targets.csv"
+        write_snapshot(path, 120, BulkTargetGenerator(seed=2))
+
+        def fail(self):
+            raise AssertionError("CSV was parsed")
+
+        monkeypatch.setattr(TargetRepository, "_parse_csv", fail)
+        repository = TargetRepository(str(path))
+        assert len(repository.get_all()) == 120
+        repository.close()
+
+    def test_cli_writes_requested_count(self, tmp_path, capsys):
+        """Test the command line entry point"""
+        path = tmp_path / "out" / "targets.csv"
+        assert main(["--count", "50", "--output", str(path), "--seed", "1"]) == 0
+        assert len(path.read_text().splitlines()) == 51
+        assert "Wrote 50 targets" in capsys.readouterr().out
@@ -0,0 +1,212 @@
+"""
+Unit tests for map clustering
+"""
+import math
+import random
+from collections import Counter
+
+import pytest
+
+import src.main
+from src.api.controllers import targets_controller
+from src.bl.history_service import HistoryService
+from src.bl.target_service import TargetService
+from src.dal.cluster_index import LEAF_LEVEL, MAX_ZOOM, ClusterIndex, leaf_code, leaf_codes, leaf_tile
+from src.dal.converters.entity_converter import plain_to_row
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.shared_counters import SharedCounters
+from src.dal.target_repository import TargetRepository
+from src.dal.target_table import TargetTable
+from src.models.target import Target
+
+WORLD = (-90.0, -180.0, 90.0, 180.0)
+
+
+def _target(number, latitude, longitude, frequency=2400.0):
+    return Target(f"t{number}", latitude, longitude, 100.0, frequency, 10.0, 45.0, "10.0.0.1")
+
+
+def _random_targets(count, seed=1):
+    rng = random.Random(seed)
+    return [
+        _target(n, rng.gauss(32.0, 2.0), rng.gauss(34.8, 2.0), rng.choice([433.0, 915.0, 2400.0, 5800.0]))
+        for n in range(count)
+    ]
+
+
+def _brute_force(targets, zoom):
+    """Group targets by their cell at a zoom level the slow way."""
+    shift = MAX_ZOOM - zoom
+    cells = {}
+    for target in targets:
+        x, y = leaf_tile(target.latitude, target.longitude)
+        cells.setdefault((y >> shift, x >> shift), []).append(target)
+    return [cells[key] for key in sorted(cells)]
+
+
+def _assert_matches(clusters, targets, zoom):
+    expected = _brute_force(targets, zoom)
+    assert len(clusters) == len(expected)
+    for cluster, members in zip(clusters, expected):
+        assert cluster.count == len(members)
+        assert cluster.latitude == pytest.approx(sum(t.latitude for t in members) / len(members))
+        assert cluster.longitude == pytest.approx(sum(t.longitude for t in members) / len(members))
+        assert cluster.min_latitude == min(t.latitude for t in members)
+        assert cluster.max_longitude == max(t.longitude for t in members)
+        counts = Counter(t.frequency for t in members)
+        assert cluster.frequency == min(f for f in counts if counts[f] == max(counts.values()))
+        assert cluster.target_id == (members[0].id if len(members) == 1 else None)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = TargetRepository(str(tmp_path / "targets.csv"))
+    yield repository
+    repository.close()
+
+
+class TestQuadkeys:
+    """Tests for the quadkeys targets are sorted by"""
+
+    def test_column_codes_equal_single_codes(self):
+        """Test codes computed column by column are identical to single ones"""
+        rng = random.Random(3)
+        latitudes = [rng.uniform(-90, 90) for _ in range(2000)] + [90.0, -90.0, 85.06, 0.0]
+        longitudes = [rng.uniform(-180, 180) for _ in range(2000)] + [180.0, -180.0, 0.0, -180.0]
+        assert leaf_codes(latitudes, longitudes) == [leaf_code(a, b) for a, b in zip(latitudes, longitudes)]
+
+    def test_cell_is_code_prefix(self):
+        """Test nearby positions share the prefix of their common cell"""
+        first, second = leaf_code(32.0, 34.0), leaf_code(32.001, 34.001)
+        assert first >> 2 * LEAF_LEVEL == second >> 2 * LEAF_LEVEL == 0
+        assert first >> 2 * (MAX_ZOOM - 10) == second >> 2 * (MAX_ZOOM - 10)
+        assert first != second
+
+
+class TestClusterIndex:
+    """Tests for clusters read through the repository"""
+
+    @pytest.mark.parametrize("zoom", [0, 4, 8])
+    def test_clusters_match_brute_force(self, repository, zoom):
+        """Test every cell aggregates exactly the targets inside it"""
+        targets = _random_targets(500)
+        repository.put_many(targets)
+        # The targets are all within a few degrees of (32, 34.8)
+        _assert_matches(repository.get_clusters(zoom, 15.0, 20.0, 50.0, 50.0), targets, zoom)
+
+    def test_cached_clusters_follow_changes(self, repository):
+        """Test moves, deletes and creates update cached clusters like a rebuild"""
+        targets = _random_targets(300)
+        repository.put_many(targets)
+        repository.get_clusters(5, *WORLD)
+
+        rng = random.Random(2)
+        for target in rng.sample(targets[:150], 40):
+            target.latitude += rng.uniform(-3, 3)
+            target.frequency = 5800.0
+            repository.update(target)
+        for target in targets[150:200]:
+            repository.delete(target.id)
+        extra = _random_targets(20, seed=9)
+        for number, target in enumerate(extra):
+            target.id = f"extra{number}"
+            repository.create(target)
+
+        remaining = targets[:150] + targets[200:] + extra
+        _assert_matches(repository.get_clusters(5, *WORLD), remaining, 5)
+
+    def test_bounding_box_shrinks_after_edge_removal(self, repository):
+        """Test removing the outermost target recomputes the bounding box"""
+        repository.put_many([_target(1, 32.0, 34.0), _target(2, 32.001, 34.001), _target(3, 32.002, 34.002)])
+        [cluster] = repository.get_clusters(0, *WORLD)
+        assert cluster.max_latitude == 32.002
+
+        repository.delete("t3")
+        [cluster] = repository.get_clusters(0, *WORLD)
+        assert (cluster.count, cluster.max_latitude, cluster.max_longitude) == (2, 32.001, 34.001)
+
+    def test_viewport_limits_cells(self, repository):
+        """Test only cells in the viewport are returned, across the antimeridian too"""
+        repository.put_many([_target(1, 10.0, 179.9), _target(2, 10.0, -179.9), _target(3, 10.0, 0.0)])
+
+        assert [c.target_id for c in repository.get_clusters(10, 9.0, 179.0, 11.0, -179.0)] == ["t1", "t2"]
+        assert [c.target_id for c in repository.get_clusters(10, 9.0, -1.0, 11.0, 1.0)] == ["t3"]
+        with pytest.raises(ValueError):
+            repository.get_clusters(10, *WORLD)
+
+    def test_large_batches_rebuild_the_index(self, repository):
+        """Test a batch larger than the queue limit still gives exact clusters"""
+        repository.get_clusters(3, *WORLD)
+        targets = _random_targets(3000)
+        repository.put_many(targets)
+        _assert_matches(repository.get_clusters(3, *WORLD), targets, 3)
+
+    def test_least_recently_used_zoom_is_evicted(self):
+        """Test only the caches of the most recently queried zooms are kept"""
+        index = ClusterIndex(cached_zooms=2)
+        table = TargetTable.from_rows(plain_to_row(t) for t in _random_targets(50))
+        for zoom in (1, 2, 1, 3):
+            index.query(table, zoom, *WORLD)
+        assert list(index._caches) == [1, 3]
+
+    def test_worker_reloading_a_snapshot_rebuilds_clusters(self, tmp_path):
+        """Test clusters of a worker that reloaded the table after a log gap are exact"""
+        csv_path = str(tmp_path / "targets.csv")
+        counters = SharedCounters("sequence", "log_start")
+        writer = TargetRepository(csv_path, snapshot_interval=2, counters=counters)
+        reader = TargetRepository(csv_path, snapshot_interval=2, counters=counters)
+        targets = _random_targets(6)
+        reader.get_clusters(2, *WORLD)
+
+        for target in targets[:5]:
+            writer.create(target)
+        writer.snapshot()
+        writer.create(targets[5])
+
+        _assert_matches(reader.get_clusters(2, *WORLD), targets, 2)
+
+
+class TestClusterService:
+    """Tests for cluster request validation"""
+
+    def test_invalid_requests_are_rejected(self, repository, tmp_path):
+        """Test zoom and viewport limits raise ValueError"""
+        service = TargetService(repository, HistoryService(PositionHistoryRepository(str(tmp_path / "history"))))
+        with pytest.raises(ValueError):
+            service.get_clusters(MAX_ZOOM + 1)
+        with pytest.raises(ValueError):
+            service.get_clusters(3, min_latitude=-91.0)
+        with pytest.raises(ValueError):
+            service.get_clusters(3, min_latitude=10.0, max_latitude=5.0)
+        assert service.get_clusters(0) == []
+
+
+class TestClusterEndpoint:
+    """Tests for GET /api/v1/targets/clusters"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        client = src.main.connexion_app.test_client()
+        targets_controller.get_service().repository.put_many(
+            [_target(1, 32.0, 34.0, 433.0), _target(2, 32.01, 34.01, 433.0), _target(3, -33.9, 18.4)]
+        )
+        return client
+
+    def test_clusters_are_returned(self, client):
+        """Test the endpoint aggregates targets per cell"""
+        response = client.get("/api/v1/targets/clusters", params={"zoom": 2})
+        assert response.status_code == 200
+        clusters = response.json()
+        assert [c["count"] for c in clusters] == [2, 1]
+        assert clusters[0]["frequency"] == 433.0
+        assert math.isclose(clusters[0]["latitude"], 32.005)
+        assert clusters[1]["target_id"] == "t3"
+
+    def test_too_many_cells_returns_400(self, client):
+        """Test a viewport too large for the zoom is rejected"""
+        response = client.get("/api/v1/targets/clusters", params={"zoom": 12})
+        assert response.status_code == 400
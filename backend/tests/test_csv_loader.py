@@ -0,0 +1,103 @@
+"""
+Unit tests for parallel CSV loading
+"""
+import pytest
+
+from src.dal import csv_loader
+from src.dal.converters.entity_converter import row_to_plain
+from src.dal.target_repository import TargetRepository
+from tests.factories.bulk_target_factory import BulkTargetGenerator, write_csv
+
+HEADER = "id,latitude,longitude,altitude,frequency,speed,bearing,ip_address\n"
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "targets.csv"
+    write_csv(path, 2000, BulkTargetGenerator(seed=4))
+    return path
+
+
+class TestSplitRanges:
+    """Tests for splitting a file at line boundaries"""
+
+    def test_ranges_cover_whole_lines(self, csv_path):
+        """Test ranges are contiguous and each one starts a line"""
+        header, ranges = csv_loader.split_ranges(csv_path, 7)
+        data = csv_path.read_bytes()
+        assert header == HEADER.strip()
+        assert ranges[0][0] == data.index(b"\n") + 1 and ranges[-1][1] == len(data)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start and data[start - 1:start] == b"\n"
+
+
+class TestLoadTable:
+    """Tests for parsing files into a TargetTable"""
+
+    def test_parallel_load_matches_sequential(self, csv_path, monkeypatch):
+        """Test a pool of workers produces the same table in file order"""
+        sequential = csv_loader.load_table(csv_path, workers=1)
+        monkeypatch.setattr(csv_loader, "RANGE_BYTES", 4096)
+        parallel = csv_loader.load_table(csv_path, workers=3)
+
+        assert len(parallel) == 2000
+        assert list(parallel.rows()) == list(sequential.rows())
+        first = csv_path.read_text().splitlines()[1].split(",")
+        assert row_to_plain(parallel.row_at(0)).ip_address == first[7]
+
+    def test_repeated_id_keeps_last_values_in_first_position(self, tmp_path):
+        """Test duplicate ids behave like rows put one by one"""
+        path = tmp_path / "targets.csv"
+        path.write_text(
+            HEADER
+            + "a,1.0,2.0,3.0,4.0,5.0,6.0,10.0.0.1\n"
+            + "b,1.0,2.0,3.0,4.0,5.0,6.0,10.0.0.2\n"
+            + "\n"
+            + "a,9.0,2.0,3.0,4.0,5.0,6.0,::1\n"
+        )
+        table = csv_loader.load_table(path, workers=1)
+        assert [row[0] for row in table.rows()] == ["a", "b"]
+        assert row_to_plain(table.get("a")).latitude == 9.0
+        assert row_to_plain(table.get("a")).ip_address == "::1"
+
+    def test_columns_are_matched_by_header(self, tmp_path):
+        """Test files with a different column order are read by name"""
+        path = tmp_path / "targets.csv"
+        path.write_text(
+            "ip_address,id,bearing,speed,frequency,altitude,longitude,latitude\n"
+            "10.0.0.7,a,6.0,5.0,4.0,3.0,2.0,1.0\n"
+        )
+        target = row_to_plain(csv_loader.load_table(path, workers=1).get("a"))
+        assert (target.latitude, target.bearing, target.ip_address) == (1.0, 6.0, "10.0.0.7")
+
+    def test_invalid_row_is_reported(self, tmp_path):
+        """Test an unparsable value raises ValueError"""
+        path = tmp_path / "targets.csv"
+        path.write_text(HEADER + "a,north,2.0,3.0,4.0,5.0,6.0,10.0.0.1\n")
+        with pytest.raises(ValueError, match="Invalid row"):
+            csv_loader.load_table(path, workers=1)
+
+    def test_repository_loads_with_workers(self, csv_path, monkeypatch):
+        """Test the repository's cold start uses the loader"""
+        monkeypatch.setattr(csv_loader, "RANGE_BYTES", 8192)
+        repository = TargetRepository(str(csv_path), load_workers=2)
+        assert len(repository.get_all()) == 2000
+        repository.close()
+
+
+class TestVerify:
+    """Tests for the offline verification command"""
+
+    def test_reports_constraint_violations(self, tmp_path, capsys):
+        """Test rows breaking Target constraints are counted"""
+        path = tmp_path / "targets.csv"
+        path.write_text(
+            HEADER
+            + "a,100.0,2.0,3.0,4.0,5.0,6.0,10.0.0.1\n"
+            + "b,1.0,2.0,3.0,0.0,5.0,6.0,10.0.0.2\n"
+        )
+        assert csv_loader.main([str(path), "--workers", "1"]) == 1
+        output = capsys.readouterr().out
+        assert "Loaded 2 targets" in output
+        assert "1 rows with invalid latitude" in output
+        assert "1 rows with invalid frequency" in output
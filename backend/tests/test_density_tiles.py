@@ -0,0 +1,138 @@
+"""
+Unit tests for density tiles
+"""
+import random
+import struct
+
+import pytest
+
+import src.main
+from src.api.controllers import targets_controller
+from src.bl.history_service import HistoryService
+from src.bl.target_service import TargetService
+from src.dal.cluster_index import MAX_ZOOM, leaf_tile
+from src.dal.density_tiles import TILE_BIN_LEVELS, TILE_BINS, MAX_TILE_ZOOM
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.target_repository import TargetRepository
+from src.models.target import Target
+
+
+def _target(number, latitude, longitude):
+    return Target(f"t{number}", latitude, longitude, 100.0, 2400.0, 10.0, 45.0, "10.0.0.1")
+
+
+def _random_targets(count, seed=1):
+    rng = random.Random(seed)
+    return [_target(n, rng.gauss(32.0, 1.0), rng.gauss(34.8, 1.0)) for n in range(count)]
+
+
+def _brute_force(targets, zoom, x, y):
+    """Count targets per bin of a tile the slow way."""
+    counts = [0] * (TILE_BINS * TILE_BINS)
+    shift = MAX_ZOOM + 2 - zoom - TILE_BIN_LEVELS
+    for target in targets:
+        leaf_x, leaf_y = leaf_tile(target.latitude, target.longitude)
+        bin_x, bin_y = leaf_x >> shift, leaf_y >> shift
+        if (bin_x >> TILE_BIN_LEVELS, bin_y >> TILE_BIN_LEVELS) == (x, y):
+            counts[(bin_y % TILE_BINS) * TILE_BINS + bin_x % TILE_BINS] += 1
+    return counts
+
+
+def _tile_of(target, zoom):
+    leaf_x, leaf_y = leaf_tile(target.latitude, target.longitude)
+    shift = MAX_ZOOM + 2 - zoom
+    return leaf_x >> shift, leaf_y >> shift
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = TargetRepository(str(tmp_path / "targets.csv"))
+    repository.put_many(_random_targets(400))
+    yield repository
+    repository.close()
+
+
+class TestDensityTiles:
+    """Tests for counting and caching tiles"""
+
+    @pytest.mark.parametrize("zoom", [0, 5, 9])
+    def test_counts_match_brute_force(self, repository, zoom):
+        """Test every bin counts exactly the targets inside it"""
+        targets = _random_targets(400)
+        x, y = _tile_of(targets[0], zoom)
+        tile = repository.get_density_tile(zoom, x, y)
+        assert list(tile.counts) == _brute_force(targets, zoom, x, y)
+        assert tile.total == sum(1 for t in targets if _tile_of(t, zoom) == (x, y))
+
+    def test_only_touched_tiles_are_invalidated(self, repository):
+        """Test a move drops the tiles of its old and new position and keeps the others"""
+        targets = _random_targets(400)
+        moved = targets[0]
+        here, far = _tile_of(moved, 9), _tile_of(_target(0, -33.9, 18.4), 9)
+        other = next(_tile_of(t, 9) for t in targets if _tile_of(t, 9) != here)
+        before = repository.get_density_tile(9, *here)
+        assert repository.get_density_tile(9, *far).total == 0
+        kept = repository.get_density_tile(9, *other)
+
+        moved.latitude, moved.longitude = -33.9, 18.4
+        repository.update(moved)
+
+        assert repository.get_density_tile(9, *here).total == before.total - 1
+        assert repository.get_density_tile(9, *far).total == 1
+        assert repository.get_density_tile(9, *other).counts is kept.counts
+
+    def test_unmoved_updates_keep_tiles(self, repository):
+        """Test updates that keep the position do not drop cached tiles"""
+        target = _random_targets(400)[1]
+        cached = repository.get_density_tile(0, 0, 0)
+        target.frequency, target.speed = 5800.0, 1.0
+        repository.update(target)
+        assert repository.get_density_tile(0, 0, 0).counts is cached.counts
+
+    def test_least_recently_used_tile_is_evicted(self, repository):
+        """Test the cache keeps at most its size in tiles"""
+        repository._tiles.cache_size = 2
+        first = repository.get_density_tile(1, 0, 0)
+        repository.get_density_tile(1, 1, 0)
+        repository.get_density_tile(1, 0, 0)
+        repository.get_density_tile(1, 1, 1)
+        assert repository.get_density_tile(1, 0, 0).counts is first.counts
+        assert len(repository._tiles._tiles) == 2
+
+    def test_invalid_tiles_are_rejected(self, repository, tmp_path):
+        """Test zoom and coordinates outside the tile pyramid raise ValueError"""
+        service = TargetService(repository, HistoryService(PositionHistoryRepository(str(tmp_path / "history"))))
+        with pytest.raises(ValueError):
+            service.get_density_tile(MAX_TILE_ZOOM + 1, 0, 0)
+        with pytest.raises(ValueError):
+            service.get_density_tile(2, 4, 0)
+
+
+class TestDensityTileEndpoint:
+    """Tests for GET /api/v1/tiles/{z}/{x}/{y}"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        client = src.main.connexion_app.test_client()
+        targets_controller.get_service().repository.put_many(_random_targets(50))
+        return client
+
+    def test_json_and_binary_tiles(self, client):
+        """Test JSON is the default and raw counts are sent when preferred"""
+        response = client.get("/api/v1/tiles/0/0/0")
+        assert response.status_code == 200
+        tile = response.json()
+        assert (tile["bins"], tile["total"], len(tile["counts"])) == (64, 50, 64 * 64)
+
+        response = client.get("/api/v1/tiles/0/0/0", headers={"Accept": "application/octet-stream"})
+        assert response.headers["content-type"] == "application/octet-stream"
+        assert response.headers["x-tile-bins"] == "64"
+        assert list(struct.unpack(f"<{64 * 64}I", response.content)) == tile["counts"]
+
+    def test_missing_tile_returns_400(self, client):
+        """Test coordinates outside the zoom level are rejected"""
+        assert client.get("/api/v1/tiles/1/2/0").status_code == 400
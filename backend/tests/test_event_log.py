@@ -0,0 +1,51 @@
+"""
+Unit tests for the event log shared by worker processes
+"""
+from src.dal.event_log import EventLog
+from src.models.proximity import ProximityEvent
+
+
+def _events(count):
+    return [ProximityEvent(0, "enter", f"t{n}", "t0", 10.0, 1700000000.0 + n) for n in range(count)]
+
+
+class TestEventLog:
+    """Tests for numbering, polling and trimming events"""
+
+    def test_events_are_numbered_and_polled(self, tmp_path):
+        """Test appended events continue the numbering and are returned after a sequence"""
+        log = EventLog(str(tmp_path / "events.jsonl"), ProximityEvent)
+        assert log.get(0, 10) == []
+        log.append(_events(3))
+        log.append(_events(2))
+
+        assert [e.sequence for e in log.get(0, 10)] == [1, 2, 3, 4, 5]
+        assert [e.sequence for e in log.get(3, 1)] == [4]
+        assert log.get(5, 10) == []
+
+    def test_other_logs_on_the_file_read_the_same_events(self, tmp_path):
+        """Test a log on the same file continues the numbering and reads appended events"""
+        path = str(tmp_path / "events.jsonl")
+        first, second = EventLog(path, ProximityEvent), EventLog(path, ProximityEvent)
+        first.append(_events(2))
+        second.append(_events(1))
+        with open(path, "a") as f:
+            f.write('{"sequence": 4, "kind": "ex')
+
+        assert first.get(0, 10) == second.get(0, 10)
+        assert [(e.sequence, e.target_id, e.timestamp) for e in first.get(1, 10)] == [
+            (2, "t1", 1700000001.0), (3, "t0", 1700000000.0),
+        ]
+
+    def test_file_is_trimmed_to_the_kept_events(self, tmp_path):
+        """Test the file is replaced once it holds twice the kept events, and readers follow"""
+        path = tmp_path / "events.jsonl"
+        writer, reader = EventLog(str(path), ProximityEvent, kept=3), EventLog(str(path), ProximityEvent, kept=3)
+        writer.append(_events(4))
+        assert [e.sequence for e in reader.get(0, 10)] == [2, 3, 4]
+
+        writer.append(_events(3))
+        assert len(path.read_text().splitlines()) == 3
+        assert [e.sequence for e in reader.get(0, 10)] == [5, 6, 7]
+        writer.append(_events(1))
+        assert [e.sequence for e in reader.get(6, 10)] == [7, 8]
@@ -0,0 +1,92 @@
+"""
+Unit tests for the cross-process reader/writer file lock
+"""
+import threading
+import time
+import uuid
+
+from src.models.target import Target
+from src.dal.file_lock import FileLock
+from src.dal.target_repository import TargetRepository
+
+
+class TestFileLock:
+    """Tests for shared and exclusive locking"""
+
+    def test_readers_share_the_lock(self, tmp_path):
+        """Test several threads hold the shared lock at the same time"""
+        lock = FileLock(tmp_path / "test.lock")
+        barrier = threading.Barrier(3, timeout=5)
+
+        def read():
+            with lock.shared():
+                barrier.wait()
+
+        threads = [threading.Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not barrier.broken
+        assert lock.stats["shared"].acquisitions == 3
+
+    def test_writer_excludes_other_lock_instances(self, tmp_path):
+        """Test a reader on another descriptor waits for the writer"""
+        writer_lock = FileLock(tmp_path / "test.lock")
+        reader_lock = FileLock(tmp_path / "test.lock")
+        events = []
+        writing = threading.Event()
+
+        def read():
+            writing.wait()
+            with reader_lock.shared():
+                events.append("read")
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        with writer_lock.exclusive():
+            writing.set()
+            time.sleep(0.05)
+            events.append("write")
+        reader.join()
+
+        assert events == ["write", "read"]
+        assert reader_lock.stats["shared"].max_wait_ms >= 40
+
+    def test_writers_are_serialized(self, tmp_path):
+        """Test exclusive holders never overlap"""
+        lock = FileLock(tmp_path / "test.lock")
+        active = []
+        overlaps = []
+
+        def write():
+            for _ in range(20):
+                with lock.exclusive():
+                    active.append(1)
+                    if len(active) > 1:
+                        overlaps.append(1)
+                    active.pop()
+
+        threads = [threading.Thread(target=write) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not overlaps
+        assert lock.stats["exclusive"].acquisitions == 80
+
+
+class TestAtomicCsvWrites:
+    """Tests for temp-file + rename CSV replacement"""
+
+    def test_rewrite_leaves_no_temp_files(self, tmp_path):
+        """Test exports replace the CSV and clean up the temporary file"""
+        repository = TargetRepository(str(tmp_path / "targets.csv"))
+        target = Target(str(uuid.uuid4()), 1.0, 2.0, 3.0, 2400.0, 10.0, 45.0, "10.0.0.1")
+        repository.create(target)
+        target.speed = 99.0
+        repository.update(target)
+        repository.snapshot()
+
+        assert not list(tmp_path.glob("*.tmp"))
+        assert "99.0" in (tmp_path / "targets.csv").read_text()
@@ -0,0 +1,209 @@
+"""
+Unit tests for geofences
+"""
+import random
+
+import pytest
+
+import src.main
+from src.api.controllers import geofences_controller, targets_controller
+from src.bl.geofence_service import GeofenceService
+from src.dal.geofence_index import _Fence
+from src.dal.geofence_repository import GeofenceRepository
+from src.dal.shared_counters import SharedCounters
+from src.dal.target_repository import TargetRepository
+from src.models.geofence import Geofence, GeofenceCreate
+from src.models.target import Target
+
+# Concave "U" open to the north
+U_SHAPE = [(10.0, 20.0), (10.0, 23.0), (13.0, 23.0), (13.0, 22.0), (11.0, 22.0), (11.0, 21.0),
+           (13.0, 21.0), (13.0, 20.0)]
+SQUARE = [(10.0, 20.0), (10.0, 21.0), (11.0, 21.0), (11.0, 20.0)]
+
+
+def _target(number, latitude, longitude):
+    return Target(f"t{number}", latitude, longitude, 100.0, 2400.0, 10.0, 45.0, "10.0.0.1")
+
+
+def _fence(fence_id, vertices):
+    return Geofence(fence_id, fence_id, vertices)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = TargetRepository(str(tmp_path / "targets.csv"))
+    yield repository
+    repository.close()
+
+
+class TestRayCasting:
+    """Tests for the scalar and batch containment tests"""
+
+    def test_batch_agrees_with_scalar(self):
+        """Test casting rays column-wise finds exactly the positions inside one by one"""
+        rng = random.Random(7)
+        for vertices in (U_SHAPE, SQUARE, [(10.0, 20.0), (14.0, 21.5), (10.5, 23.0)]):
+            fence = _Fence(_fence("f", vertices))
+            # Random positions, plus positions on the vertices and edges
+            positions = [(rng.uniform(9.5, 13.5), rng.uniform(19.5, 23.5)) for _ in range(3000)]
+            positions += vertices + [(10.0, 20.5), (11.0, 21.5), (12.0, 21.0), (10.5, 20.0)]
+            ids = [str(i) for i in range(len(positions))]
+            expected = {i for i, (lat, lon) in zip(ids, positions) if fence.contains(lat, lon)}
+            assert expected
+            assert fence.contained(ids, [p[0] for p in positions], [p[1] for p in positions]) == expected
+
+    def test_concave_polygon(self):
+        """Test the notch of a concave polygon is outside"""
+        fence = _Fence(_fence("f", U_SHAPE))
+        assert fence.contains(10.5, 21.5)
+        assert fence.contains(12.0, 20.5)
+        assert not fence.contains(12.0, 21.5)
+        assert not fence.contains(14.0, 20.5)
+
+
+class TestGeofenceIndex:
+    """Tests for memberships and events reported through the repository"""
+
+    def test_enter_and_exit(self, repository):
+        """Test creating, moving and deleting targets raises events of the fences crossed"""
+        repository.geofences.create(_fence("u", U_SHAPE))
+        repository.create(_target(1, 10.5, 20.5))
+        repository.update(_target(1, 12.0, 21.5))
+        repository.update(_target(1, 12.0, 22.5))
+        repository.delete("t1")
+        events = repository.get_geofence_events(0, 10)
+        assert [(e.sequence, e.kind, e.geofence_id, e.target_id) for e in events] == [
+            (1, "enter", "u", "t1"), (2, "exit", "u", "t1"), (3, "enter", "u", "t1"), (4, "exit", "u", "t1"),
+        ]
+
+    def test_memberships_follow_random_changes(self, repository):
+        """Test the targets inside each fence match a brute-force check after random changes"""
+        rng = random.Random(3)
+        repository.geofences.create(_fence("u", U_SHAPE))
+        repository.geofences.create(_fence("square", SQUARE))
+        targets = {n: _target(n, rng.uniform(9.0, 14.0), rng.uniform(19.0, 24.0)) for n in range(300)}
+        repository.put_many(list(targets.values()))
+        for step in range(300):
+            number = rng.randrange(350)
+            if number in targets and step % 4 == 0:
+                repository.delete(targets.pop(number).id)
+                continue
+            targets[number] = _target(number, rng.uniform(9.0, 14.0), rng.uniform(19.0, 24.0))
+            if repository.get_by_id(targets[number].id):
+                repository.update(targets[number])
+            else:
+                repository.create(targets[number])
+
+        for fence_id, vertices in (("u", U_SHAPE), ("square", SQUARE)):
+            fence = _Fence(_fence(fence_id, vertices))
+            expected = {t.id for t in targets.values() if fence.contains(t.latitude, t.longitude)}
+            assert {t.id for t in repository.get_geofence_targets(fence_id)} == expected
+
+    def test_fence_registered_after_targets(self, repository):
+        """Test a new fence holds the targets already inside it, in table order"""
+        repository.put_many([_target(1, 10.5, 20.5), _target(2, 50.0, 50.0), _target(3, 10.2, 20.1)])
+        repository.create(_target(4, 0.0, 0.0))
+        repository.geofences.create(_fence("square", SQUARE))
+        assert [t.id for t in repository.get_geofence_targets("square")] == ["t1", "t3"]
+        assert repository.get_geofence_events(0, 10) == []
+
+        repository.geofences.delete("square")
+        assert repository.get_geofence_targets("square") is None
+        repository.update(_target(2, 10.5, 20.5))
+        assert repository.get_geofence_events(0, 10) == []
+
+    def test_first_change_after_loading(self, tmp_path):
+        """Test the memberships built at the first change hold the position before it"""
+        csv_path = str(tmp_path / "targets.csv")
+        repository = TargetRepository(csv_path)
+        repository.geofences.create(_fence("square", SQUARE))
+        repository.put_many([_target(1, 10.5, 20.5), _target(2, 10.6, 20.6)])
+        logged = repository.get_geofence_events(0, 10)
+        repository.close()
+
+        repository = TargetRepository(csv_path)
+        assert repository.get_geofence_events(0, 10) == logged
+        repository.update(_target(1, 12.0, 20.5))
+        [event] = repository.get_geofence_events(logged[-1].sequence, 10)
+        assert (event.sequence, event.kind, event.target_id) == (3, "exit", "t1")
+        assert [t.id for t in repository.get_geofence_targets("square")] == ["t2"]
+        repository.close()
+
+    def test_fences_are_shared_between_repositories(self, tmp_path):
+        """Test a fence registered through one repository is evaluated by another on the same files"""
+        csv_path = str(tmp_path / "targets.csv")
+        counters = SharedCounters("sequence", "log_start")
+        geofences = GeofenceRepository(str(tmp_path / "geofences.json"))
+        writer = TargetRepository(csv_path, counters=counters, geofences=geofences)
+        reader = TargetRepository(csv_path, counters=counters, geofences=geofences)
+
+        writer.geofences.create(_fence("square", SQUARE))
+        writer.create(_target(1, 10.5, 20.5))
+        [event] = reader.get_geofence_events(0, 10)
+        assert (event.kind, event.geofence_id, event.target_id) == ("enter", "square", "t1")
+
+
+class TestGeofenceService:
+    """Tests for geofence validation"""
+
+    def test_invalid_polygons_are_rejected(self, repository):
+        """Test too few vertices, positions out of range and antimeridian spans raise ValueError"""
+        service = GeofenceService(repository)
+        for vertices in ([(10.0, 20.0), (11.0, 21.0)], [(10.0, 20.0), (95.0, 20.0), (10.0, 21.0)],
+                         [(0.0, -170.0), (0.0, 170.0), (5.0, 170.0)]):
+            with pytest.raises(ValueError):
+                service.create(GeofenceCreate("zone", vertices))
+        assert service.get_all() == []
+
+    def test_invalid_event_requests_are_rejected(self, repository):
+        """Test negative cursors and limits out of range raise ValueError"""
+        service = GeofenceService(repository)
+        with pytest.raises(ValueError):
+            service.get_events(after=-1)
+        with pytest.raises(ValueError):
+            service.get_events(limit=1001)
+
+
+class TestGeofenceEndpoints:
+    """Tests for the /api/v1/geofences endpoints"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        monkeypatch.setattr(geofences_controller, "_service", None)
+        return src.main.connexion_app.test_client()
+
+    def test_register_and_query(self, client):
+        """Test registering a fence, listing its targets and polling its events"""
+        targets_controller.get_service().repository.put_many([_target(1, 10.5, 20.5)])
+        body = {"name": "zone", "vertices": [{"latitude": lat, "longitude": lon} for lat, lon in SQUARE]}
+        response = client.post("/api/v1/geofences", json=body)
+        assert response.status_code == 201
+        fence = response.json()
+        assert fence["vertices"] == body["vertices"]
+
+        assert client.get("/api/v1/geofences").json() == [fence]
+        assert client.get(f"/api/v1/geofences/{fence['id']}").json() == fence
+        assert [t["id"] for t in client.get(f"/api/v1/geofences/{fence['id']}/targets").json()] == ["t1"]
+
+        targets_controller.get_service().repository.create(_target(2, 10.2, 20.2))
+        [event] = client.get("/api/v1/geofences/events").json()
+        assert (event["kind"], event["geofence_id"], event["target_id"]) == ("enter", fence["id"], "t2")
+
+        assert client.delete(f"/api/v1/geofences/{fence['id']}").status_code == 200
+        assert client.get(f"/api/v1/geofences/{fence['id']}").status_code == 404
+
+    def test_invalid_requests(self, client):
+        """Test unknown fences return 404 and invalid polygons 400"""
+        missing = "00000000-0000-4000-8000-000000000000"
+        assert client.get(f"/api/v1/geofences/{missing}/targets").status_code == 404
+        assert client.delete(f"/api/v1/geofences/{missing}").status_code == 404
+        vertices = [{"latitude": 0.0, "longitude": lon} for lon in (-170.0, 170.0)] + [
+            {"latitude": 5.0, "longitude": 170.0}
+        ]
+        response = client.post("/api/v1/geofences", json={"name": "zone", "vertices": vertices})
+        assert response.status_code == 400
+        assert client.post("/api/v1/geofences", json={"name": "zone", "vertices": vertices[:2]}).status_code == 400
@@ -0,0 +1,62 @@
+"""
+Unit tests for packed IP addresses in the storage layer
+"""
+import pytest
+
+from src.dal.ip_codec import IPV4_MAPPED, pack_ip, unpack_ip
+from src.dal.target_repository import TargetRepository
+from src.models.target import Target
+
+
+class TestIpCodec:
+    """Tests for packing and unpacking addresses"""
+
+    def test_ipv4_round_trip(self):
+        """Test IPv4 addresses map into ::ffff:0:0/96 and back"""
+        assert pack_ip("192.168.1.1") == IPV4_MAPPED | 0xC0A80101
+        for text in ("0.0.0.0", "10.0.0.1", "255.255.255.255"):
+            assert unpack_ip(pack_ip(text)) == text
+
+    def test_ipv6_round_trip(self):
+        """Test IPv6 addresses are kept as 128-bit integers"""
+        assert pack_ip("::1") == 1
+        assert unpack_ip(pack_ip("2001:0db8:0000::0001")) == "2001:db8::1"
+
+    def test_packed_order_matches_address_order(self):
+        """Test comparing packed values compares the addresses"""
+        addresses = ["9.255.255.255", "10.0.0.1", "10.0.0.10", "10.0.1.0", "192.168.0.1"]
+        assert sorted(addresses, key=pack_ip) == addresses
+
+    def test_invalid_addresses_are_rejected(self):
+        """Test malformed and out-of-range addresses raise ValueError"""
+        for text in ("256.1.1.1", "1.2.3", "010.0.0.1", "1.2.3.4 ", "invalid", ""):
+            with pytest.raises(ValueError):
+                pack_ip(text)
+        with pytest.raises(ValueError):
+            pack_ip(None)
+
+
+class TestRepositoryIpRange:
+    """Tests for IP range queries on the repository"""
+
+    def _target(self, target_id, ip_address):
+        return Target(target_id, 1.0, 2.0, 3.0, 2400.0, 10.0, 45.0, ip_address)
+
+    def test_get_by_ip_range(self, tmp_path):
+        """Test targets are found by an inclusive address range"""
+        repo = TargetRepository(str(tmp_path / "targets.csv"))
+        for number, ip_address in enumerate(["10.0.0.5", "10.0.0.20", "10.0.1.1", "fe80::1"]):
+            repo.create(self._target(f"t{number}", ip_address))
+
+        found = repo.get_by_ip_range("10.0.0.0", "10.0.0.255")
+        assert [t.ip_address for t in found] == ["10.0.0.5", "10.0.0.20"]
+        assert [t.id for t in repo.get_by_ip_range("fe80::", "fe80::ffff")] == ["t3"]
+        repo.close()
+
+    def test_invalid_ip_is_not_stored(self, tmp_path):
+        """Test a create with an invalid address fails before any write"""
+        repo = TargetRepository(str(tmp_path / "targets.csv"))
+        with pytest.raises(ValueError):
+            repo.create(self._target("bad", "999.1.1.1"))
+        assert repo.get_all() == []
+        repo.close()
@@ -0,0 +1,260 @@
+"""
+Unit tests for background jobs
+"""
+import io
+import os
+import threading
+import time
+
+import pytest
+
+import src.main
+from src.api.controllers import jobs_controller, targets_controller
+from src.bl import job_service as job_service_module
+from src.bl.history_service import HistoryService
+from src.bl.job_service import JobService, QueueFullError
+from src.bl.target_service import TargetService
+from src.dal.job_repository import JobRepository
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.target_repository import TargetRepository
+from src.models.job import Job
+from src.models.target import Target
+
+
+def _target(number):
+    return Target(f"t{number}", 1.0, 2.0, 3.0, 2400.0, 10.0, 45.0, f"10.0.0.{number % 250}")
+
+
+def _wait(service, job_id, timeout=10.0):
+    """Poll a job until it finishes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = service.get(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+@pytest.fixture
+def targets(tmp_path):
+    repository = TargetRepository(str(tmp_path / "targets.csv"))
+    repository.put_many([_target(n) for n in range(10)])
+    yield TargetService(repository, HistoryService(PositionHistoryRepository(str(tmp_path / "history"))))
+    repository.close()
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return JobRepository(str(tmp_path / "jobs"))
+
+
+@pytest.fixture
+def service(targets, repository):
+    return JobService(targets, repository, workers=1, queue_size=1)
+
+
+class TestJobRepository:
+    """Tests for persisted job state"""
+
+    def test_update_with_expect_is_compare_and_set(self, repository):
+        """Test a change applies only while the stored job is in the expected state"""
+        repository.create(Job(id="3a1f6c2e-9b7d-4e5f-8a2b-1c3d4e5f6a7b", kind="snapshot", created_at=1.0))
+        job_id = "3a1f6c2e-9b7d-4e5f-8a2b-1c3d4e5f6a7b"
+
+        assert repository.update(job_id, expect={"status": "queued"}, status="running").status == "running"
+        assert repository.update(job_id, expect={"status": "queued"}, status="cancelled") is None
+        assert repository.get(job_id).status == "running"
+
+    def test_jobs_are_kept_next_to_the_target_csv(self, targets, tmp_path):
+        """Test the default repository is on the data directory of the targets"""
+        assert JobService(targets).repository.jobs_dir == tmp_path / "jobs"
+
+    def test_non_uuid_ids_are_not_found(self, repository):
+        """Test ids that are not canonical UUIDs never name a file"""
+        assert repository.get("../targets") is None
+        assert repository.update("jobs", status="failed") is None
+
+
+class TestJobService:
+    """Tests for running jobs"""
+
+    def test_export_job_writes_result_file(self, service):
+        """Test an export job succeeds and leaves the exported file"""
+        job = _wait(service, service.submit("export", {"media_type": "text/csv"}).id)
+
+        assert job.status == "succeeded"
+        assert job.progress == 1.0
+        assert job.result["lines"] == 11
+        assert service.result_path(job).read_text().count("\n") == 11
+
+    def test_import_job_reports_rows(self, service, targets):
+        """Test an import job stores the rows and returns the import report"""
+        upload = io.BytesIO(b"id,latitude,longitude,altitude,frequency,speed,bearing,ip_address\n"
+                            b"new,1,2,3,2400,10,45,10.0.0.1\n"
+                            b"bad,x,2,3,2400,10,45,10.0.0.1\n")
+        job = _wait(service, service.submit("import", {"media_type": "text/csv"}, upload).id)
+
+        assert job.status == "succeeded"
+        assert (job.result["imported"], job.result["rejected"]) == (1, 1)
+        assert targets.get_by_id("new") is not None
+        # The upload is removed once the job has run
+        assert not service.repository.file_path(job.id, ".upload").exists()
+
+    def test_invalid_jobs_are_rejected(self, service):
+        """Test unknown kinds, media types and misplaced uploads raise ValueError"""
+        with pytest.raises(ValueError):
+            service.submit("compact")
+        with pytest.raises(ValueError):
+            service.submit("export", {"media_type": "application/json"})
+        with pytest.raises(ValueError):
+            service.submit("import", {"media_type": "text/csv"})
+
+    def test_cancel_queued_job_and_queue_limit(self, service, monkeypatch):
+        """Test a queued job is cancelled at once and a full queue refuses jobs"""
+        release = threading.Event()
+        monkeypatch.setattr(JobService, "_run_snapshot", lambda self, job, context: release.wait(10) and {})
+
+        running = service.submit("snapshot")
+        queued = service.submit("snapshot")
+        with pytest.raises(QueueFullError):
+            service.submit("snapshot")
+
+        assert service.cancel(queued.id).status == "cancelled"
+        release.set()
+        assert _wait(service, running.id).status == "succeeded"
+        assert service.get(queued.id).status == "cancelled"
+
+    def test_concurrent_submits_store_only_accepted_jobs(self, service, repository, monkeypatch):
+        """Test submits racing for the last slots store neither a job nor an upload when refused"""
+        release = threading.Event()
+        monkeypatch.setattr(JobService, "_run_import", lambda self, job, context: release.wait(10) and {})
+        create = repository.create
+
+        def slow_create(job):
+            time.sleep(0.05)
+            create(job)
+
+        monkeypatch.setattr(repository, "create", slow_create)
+        service.start()
+        start = threading.Barrier(6)
+        accepted, refused = [], []
+
+        def submit():
+            start.wait(10)
+            try:
+                accepted.append(service.submit("import", {"media_type": "text/csv"}, io.BytesIO(b"id\n")))
+            except QueueFullError:
+                refused.append(True)
+
+        threads = [threading.Thread(target=submit) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        assert (len(accepted), len(refused)) == (2, 4)
+        assert sorted(job.id for job in repository.get_all()) == sorted(job.id for job in accepted)
+        uploads = {path.name for path in repository.jobs_dir.glob("*.upload")}
+        assert uploads <= {f"{job.id}.upload" for job in accepted}
+        release.set()
+        for job in accepted:
+            assert _wait(service, job.id).status == "succeeded"
+
+    def test_cancel_running_job(self, service, monkeypatch):
+        """Test a running job stops at its next progress report"""
+        monkeypatch.setattr(job_service_module, "PROGRESS_INTERVAL", 0.0)
+        started = threading.Event()
+
+        def run_snapshot(self, job, context):
+            started.set()
+            while True:
+                context.report(0.5)
+                time.sleep(0.01)
+
+        monkeypatch.setattr(JobService, "_run_snapshot", run_snapshot)
+        job = service.submit("snapshot")
+        assert started.wait(10)
+        service.cancel(job.id)
+        assert _wait(service, job.id).status == "cancelled"
+
+    def test_orphaned_jobs_are_taken_over(self, targets, repository):
+        """Test jobs of a dead process are resumed if queued and failed if running"""
+        dead_pid = 2 ** 22 + 1
+        while job_service_module._pid_alive(dead_pid):
+            dead_pid += 1
+        queued = Job(id="00000000-0000-4000-8000-000000000001", kind="snapshot",
+                     owner_pid=dead_pid, created_at=1.0)
+        running = Job(id="00000000-0000-4000-8000-000000000002", kind="snapshot", status="running",
+                      owner_pid=dead_pid, created_at=2.0)
+        repository.create(queued)
+        repository.create(running)
+
+        service = JobService(targets, repository, workers=1)
+        service.start()
+
+        assert _wait(service, queued.id).status == "succeeded"
+        assert repository.get(queued.id).owner_pid == os.getpid()
+        failed = repository.get(running.id)
+        assert (failed.status, failed.error) == ("failed", "Interrupted by a restart")
+
+
+class TestJobEndpoints:
+    """Tests for /api/v1/jobs"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        monkeypatch.setattr(jobs_controller, "_service", None)
+        client = src.main.connexion_app.test_client()
+        targets_controller.get_service().repository.put_many([_target(n) for n in range(3)])
+        return client
+
+    def test_export_job_round_trip(self, client):
+        """Test submitting, polling and downloading an export job"""
+        response = client.post("/api/v1/jobs", json={"kind": "export", "media_type": "application/x-ndjson"})
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+
+        _wait(jobs_controller.get_service(), job_id)
+        response = client.get(f"/api/v1/jobs/{job_id}")
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["finished_at"] is not None
+
+        response = client.get(f"/api/v1/jobs/{job_id}/result")
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == 3
+
+    def test_import_job_upload(self, client):
+        """Test an uploaded file is imported in the background"""
+        response = client.post(
+            "/api/v1/jobs/import",
+            content=b'{"id": "n1", "latitude": 1, "longitude": 2, "altitude": 3, "frequency": 2400,'
+                    b' "speed": 10, "bearing": 45, "ip_address": "10.0.0.9"}\n',
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 202
+        job = _wait(jobs_controller.get_service(), response.json()["id"])
+        assert job.result["imported"] == 1
+
+    def test_unknown_job_and_missing_result(self, client):
+        """Test unknown jobs return 404, and so does the result of a non-export job"""
+        assert client.get("/api/v1/jobs/00000000-0000-4000-8000-000000000000").status_code == 404
+        assert client.delete("/api/v1/jobs/00000000-0000-4000-8000-000000000000").status_code == 404
+
+        job_id = client.post("/api/v1/jobs", json={"kind": "snapshot"}).json()["id"]
+        _wait(jobs_controller.get_service(), job_id)
+        assert client.get(f"/api/v1/jobs/{job_id}/result").status_code == 404
+        assert [job["id"] for job in client.get("/api/v1/jobs").json()] == [job_id]
+
+    def test_full_queue_returns_429(self, client, monkeypatch):
+        """Test submissions beyond the queue limit are refused"""
+        def check_capacity(self):
+            raise QueueFullError("2 jobs are pending, try again later")
+
+        monkeypatch.setattr(JobService, "_check_capacity", check_capacity)
+        response = client.post("/api/v1/jobs", json={"kind": "snapshot"})
+        assert response.status_code == 429
@@ -0,0 +1,41 @@
+"""
+Unit tests for the load-testing harness
+"""
+import json
+
+import pytest
+
+import src.main
+from benchmarks import load_test
+from src.api.controllers import history_controller, targets_controller
+
+
+class TestLoadTest:
+    """Tests for traffic mixes and in-process load runs"""
+
+    def test_parse_mix(self):
+        """Test endpoint weights are parsed and unknown endpoints rejected"""
+        assert load_test.parse_mix("get=3,delete=1") == {"get": 3.0, "delete": 1.0}
+        with pytest.raises(ValueError):
+            load_test.parse_mix("get=1,patch=1")
+        with pytest.raises(ValueError):
+            load_test.parse_mix("get=0")
+
+    def test_in_process_run_reports_every_endpoint(self, tmp_path, monkeypatch):
+        """Test a short in-process run exercises all endpoints without errors"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        monkeypatch.setattr(history_controller, "_service", None)
+        output = tmp_path / "load.json"
+
+        assert load_test.main([
+            "--duration", "1", "--concurrency", "2", "--targets", "20",
+            "--mix", "list=1,get=1,create=1,update=1,delete=1", "--output", str(output),
+        ]) == 0
+
+        results = {r["endpoint"]: r for r in json.loads(output.read_text())["results"]}
+        assert set(results) == {"list", "get", "create", "update", "delete", "total"}
+        assert results["total"]["requests"] > 0
+        assert results["total"]["errors"] == 0
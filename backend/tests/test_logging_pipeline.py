@@ -0,0 +1,64 @@
+"""
+Unit tests for the queued logging pipeline
+"""
+import contextvars
+import logging
+import threading
+
+import pytest
+
+from src.logging_pipeline import install_pipeline, sample_request
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+        self.threads.add(threading.get_ident())
+
+
+@pytest.fixture
+def pipeline_logger(request):
+    logger = logging.getLogger(f"test.pipeline.{request.node.name}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = _Collect()
+    pipeline = install_pipeline([handler], logger)
+    yield logger, handler, pipeline
+    pipeline.stop()
+
+
+class TestLogPipeline:
+    """Tests for background writing and request sampling"""
+
+    def test_records_are_written_by_background_thread(self, pipeline_logger):
+        """Test records are formatted and written off the logging thread"""
+        logger, handler, pipeline = pipeline_logger
+        for i in range(3):
+            logger.info("message %s of %d", i, 3)
+        pipeline.stop()
+
+        assert handler.messages == ["message 0 of 3", "message 1 of 3", "message 2 of 3"]
+        assert threading.get_ident() not in handler.threads
+
+    def test_unsampled_request_keeps_only_warnings(self, pipeline_logger):
+        """Test a request not picked by sampling drops INFO but keeps WARNING"""
+        logger, handler, pipeline = pipeline_logger
+
+        def request(rate, name):
+            sample_request(rate)
+            logger.info("%s info", name)
+            logger.warning("%s warning", name)
+
+        contextvars.copy_context().run(request, 0.0, "dropped")
+        contextvars.copy_context().run(request, 1.0, "kept")
+        logger.info("outside request")
+        pipeline.stop()
+
+        assert handler.messages == [
+            "dropped warning", "kept info", "kept warning", "outside request"
+        ]
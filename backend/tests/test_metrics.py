@@ -0,0 +1,108 @@
+"""
+Unit tests for the metrics registry and the /metrics endpoint
+"""
+import json
+import threading
+
+import src.main
+from src.metrics import Counter, Gauge, Histogram, Registry, count_rows, start_row_count
+
+
+def _registry():
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests", ("route",)))
+    latency = registry.register(Histogram("latency_seconds", "Latency", (), buckets=(0.1, 1.0)))
+    size = registry.register(Gauge("size", "Size"))
+    return registry, requests, latency, size
+
+
+class TestRegistry:
+    """Tests for recording and rendering metrics"""
+
+    def test_renders_prometheus_text(self, monkeypatch):
+        """Test counters, gauges and cumulative histogram buckets are rendered"""
+        monkeypatch.delenv("METRICS_DIR", raising=False)
+        registry, requests, latency, size = _registry()
+        requests.labels("/a").inc()
+        requests.labels("/a").inc(2)
+        latency.labels().observe(0.05)
+        latency.labels().observe(0.5)
+        latency.labels().observe(5.0)
+        size.labels().set(7)
+
+        lines = registry.render().splitlines()
+        assert "# TYPE requests_total counter" in lines
+        assert 'requests_total{route="/a"} 3' in lines
+        assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{le="1"} 2' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+        assert "latency_seconds_sum 5.55" in lines
+        assert "latency_seconds_count 3" in lines
+        assert "size 7" in lines
+
+    def test_thread_shards_are_summed(self, monkeypatch):
+        """Test increments from many threads are all counted"""
+        monkeypatch.delenv("METRICS_DIR", raising=False)
+        registry, requests, _, _ = _registry()
+        child = requests.labels("/a")
+
+        def work():
+            for _ in range(1000):
+                child.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert 'requests_total{route="/a"} 4000' in registry.render().splitlines()
+
+    def test_other_workers_are_merged(self, tmp_path, monkeypatch):
+        """Test counters flushed by other workers are added, gauges are not"""
+        monkeypatch.setenv("METRICS_DIR", str(tmp_path))
+        registry, requests, _, size = _registry()
+        requests.labels("/a").inc()
+        size.labels().set(1)
+        other = {
+            "requests_total": {json.dumps(["/a"]): [2.0], json.dumps(["/b"]): [5.0]},
+            "size": {json.dumps([]): [100.0]},
+        }
+        (tmp_path / "worker-1.json").write_text(json.dumps(other))
+        registry.flush()
+
+        lines = registry.render().splitlines()
+        assert 'requests_total{route="/a"} 3' in lines
+        assert 'requests_total{route="/b"} 5' in lines
+        assert "size 1" in lines
+
+    def test_rows_are_counted_per_context(self):
+        """Test rows are only counted once a request started counting"""
+        count_rows(10)
+        rows = start_row_count()
+        count_rows(3)
+        count_rows(4)
+        assert rows[0] == 7
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /metrics"""
+
+    def test_reports_request_metrics(self, tmp_path, monkeypatch):
+        """Test requests are reported by operationId, including rejected ones"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.delenv("METRICS_DIR", raising=False)
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        client = src.main.connexion_app.test_client()
+
+        assert client.get("/api/v1/targets").status_code == 200
+        assert client.post("/api/v1/targets", json={}).status_code == 400
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'operation="get_all_targets",method="GET",status="200"' in text
+        assert 'operation="create_target",method="POST",status="400"' in text
+        assert 'repository_operation_duration_seconds_count{repository="targets",operation="get_all"}' in text
+        assert 'store_size{store="targets"}' in text
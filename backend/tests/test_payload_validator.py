@@ -0,0 +1,100 @@
+"""
+Unit tests for the compiled payload validators
+"""
+import pytest
+
+import src.main
+from src.api.controllers import targets_controller
+from src.api.payload_validator import (
+    CompiledValidator,
+    UnsupportedSchemaError,
+    load_validators,
+)
+
+
+@pytest.fixture
+def validators():
+    return load_validators()
+
+
+@pytest.fixture
+def payload():
+    return {
+        "latitude": 32.0853,
+        "longitude": 34.7818,
+        "altitude": 150.5,
+        "frequency": 2.4,
+        "speed": 25.0,
+        "bearing": 180.0,
+        "ip_address": "192.168.1.1",
+    }
+
+
+class TestCompiledValidator:
+    """Tests for validators compiled from models.yaml"""
+
+    def test_valid_payload_has_no_errors(self, validators, payload):
+        """Test a valid create payload passes"""
+        assert validators["TargetCreateDTO"].errors(payload) == []
+
+    def test_reports_every_invalid_field(self, validators, payload):
+        """Test all violated constraints are reported in one pass"""
+        payload.update(latitude=100, frequency=0, ip_address="invalid")
+        del payload["speed"]
+        errors = validators["TargetCreateDTO"].errors(payload)
+        assert len(errors) == 4
+        assert "100 is greater than the maximum of 90 - 'latitude'" in errors
+        assert "0 is less than or equal to the minimum of 0 - 'frequency'" in errors
+        assert "'speed' is a required property" in errors
+        assert any(e.endswith("- 'ip_address'") for e in errors)
+
+    def test_rejects_wrong_types(self, validators):
+        """Test booleans and strings are not accepted as numbers"""
+        update = validators["TargetUpdateDTO"]
+        assert update.errors({"latitude": True}) == ["True is not of type 'number' - 'latitude'"]
+        assert update.errors({"speed": "5"}) == ["'5' is not of type 'number' - 'speed'"]
+        assert update.errors([]) == ["[] is not of type 'object'"]
+        assert update.errors({}) == []
+
+    def test_batch_returns_invalid_indexes(self, validators, payload):
+        """Test a batch reports errors by payload index"""
+        batch = [payload, dict(payload, bearing=400), payload, {}]
+        errors = validators["TargetCreateDTO"].errors_batch(batch)
+        assert sorted(errors) == [1, 3]
+        assert len(errors[3]) == 7
+
+    def test_unsupported_schema_is_not_compiled(self):
+        """Test schemas with nested objects are left to jsonschema"""
+        schema = {"type": "object", "properties": {"items": {"type": "array"}}}
+        with pytest.raises(UnsupportedSchemaError):
+            CompiledValidator("Nested", schema)
+        assert "TrajectoryDTO" not in load_validators()
+
+
+class TestRequestValidation:
+    """Tests for request bodies validated by the API"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        return src.main.connexion_app.test_client()
+
+    def test_invalid_create_is_rejected(self, client, payload):
+        """Test an invalid body is rejected with the compiled validator's message"""
+        response = client.post("/api/v1/targets", json=dict(payload, bearing=-1))
+        assert response.status_code == 400
+        assert response.json()["detail"] == "-1 is less than the minimum of 0 - 'bearing'"
+
+    def test_valid_create_and_update(self, client, payload):
+        """Test valid bodies reach the controller"""
+        created = client.post("/api/v1/targets", json=payload)
+        assert created.status_code == 201
+        target_id = created.json()["id"]
+
+        response = client.put(f"/api/v1/targets/{target_id}", json={"speed": 3.5})
+        assert response.status_code == 200
+        assert response.json()["speed"] == 3.5
+        assert client.put(f"/api/v1/targets/{target_id}", json={"speed": -1}).status_code == 400
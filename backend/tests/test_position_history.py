@@ -0,0 +1,93 @@
+"""
+Unit tests for the append-only position history store
+"""
+import pytest
+
+from src.models.position import PositionRecord
+from src.models.target import TargetCreate
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.target_repository import TargetRepository
+from src.bl.target_service import TargetService
+
+
+def _record(target_id, ts, lat=1.0):
+    return PositionRecord(target_id=target_id, timestamp=ts, latitude=lat, longitude=2.0, altitude=3.0)
+
+
+@pytest.fixture
+def history(tmp_path):
+    """Create a history repository with tiny segments and a dense index."""
+    repo = PositionHistoryRepository(str(tmp_path), segment_max_records=10, index_interval=3)
+    yield repo
+    repo.close()
+
+
+class TestPositionHistoryRepository:
+    """Tests for segment rollover, sparse index and window queries"""
+
+    def test_segments_roll_over(self, history, tmp_path):
+        """Test a new segment is opened once the active one is full"""
+        for i in range(25):
+            history.append(_record("a", 1000.0 + i))
+        assert len(list(tmp_path.glob("segment-*.csv"))) == 3
+        assert len(list(tmp_path.glob("segment-*.idx"))) == 3
+
+    def test_window_query_returns_only_records_in_range(self, history):
+        """Test window bounds are inclusive and span segments"""
+        for i in range(25):
+            history.append(_record("a" if i % 2 else "b", 1000.0 + i))
+        records = history.get_window(1004.0, 1016.0)
+        assert [r.timestamp for r in records] == [1000.0 + i for i in range(4, 17)]
+
+    def test_track_filters_by_target(self, history):
+        """Test a track only contains positions of the requested target"""
+        for i in range(25):
+            history.append(_record("a" if i % 2 else "b", 1000.0 + i, lat=float(i)))
+        track = history.get_track("a", 0.0, 2000.0)
+        assert all(r.target_id == "a" for r in track)
+        assert [r.latitude for r in track] == [float(i) for i in range(1, 25, 2)]
+
+    def test_query_reads_only_overlapping_segments(self, history):
+        """Test segments outside the window are not opened"""
+        for i in range(25):
+            history.append(_record("a", 1000.0 + i))
+        assert len(history._overlapping_segments(1021.0, 1022.0)) == 1
+        assert len(history._overlapping_segments(1000.0, 1024.0)) == 3
+
+    def test_out_of_order_timestamp_is_clamped(self, history):
+        """Test timestamps never go backwards"""
+        history.append(_record("a", 1000.0))
+        stored = history.append(_record("a", 999.0))
+        assert stored.timestamp == 1000.0
+
+    def test_reopen_recovers_state(self, tmp_path):
+        """Test appends continue in the right segment after a restart"""
+        repo = PositionHistoryRepository(str(tmp_path), segment_max_records=10, index_interval=3)
+        for i in range(14):
+            repo.append(_record("a", 1000.0 + i))
+        repo.close()
+
+        reopened = PositionHistoryRepository(str(tmp_path), segment_max_records=10, index_interval=3)
+        for i in range(14, 20):
+            reopened.append(_record("a", 1000.0 + i))
+        reopened.close()
+
+        assert len(list(tmp_path.glob("segment-*.csv"))) == 2
+        records = reopened.get_window(0.0, 2000.0)
+        assert [r.timestamp for r in records] == [1000.0 + i for i in range(20)]
+
+
+class TestHistoryLocation:
+    """Tests for where the target service keeps position history"""
+
+    def test_history_is_next_to_the_target_csv(self, tmp_path):
+        """Test services on different data directories do not share a history"""
+        services = [TargetService(TargetRepository(str(tmp_path / name / "targets.csv"))) for name in ("a", "b")]
+        services[0].create(TargetCreate(1.0, 2.0, 3.0, 2.4, 0.0, 0.0, "10.0.0.1"))
+
+        assert services[0].history.repository.history_dir == tmp_path / "a" / "history"
+        assert len(services[0].history.get_window(0.0, 1e12)) == 1
+        assert services[1].history.get_window(0.0, 1e12) == []
+        for service in services:
+            service.repository.close()
+            service.history.repository.close()
@@ -0,0 +1,85 @@
+"""
+Unit tests for on-demand request profiling
+"""
+import pstats
+import time
+
+import pytest
+
+import src.main
+from src.api.profiling import RequestProfiling
+
+
+def _busy_work():
+    deadline = time.perf_counter() + 0.03
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+class TestRequestProfiling:
+    """Tests for selecting requests and writing profiles"""
+
+    def test_disabled_without_env(self, monkeypatch):
+        """Test profiling is off unless PROFILE_REQUESTS is set"""
+        monkeypatch.delenv("PROFILE_REQUESTS", raising=False)
+        assert RequestProfiling.from_env() is None
+
+    def test_header_or_sample_rate_selects_requests(self, tmp_path):
+        """Test the X-Profile header always profiles, sampling only when configured"""
+        never = RequestProfiling(tmp_path, sample_rate=0.0)
+        always = RequestProfiling(tmp_path, sample_rate=1.0)
+
+        assert never.should_profile({"X-Profile": "true"})
+        assert not never.should_profile({})
+        assert always.should_profile({})
+
+    def test_writes_pstats(self, tmp_path):
+        """Test a cProfile profile is written and readable by pstats"""
+        profiling = RequestProfiling(tmp_path)
+        profile = profiling.start()
+        _busy_work()
+        path = profiling.finish(profile, "GET-/api/v1/targets-../../etc")
+
+        assert path.parent == tmp_path
+        assert path.suffix == ".pstats"
+        assert "/" not in path.name.replace(".pstats", "")
+        stats = pstats.Stats(str(path))
+        assert any(func[2] == "_busy_work" for func in stats.stats)
+
+    def test_writes_collapsed_stacks(self, tmp_path):
+        """Test sampled stacks are written in the collapsed flamegraph format"""
+        profiling = RequestProfiling(tmp_path, output_format="collapsed")
+        profile = profiling.start()
+        _busy_work()
+        path = profiling.finish(profile, "request")
+
+        lines = path.read_text().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert any("_busy_work" in line for line in lines)
+
+    def test_rejects_unknown_format(self, tmp_path):
+        """Test an unsupported output format fails at startup"""
+        with pytest.raises(ValueError):
+            RequestProfiling(tmp_path, output_format="svg")
+
+
+class TestProfiledRequests:
+    """Tests for profiling through the request middleware"""
+
+    def test_profile_header_writes_profile(self, tmp_path, monkeypatch):
+        """Test a request with X-Profile gets a profile file, others do not"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setenv("PROFILE_REQUESTS", "true")
+        monkeypatch.setenv("PROFILE_DIR", str(tmp_path / "profiles"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        client = src.main.connexion_app.test_client()
+
+        assert "x-profile-file" not in client.get("/api/v1/targets").headers
+        response = client.get("/api/v1/targets", headers={"X-Profile": "1"})
+
+        assert response.status_code == 200
+        name = response.headers["x-profile-file"]
+        assert (tmp_path / "profiles" / name).exists()
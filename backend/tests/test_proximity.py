@@ -0,0 +1,270 @@
+"""
+Unit tests for proximity alerts
+"""
+import math
+import random
+import threading
+from itertools import combinations
+
+import pytest
+
+import src.main
+from src.api.controllers import targets_controller
+from src.bl.target_service import TargetService
+from src.bl.history_service import HistoryService
+from src.dal.converters.entity_converter import plain_to_row
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.proximity_index import EARTH_RADIUS_M, ProximityIndex
+from src.dal.shared_counters import SharedCounters
+from src.dal.target_repository import TargetRepository
+from src.dal.target_table import TargetTable
+from src.models.target import Target, TargetCreate, TargetUpdate
+
+
+def _target(number, latitude, longitude):
+    return Target(f"t{number}", latitude, longitude, 100.0, 2400.0, 10.0, 45.0, "10.0.0.1")
+
+
+def _meters(a, b):
+    """Haversine distance between two targets."""
+    lat1, lat2 = math.radians(a.latitude), math.radians(b.latitude)
+    dlat, dlon = lat2 - lat1, math.radians(b.longitude - a.longitude)
+    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(h))
+
+
+def _close_pairs(targets, distance=500.0):
+    """Pairs of targets within a distance the slow way."""
+    return {
+        frozenset((a.id, b.id)) for a, b in combinations(targets, 2) if _meters(a, b) <= distance
+    }
+
+
+def _replay(events):
+    """Build the set of close pairs from enter and exit events."""
+    pairs = set()
+    for event in events:
+        pair = frozenset((event.target_id, event.other_id))
+        if event.kind == "enter":
+            assert pair not in pairs
+            pairs.add(pair)
+        else:
+            pairs.remove(pair)
+    return pairs
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = TargetRepository(str(tmp_path / "targets.csv"), proximity_distance=500.0)
+    yield repository
+    repository.close()
+
+
+class TestProximityIndex:
+    """Tests for events reported through the repository"""
+
+    def test_events_follow_close_pairs(self, repository):
+        """Test events of random changes describe exactly the pairs within the distance"""
+        rng = random.Random(4)
+        targets = {
+            n: _target(n, 32.0 + rng.uniform(0, 0.03), 34.8 + rng.uniform(0, 0.03)) for n in range(150)
+        }
+        repository.put_many(list(targets.values()))
+        assert _replay(repository.get_proximity_events(0, 10_000)) == _close_pairs(targets.values())
+
+        for step in range(300):
+            number = rng.randrange(200)
+            if number in targets and step % 5 == 0:
+                repository.delete(targets.pop(number).id)
+            else:
+                target = _target(number, 32.0 + rng.uniform(0, 0.03), 34.8 + rng.uniform(0, 0.03))
+                if number in targets:
+                    repository.update(target)
+                else:
+                    repository.create(target)
+                targets[number] = target
+
+        events = repository.get_proximity_events(0, 10_000)
+        assert [e.sequence for e in events] == list(range(1, len(events) + 1))
+        assert _replay(events) == _close_pairs(targets.values())
+
+    def test_enter_and_exit(self, repository):
+        """Test moving targets together and apart reports both targets with their distance"""
+        first, second = _target(1, 10.0, 20.0), _target(2, 10.0, 20.01)
+        repository.create(first)
+        repository.create(second)
+        assert repository.get_proximity_events(0, 10) == []
+
+        second.longitude = 20.003
+        repository.update(second)
+        [enter] = repository.get_proximity_events(0, 10)
+        assert (enter.kind, enter.target_id, enter.other_id) == ("enter", "t2", "t1")
+        assert enter.distance == pytest.approx(_meters(first, second), rel=1e-6)
+
+        repository.delete("t1")
+        [exit_] = repository.get_proximity_events(enter.sequence, 10)
+        assert (exit_.sequence, exit_.kind, exit_.target_id, exit_.other_id) == (2, "exit", "t1", "t2")
+
+    def test_unmoved_targets_raise_no_events(self, repository):
+        """Test changes that keep the position are not evaluated again"""
+        first, second = _target(1, 10.0, 20.0), _target(2, 10.0, 20.001)
+        repository.put_many([first, second])
+        second.frequency = 5800.0
+        repository.update(second)
+        repository.create(_target(3, 10.0, 20.002))
+        assert [(e.kind, e.target_id) for e in repository.get_proximity_events(0, 10)] == [
+            ("enter", "t2"), ("enter", "t3"), ("enter", "t3"),
+        ]
+
+    def test_first_change_after_loading(self, tmp_path):
+        """Test the hash is built in the background and holds the loaded positions"""
+        csv_path = str(tmp_path / "targets.csv")
+        repository = TargetRepository(csv_path)
+        repository.put_many([_target(1, 10.0, 20.0), _target(2, 10.0, 20.001)])
+        repository.close()
+
+        repository = TargetRepository(csv_path)
+        repository.update(_target(2, 10.0, 20.1))
+        assert sorted(sum(repository._proximity._cubes.values(), [])) == ["t1", "t2"]
+        [event] = repository.get_proximity_events(1, 10)
+        assert (event.sequence, event.kind, event.target_id, event.other_id) == (2, "exit", "t2", "t1")
+        repository.close()
+
+    def test_changes_during_the_build_are_queued(self, monkeypatch):
+        """Test changes applied while the hash is built are filed when it is taken over"""
+        index = ProximityIndex(distance=500.0)
+        table = TargetTable.from_rows(plain_to_row(_target(n, 10.0, 20.0 + n)) for n in range(3))
+        building, resume = threading.Event(), threading.Event()
+        file = ProximityIndex._file
+
+        def paused_file(self, *args):
+            building.set()
+            resume.wait(timeout=5)
+            return file(self, *args)
+
+        monkeypatch.setattr(ProximityIndex, "_file", paused_file)
+        index.reset(table)
+        table.listeners.append(index)
+        assert building.wait(timeout=5)
+        table.put(plain_to_row(_target(0, 10.0, 25.0)))
+        table.remove("t1")
+        table.put(plain_to_row(_target(3, 10.0, 25.001)))
+        assert index._cubes is None and len(index._pending) == 3
+
+        resume.set()
+        index.reporting = True
+        table.put(plain_to_row(_target(4, 10.0, 25.002)))
+        assert sorted(sum(index._cubes.values(), [])) == ["t0", "t2", "t3", "t4"]
+        assert [(e.kind, e.other_id) for e in index.events] == [("enter", "t0"), ("enter", "t3")]
+
+    def test_build_lost_by_forking_is_redone(self):
+        """Test a child process without the build thread builds the hash itself"""
+        index = ProximityIndex(distance=500.0)
+        index.reset(TargetTable.from_rows([plain_to_row(_target(1, 10.0, 20.0))]))
+        index.wait_until_built()
+        index._built.clear()
+        index.reporting = True
+        index.put(None, plain_to_row(_target(2, 10.0, 20.001)))
+        assert [(e.kind, e.target_id) for e in index.events] == [("enter", "t2")]
+
+    @pytest.mark.parametrize("first, second", [
+        ((0.0, 179.999), (0.0, -179.999)),
+        ((89.999, 0.0), (89.999, 180.0)),
+    ])
+    def test_antimeridian_and_poles(self, repository, first, second):
+        """Test targets close across the antimeridian or the pole are found"""
+        repository.create(_target(1, *first))
+        repository.create(_target(2, *second))
+        [event] = repository.get_proximity_events(0, 10)
+        assert event.distance == pytest.approx(222.4, abs=0.1)
+
+    def test_events_are_shared_between_repositories(self, tmp_path):
+        """Test every repository on the same files returns the writer's events unchanged"""
+        csv_path = str(tmp_path / "targets.csv")
+        counters = SharedCounters("sequence", "log_start")
+        first = TargetRepository(csv_path, counters=counters)
+        second = TargetRepository(csv_path, counters=counters)
+
+        first.create(_target(1, 10.0, 20.0))
+        second.create(_target(2, 10.0, 20.001))
+        first.update(_target(1, 10.0, 20.002))
+        first.delete("t2")
+
+        events = first.get_proximity_events(0, 10)
+        assert [(e.sequence, e.kind, e.target_id) for e in events] == [(1, "enter", "t2"), (2, "exit", "t2")]
+        assert second.get_proximity_events(0, 10) == events
+        first.close()
+        second.close()
+
+    def test_worker_reloading_a_snapshot_rebuilds_the_hash(self, tmp_path):
+        """Test a worker that reloaded the table after a log gap reports later changes"""
+        csv_path = str(tmp_path / "targets.csv")
+        counters = SharedCounters("sequence", "log_start")
+        writer = TargetRepository(csv_path, snapshot_interval=2, counters=counters)
+        reader = TargetRepository(csv_path, snapshot_interval=2, counters=counters)
+
+        for number in range(4):
+            writer.create(_target(number, 10.0, 20.0 + number))
+        writer.snapshot()
+        writer.create(_target(4, 10.0, 30.0))
+        assert reader.get_proximity_events(0, 10) == []
+
+        writer.create(_target(9, 10.0, 20.001))
+        [event] = reader.get_proximity_events(0, 10)
+        assert (event.target_id, event.other_id) == ("t9", "t0")
+
+    def test_distance_must_be_positive(self):
+        """Test a zero alert distance is rejected"""
+        with pytest.raises(ValueError):
+            ProximityIndex(distance=0.0)
+
+
+class TestProximityService:
+    """Tests for proximity events of service writes"""
+
+    def test_service_writes_raise_events(self, repository, tmp_path):
+        """Test creates and updates through the service raise events"""
+        service = TargetService(repository, HistoryService(PositionHistoryRepository(str(tmp_path / "history"))))
+        first = service.create(TargetCreate(10.0, 20.0, 0.0, 2400.0, 0.0, 0.0, "10.0.0.1"))
+        second = service.create(TargetCreate(10.0, 20.1, 0.0, 2400.0, 0.0, 0.0, "10.0.0.2"))
+        service.update(second.id, TargetUpdate(longitude=20.002))
+        [event] = service.get_proximity_events()
+        assert (event.kind, event.target_id, event.other_id) == ("enter", second.id, first.id)
+
+    def test_invalid_requests_are_rejected(self, repository, tmp_path):
+        """Test negative cursors and limits out of range raise ValueError"""
+        service = TargetService(repository, HistoryService(PositionHistoryRepository(str(tmp_path / "history"))))
+        with pytest.raises(ValueError):
+            service.get_proximity_events(after=-1)
+        with pytest.raises(ValueError):
+            service.get_proximity_events(limit=0)
+
+
+class TestProximityEndpoint:
+    """Tests for GET /api/v1/proximity/events"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        client = src.main.connexion_app.test_client()
+        repository = targets_controller.get_service().repository
+        repository.put_many([_target(1, 32.0, 34.8)])
+        repository.create(_target(2, 32.001, 34.8))
+        return client
+
+    def test_events_are_returned(self, client):
+        """Test the endpoint returns events after a sequence"""
+        response = client.get("/api/v1/proximity/events")
+        assert response.status_code == 200
+        [event] = response.json()
+        assert (event["sequence"], event["kind"], event["target_id"]) == (1, "enter", "t2")
+        assert event["distance"] == pytest.approx(111.2, abs=0.1)
+        assert client.get("/api/v1/proximity/events", params={"after": 1}).json() == []
+
+    def test_invalid_limit_returns_400(self, client):
+        """Test a limit above the maximum is rejected"""
+        response = client.get("/api/v1/proximity/events", params={"limit": 5000})
+        assert response.status_code == 400
@@ -0,0 +1,101 @@
+"""
+Unit tests for sharing the data files between several worker processes
+"""
+import os
+import uuid
+
+import pytest
+
+from src.models.target import Target
+from src.models.position import PositionRecord
+from src.dal.target_repository import TargetRepository
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.shared_counters import SharedCounters
+
+
+def _target(target_id=None, speed=50.0):
+    return Target(target_id or str(uuid.uuid4()), 1.5, 2.5, 100.0, 2400.0, speed, 90.0, "10.0.0.1")
+
+
+def _record(target_id, timestamp):
+    return PositionRecord(target_id, timestamp, 10.0, 20.0, 100.0)
+
+
+class TestSharedTargetRepository:
+    """Tests for repositories standing in for workers on the same files"""
+
+    def test_changes_are_visible_to_other_workers(self, tmp_path):
+        """Test each worker sees creates, updates and deletes of the other"""
+        csv_path = str(tmp_path / "targets.csv")
+        counters = SharedCounters("sequence", "log_start")
+        first = TargetRepository(csv_path, counters=counters)
+        second = TargetRepository(csv_path, counters=counters)
+
+        target = _target()
+        first.create(target)
+        assert second.get_by_id(target.id) == target
+
+        second.update(_target(target.id, speed=99.0))
+        other = _target()
+        second.create(other)
+        assert first.get_by_id(target.id).speed == 99.0
+
+        first.delete(other.id)
+        assert [t.id for t in second.get_all()] == [target.id]
+
+    def test_worker_behind_a_snapshot_reloads_it(self, tmp_path):
+        """Test a worker recovers when the logs it needed were dropped"""
+        csv_path = str(tmp_path / "targets.csv")
+        counters = SharedCounters("sequence", "log_start")
+        writer = TargetRepository(csv_path, snapshot_interval=2, counters=counters)
+        reader = TargetRepository(csv_path, snapshot_interval=2, counters=counters)
+
+        targets = [_target() for _ in range(5)]
+        for target in targets:
+            writer.create(target)
+        writer.snapshot()
+        writer.create(_target())
+
+        assert len(reader.get_all()) == 6
+        assert reader.get_by_id(targets[0].id) == targets[0]
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_forked_worker_writes_are_seen(self, tmp_path):
+        """Test a write made in a forked process is seen by the parent"""
+        repository = TargetRepository(str(tmp_path / "targets.csv"))
+        repository.share_between_processes()
+        target = _target()
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                repository.create(target)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        assert repository.get_by_id(target.id) == target
+
+
+class TestSharedHistoryRepository:
+    """Tests for history repositories standing in for workers on one directory"""
+
+    def test_appends_are_visible_to_other_workers(self, tmp_path):
+        """Test records and segment rollovers of one worker are seen by the other"""
+        counters = SharedCounters("version")
+        first = PositionHistoryRepository(
+            str(tmp_path), segment_max_records=3, index_interval=2, counters=counters
+        )
+        second = PositionHistoryRepository(
+            str(tmp_path), segment_max_records=3, index_interval=2, counters=counters
+        )
+
+        for i in range(4):
+            first.append(_record("a", 1000.0 + i))
+        for i in range(4, 8):
+            second.append(_record("a", 1000.0 + i))
+
+        expected = [1000.0 + i for i in range(8)]
+        assert [r.timestamp for r in first.get_track("a", 0, 2000)] == expected
+        assert [r.timestamp for r in second.get_track("a", 0, 2000)] == expected
+        assert len(list(tmp_path.glob("segment-*.csv"))) == 3
@@ -0,0 +1,157 @@
+"""
+Unit tests for single-flight request coalescing
+"""
+import threading
+import time
+
+import pytest
+
+import src.main
+from src.api.controllers import targets_controller
+from src.api.single_flight import SingleFlight
+from src.metrics import COALESCED_REQUESTS
+from src.models.target import Target
+
+
+def _counts(operation):
+    return tuple(COALESCED_REQUESTS.labels(operation, result).values()[0] for result in ("leader", "shared"))
+
+
+def _wait_until(condition):
+    while not condition():
+        time.sleep(0.001)
+
+
+def _start(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+class TestSingleFlight:
+    """Tests for sharing reads between concurrent callers"""
+
+    def test_concurrent_callers_share_one_read(self):
+        """Test callers arriving during a read get its result without reading again"""
+        flight = SingleFlight("test_share")
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def read():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return object()
+
+        leader = _start(lambda: results.append(flight.do("key", read)), 1)
+        started.wait()
+        followers = _start(lambda: results.append(flight.do("key", read)), 5)
+        _wait_until(lambda: _counts("test_share")[1] == 5)
+        release.set()
+        for thread in leader + followers:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len(results) == 6 and all(result is results[0] for result in results)
+        assert _counts("test_share") == (1, 5)
+
+    def test_finished_reads_are_not_reused(self):
+        """Test a call after the read finished reads again"""
+        flight = SingleFlight("test_sequential")
+        assert [flight.do("key", lambda n=n: n) for n in range(3)] == [0, 1, 2]
+        assert _counts("test_sequential") == (3, 0)
+
+    def test_different_keys_read_separately(self):
+        """Test a read in progress is only shared with callers of the same key"""
+        flight = SingleFlight("test_keys")
+        release = threading.Event()
+        leader = _start(lambda: flight.do("a", release.wait), 1)
+        _wait_until(lambda: _counts("test_keys")[0] == 1)
+        assert flight.do("b", lambda: "b") == "b"
+        release.set()
+        leader[0].join()
+        assert _counts("test_keys") == (2, 0)
+
+    def test_errors_reach_every_caller(self):
+        """Test an error of the read is raised to the leader and all callers sharing it"""
+        flight = SingleFlight("test_errors")
+        started, release = threading.Event(), threading.Event()
+        errors = []
+
+        def read():
+            started.set()
+            release.wait()
+            raise ValueError("broken")
+
+        def call():
+            try:
+                flight.do("key", read)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = _start(call, 1)
+        started.wait()
+        threads += _start(call, 3)
+        _wait_until(lambda: _counts("test_errors")[1] == 3)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(errors) == 4
+        assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+class TestTargetsEndpoint:
+    """Tests for coalesced GET /api/v1/targets"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        return src.main.connexion_app.test_client()
+
+    def test_concurrent_requests_share_a_response(self, client, monkeypatch):
+        """Test concurrent requests get the same body from one read"""
+        service = targets_controller.get_service()
+        service.repository.create(Target("t1", 1.0, 2.0, 3.0, 2.4, 0.0, 0.0, "10.0.0.1"))
+        started, release = threading.Event(), threading.Event()
+        reads = []
+        get_all = service.get_all
+
+        def slow_get_all():
+            reads.append(1)
+            started.set()
+            release.wait()
+            return get_all()
+
+        monkeypatch.setattr(service, "get_all", slow_get_all)
+        before = _counts("get_all_targets")
+        responses = []
+        threads = _start(lambda: responses.append(client.get("/api/v1/targets")), 1)
+        started.wait()
+        threads += _start(lambda: responses.append(client.get("/api/v1/targets")), 3)
+        _wait_until(lambda: _counts("get_all_targets")[1] == before[1] + 3)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(reads) == 1
+        assert [r.status_code for r in responses] == [200] * 4
+        assert all(r.content == responses[0].content for r in responses)
+        assert [t["id"] for t in responses[0].json()] == ["t1"]
+
+    def test_reads_after_a_write_see_it(self, client):
+        """Test a request after a write is not given a response read before it"""
+        assert client.get("/api/v1/targets").json() == []
+        targets_controller.get_service().repository.create(
+            Target("t1", 1.0, 2.0, 3.0, 2.4, 0.0, 0.0, "10.0.0.1")
+        )
+        assert [t["id"] for t in client.get("/api/v1/targets").json()] == ["t1"]
+
+    def test_ratio_is_exported(self, client):
+        """Test the coalescing counters are rendered on /metrics"""
+        client.get("/api/v1/targets")
+        body = client.get("/metrics").text
+        assert 'coalesced_requests_total{operation="get_all_targets",result="leader"}' in body
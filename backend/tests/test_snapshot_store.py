@@ -0,0 +1,281 @@
+"""
+Unit tests for binary snapshots, the change log and repository recovery
+"""
+import os
+import uuid
+
+import pytest
+
+from src.models.target import Target
+from src.dal.ip_codec import pack_ip
+from src.dal.csv_loader import load_table
+from src.dal.snapshot_store import _SNAPSHOT_HEADER, SNAPSHOT_MAGIC, SnapshotStore
+from src.dal.target_table import TargetTable
+from src.dal.target_repository import TargetRepository
+
+
+def _row(target_id=None, latitude=1.5, ip_address="10.0.0.1"):
+    return (
+        target_id or str(uuid.uuid4()), latitude, 2.5, 100.0, 2400.0, 50.0, 90.0,
+        pack_ip(ip_address),
+    )
+
+
+def _target(target_id=None, latitude=1.5, ip_address="10.0.0.1"):
+    return Target(*_row(target_id, latitude)[:7], ip_address)
+
+
+class TestTargetTable:
+    """Tests for the columnar in-memory table"""
+
+    def test_put_replaces_in_place(self):
+        """Test replacing a row keeps its position"""
+        first, second = _row(), _row()
+        table = TargetTable.from_rows([first, second])
+        table.put(_row(first[0], latitude=9.0))
+        rows = list(table.rows())
+        assert [r[0] for r in rows] == [first[0], second[0]]
+        assert rows[0][1] == 9.0
+
+    def test_remove_and_compact(self):
+        """Test removed rows disappear and order is kept after compaction"""
+        rows = [_row() for _ in range(8)]
+        table = TargetTable.from_rows(rows)
+        for row in rows[:3]:
+            assert table.remove(row[0]) == row
+        assert table.remove(rows[0][0]) is None
+        assert len(table) == 5
+        assert list(table.rows()) == rows[3:]
+        assert table.get(rows[5][0]) == rows[5]
+
+    def test_ip_range_positions(self):
+        """Test IPv4 and IPv6 ranges select rows by packed address"""
+        rows = [
+            _row(ip_address="10.0.0.1"),
+            _row(ip_address="10.0.1.200"),
+            _row(ip_address="192.168.1.1"),
+            _row(ip_address="2001:db8::1"),
+        ]
+        table = TargetTable.from_rows(rows)
+        table.remove(rows[1][0])
+        assert table.positions_in_ip_range(pack_ip("10.0.0.0"), pack_ip("10.255.255.255")) == [0]
+        assert table.positions_in_ip_range(pack_ip("10.0.0.0"), pack_ip("ffff::")) == [0, 2, 3]
+        assert list(table.rows()) == [rows[0], rows[2], rows[3]]
+
+
+class TestSnapshotStore:
+    """Tests for snapshot files and change log replay"""
+
+    def test_snapshot_round_trip(self, tmp_path):
+        """Test a snapshot loads back identical rows and sequence"""
+        rows = [_row() for _ in range(5)]
+        store = SnapshotStore(tmp_path)
+        store.write_snapshot(TargetTable.from_rows(rows), 42)
+        table, sequence = store.load_snapshot()
+        assert sequence == 42
+        assert list(table.rows()) == rows
+
+    def test_ids_with_line_breaks_round_trip(self, tmp_path):
+        """Test ids holding separators keep their rows apart in a snapshot"""
+        rows = [_row("evil\nid"), _row(), _row("\n"), _row("ünï\ncode\n")]
+        store = SnapshotStore(tmp_path)
+        store.write_snapshot(TargetTable.from_rows(rows), 3)
+        table, _ = store.load_snapshot()
+        assert len(table) == 4
+        assert list(table.rows()) == rows
+
+    def test_ipv6_rows_round_trip(self, tmp_path):
+        """Test 128-bit addresses survive snapshots and the change log"""
+        rows = [_row(ip_address="2001:db8::ff00:42:8329"), _row(ip_address="::1")]
+        store = SnapshotStore(tmp_path)
+        store.write_snapshot(TargetTable.from_rows(rows[:1]), 1)
+        store.open_log(2)
+        store.append_put(2, rows[1])
+        store.close()
+
+        table, sequence = store.load_snapshot()
+        store.replay(table, sequence)
+        assert list(table.rows()) == rows
+
+    def test_replay_applies_only_newer_entries(self, tmp_path):
+        """Test replay skips entries already covered by the snapshot"""
+        first, second = _row(), _row()
+        store = SnapshotStore(tmp_path)
+        store.open_log(1)
+        store.append_put(1, first)
+        store.append_put(2, second)
+        store.append_delete(3, first[0])
+        store.close()
+
+        table = TargetTable.from_rows([first])
+        applied, last = store.replay(table, 1)
+        assert (applied, last) == (2, 3)
+        assert list(table.rows()) == [second]
+
+    def test_truncated_log_tail_is_ignored(self, tmp_path):
+        """Test a partially written last entry does not break replay"""
+        row = _row()
+        store = SnapshotStore(tmp_path)
+        store.open_log(1)
+        store.append_put(1, row)
+        store.append_put(2, _row())
+        store.close()
+        log_path = next(tmp_path.glob("targets.wal.*"))
+        with open(log_path, "r+b") as f:
+            f.truncate(os.path.getsize(log_path) - 5)
+
+        table = TargetTable()
+        assert store.replay(table, 0) == (1, 1)
+        assert list(table.rows()) == [row]
+
+
+class TestRepositoryRecovery:
+    """Tests for restarting the repository from snapshot and log"""
+
+    def test_restart_recovers_changes(self, tmp_path):
+        """Test creates, updates and deletes survive a restart"""
+        csv_path = tmp_path / "targets.csv"
+        repo = TargetRepository(str(csv_path), snapshot_interval=3)
+        targets = [_target() for _ in range(5)]
+        for target in targets:
+            repo.create(target)
+        repo.update(_target(targets[0].id, latitude=9.0))
+        repo.delete(targets[1].id)
+        repo.close()
+
+        reloaded = TargetRepository(str(csv_path))
+        assert [t.id for t in reloaded.get_all()] == [
+            t.id for t in targets if t.id != targets[1].id
+        ]
+        assert reloaded.get_by_id(targets[0].id).latitude == 9.0
+        reloaded.close()
+
+    def test_externally_edited_csv_is_reloaded(self, tmp_path):
+        """Test a CSV newer than the snapshot is parsed again"""
+        csv_path = tmp_path / "targets.csv"
+        repo = TargetRepository(str(csv_path))
+        repo.create(_target())
+        repo.snapshot()
+        repo.close()
+
+        extra_id = str(uuid.uuid4())
+        with open(csv_path, "a") as f:
+            f.write(f"{extra_id},1.0,2.0,3.0,2400.0,10.0,45.0,10.0.0.2\n")
+        newest = max(p.stat().st_mtime_ns for p in tmp_path.iterdir())
+        os.utime(csv_path, ns=(newest + 1_000_000, newest + 1_000_000))
+
+        reloaded = TargetRepository(str(csv_path))
+        assert len(reloaded.get_all()) == 2
+        assert reloaded.get_by_id(extra_id) is not None
+        reloaded.close()
+
+    def test_old_snapshot_version_is_rebuilt_from_csv(self, tmp_path):
+        """Test a snapshot of an older format is replaced using the CSV"""
+        csv_path = tmp_path / "targets.csv"
+        repo = TargetRepository(str(csv_path))
+        target = repo.create(_target(ip_address="172.16.0.9"))
+        repo.close()
+        snapshot_path = tmp_path / "targets.snapshot"
+        data = bytearray(snapshot_path.read_bytes())
+        _SNAPSHOT_HEADER.pack_into(data, 0, SNAPSHOT_MAGIC, 1, 0, 0)
+        snapshot_path.write_bytes(data)
+
+        reloaded = TargetRepository(str(csv_path))
+        assert reloaded.get_all() == [target]
+        assert SnapshotStore(tmp_path).load_snapshot()[0].get(target.id) is not None
+        reloaded.close()
+
+    def test_old_snapshot_is_rebuilt_from_its_export_and_the_log(self, tmp_path):
+        """Test changes logged after the snapshot are replayed on the CSV exported with it"""
+        csv_path = tmp_path / "targets.csv"
+        repo = TargetRepository(str(csv_path), snapshot_interval=2)
+        targets = [_target() for _ in range(3)]
+        for target in targets:
+            repo.create(target)
+        repo.update(_target(targets[0].id, latitude=9.0))
+        repo.close()
+        snapshot_path = tmp_path / "targets.snapshot"
+        data = bytearray(snapshot_path.read_bytes())
+        data[len(SNAPSHOT_MAGIC)] = 1
+        snapshot_path.write_bytes(data)
+
+        reloaded = TargetRepository(str(csv_path))
+        assert [(t.id, t.latitude) for t in reloaded.get_all()] == [
+            (targets[0].id, 9.0), (targets[1].id, 1.5), (targets[2].id, 1.5),
+        ]
+        assert reloaded.sequence == 4
+        assert [row[1] for row in load_table(csv_path, workers=1).rows()] == [9.0, 1.5, 1.5]
+        reloaded.close()
+
+    def test_writes_only_append_to_the_log(self, tmp_path, monkeypatch):
+        """Test writes leave the CSV to the export written with the next snapshot"""
+        csv_path = tmp_path / "targets.csv"
+        repo = TargetRepository(str(csv_path))
+        exports = []
+        write_all_rows = repo._write_all_rows
+
+        def counted(table):
+            exports.append(len(table))
+            write_all_rows(table)
+
+        monkeypatch.setattr(repo, "_write_all_rows", counted)
+        kept, removed = _target(), _target()
+        repo.put_many([kept, removed])
+        repo.create(_target(kept.id, latitude=5.0))
+        repo.update(_target(kept.id, latitude=9.0))
+        repo.delete(removed.id)
+        assert exports == []
+        assert len(load_table(csv_path, workers=1)) == 0
+
+        repo.snapshot()
+        assert exports == [1]
+        assert list(load_table(csv_path, workers=1).rows()) == [_row(kept.id, latitude=9.0)]
+        repo.close()
+
+    def test_failed_writes_leave_the_table_unchanged(self, tmp_path, monkeypatch):
+        """Test a change whose log write fails is undone in memory and in the indexes"""
+        repo = TargetRepository(str(tmp_path / "targets.csv"))
+        kept, removed = _target(), _target()
+        repo.put_many([kept, removed])
+
+        def fail(*args):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(repo._snapshots, "append_put", fail)
+        monkeypatch.setattr(repo._snapshots, "append_delete", fail)
+        for write in (
+            lambda: repo.create(_target()),
+            lambda: repo.update(_target(kept.id, latitude=9.0)),
+            lambda: repo.delete(removed.id),
+            lambda: repo.put_many([_target(kept.id, latitude=9.0), _target()]),
+        ):
+            with pytest.raises(OSError):
+                write()
+
+        assert {t.id: t.latitude for t in repo.get_all()} == {kept.id: 1.5, removed.id: 1.5}
+        assert sum(c.count for c in repo.get_clusters(0, -90.0, -180.0, 90.0, 180.0)) == 2
+        repo.close()
+
+    def test_logged_changes_are_kept_when_the_log_fails(self, tmp_path, monkeypatch):
+        """Test the table keeps the changes of a batch logged before the log failed"""
+        csv_path = tmp_path / "targets.csv"
+        repo = TargetRepository(str(csv_path))
+        targets = [_target() for _ in range(4)]
+        append_put = repo._snapshots.append_put
+        calls = []
+
+        def fail_third(sequence, row):
+            calls.append(row)
+            if len(calls) == 3:
+                raise OSError("disk full")
+            append_put(sequence, row)
+
+        monkeypatch.setattr(repo._snapshots, "append_put", fail_third)
+        with pytest.raises(OSError):
+            repo.put_many(targets)
+        assert [t.id for t in repo.get_all()] == [t.id for t in targets[:2]]
+
+        other = TargetRepository(str(csv_path), counters=repo._counters)
+        repo.close()
+        assert [t.id for t in other.get_all()] == [t.id for t in targets[:2]]
+        other.close()
@@ -0,0 +1,196 @@
+"""
+Unit tests for spectrum occupancy
+"""
+import random
+
+import pytest
+
+import src.main
+from src.api.controllers import targets_controller
+from src.bl.history_service import HistoryService
+from src.bl.target_service import TargetService
+from src.dal.frequency_index import DEFAULT_BANDS, parse_bands
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.target_repository import TargetRepository
+from src.models.spectrum import FrequencyBand
+from src.models.target import Target
+
+FREQUENCIES = [433.0, 915.0, 2.4, 5.2, 5.8, 868.0, 2.45]
+
+
+def _target(number, latitude, longitude, frequency):
+    return Target(f"t{number}", latitude, longitude, 100.0, frequency, 10.0, 45.0, "10.0.0.1")
+
+
+def _expected(targets, band, box=None):
+    """Ids of the targets of a band the slow way, in storage order."""
+    return [
+        t.id for t in targets
+        if t.frequency in band
+        and (box is None or (box[0] <= t.latitude <= box[2] and box[1] <= t.longitude <= box[3]))
+    ]
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = TargetRepository(str(tmp_path / "targets.csv"))
+    yield repository
+    repository.close()
+
+
+class TestFrequencyIndex:
+    """Tests for occupancy read through the repository"""
+
+    def test_occupancy_follows_random_changes(self, repository):
+        """Test band counts, ids and exact frequencies match a scan after random changes"""
+        rng = random.Random(5)
+        targets = {
+            n: _target(n, rng.uniform(-10, 10), rng.uniform(-10, 10), rng.choice(FREQUENCIES))
+            for n in range(300)
+        }
+        repository.put_many(list(targets.values()))
+        repository.get_spectrum_occupancy(-90.0, -180.0, 90.0, 180.0)
+
+        for step in range(300):
+            number = rng.randrange(350)
+            if number in targets and step % 4 == 0:
+                repository.delete(targets.pop(number).id)
+                continue
+            target = _target(number, rng.uniform(-10, 10), rng.uniform(-10, 10), rng.choice(FREQUENCIES))
+            if number in targets:
+                repository.update(target)
+            else:
+                repository.create(target)
+            targets[number] = target
+
+        in_order = repository.get_all()
+        occupancy = repository.get_spectrum_occupancy(-90.0, -180.0, 90.0, 180.0)
+        assert occupancy.count == len(targets)
+        assert [b.band for b in occupancy.bands] == list(DEFAULT_BANDS)
+        for band in occupancy.bands:
+            expected = _expected(in_order, band.band)
+            assert band.target_ids == expected
+            assert band.count == len(expected)
+            assert sum(band.frequencies.values()) == band.count
+        assert occupancy.unbanded == {868.0: sum(1 for t in targets.values() if t.frequency == 868.0)}
+
+    def test_viewport(self, repository):
+        """Test only the targets of a viewport are counted, also across the antimeridian"""
+        rng = random.Random(8)
+        targets = [
+            _target(n, rng.uniform(-30, 30), rng.uniform(-180, 180), rng.choice(FREQUENCIES)) for n in range(400)
+        ]
+        repository.put_many(targets)
+        for box in ((-10.0, -20.0, 10.0, 40.0), (-30.0, 170.0, 30.0, -170.0)):
+            occupancy = repository.get_spectrum_occupancy(*box)
+            if box[1] > box[3]:
+                inside = [
+                    t for t in targets if box[0] <= t.latitude <= box[2]
+                    and (t.longitude >= box[1] or t.longitude <= box[3])
+                ]
+            else:
+                inside = [t for t in targets if box[0] <= t.latitude <= box[2] and box[1] <= t.longitude <= box[3]]
+            assert occupancy.count == len(inside)
+            for band in occupancy.bands:
+                assert band.target_ids == _expected(inside, band.band)
+
+    def test_first_query_after_loading(self, tmp_path):
+        """Test changes made before the groups are built are counted"""
+        csv_path = str(tmp_path / "targets.csv")
+        repository = TargetRepository(csv_path)
+        repository.put_many([_target(1, 0.0, 0.0, 433.0), _target(2, 0.0, 0.0, 2.4)])
+        repository.close()
+
+        repository = TargetRepository(csv_path)
+        repository.update(_target(1, 0.0, 0.0, 2.41))
+        occupancy = repository.get_spectrum_occupancy(-90.0, -180.0, 90.0, 180.0)
+        assert [(b.band.name, b.count) for b in occupancy.bands[:3]] == [
+            ("433 MHz", 0), ("915 MHz", 0), ("2.4 GHz", 2),
+        ]
+        assert occupancy.bands[2].frequencies == {2.4: 1, 2.41: 1}
+        repository.close()
+
+    def test_overlapping_bands(self, tmp_path):
+        """Test a target counts in every band its frequency falls into"""
+        bands = [FrequencyBand("ISM", 2.4, 2.5), FrequencyBand("Wi-Fi 1", 2.401, 2.423)]
+        repository = TargetRepository(str(tmp_path / "targets.csv"), frequency_bands=bands)
+        repository.put_many([_target(1, 0.0, 0.0, 2.412), _target(2, 0.0, 0.0, 2.45)])
+        occupancy = repository.get_spectrum_occupancy(-90.0, -180.0, 90.0, 180.0)
+        assert [(b.band.name, b.target_ids) for b in occupancy.bands] == [
+            ("ISM", ["t1", "t2"]), ("Wi-Fi 1", ["t1"]),
+        ]
+        repository.close()
+
+
+class TestBandConfiguration:
+    """Tests for parsing FREQUENCY_BANDS"""
+
+    def test_parse_bands(self):
+        """Test bands are read in order with their ranges"""
+        assert parse_bands("433 MHz=430-440; 2.4 GHz=2.4-2.5;") == [
+            FrequencyBand("433 MHz", 430.0, 440.0), FrequencyBand("2.4 GHz", 2.4, 2.5),
+        ]
+
+    @pytest.mark.parametrize("text", ["", "433 MHz", "433=440-430", "a=1", "a=x-2"])
+    def test_invalid_bands_are_rejected(self, text):
+        """Test malformed bands and empty ranges raise ValueError"""
+        with pytest.raises(ValueError):
+            parse_bands(text)
+
+    def test_bands_from_environment(self, tmp_path, monkeypatch):
+        """Test the repository reads its bands from FREQUENCY_BANDS"""
+        monkeypatch.setenv("FREQUENCY_BANDS", "LoRa=863-870")
+        repository = TargetRepository(str(tmp_path / "targets.csv"))
+        repository.create(_target(1, 0.0, 0.0, 868.0))
+        [band] = repository.get_spectrum_occupancy(-90.0, -180.0, 90.0, 180.0).bands
+        assert (band.band.name, band.count) == ("LoRa", 1)
+        repository.close()
+
+
+class TestSpectrumService:
+    """Tests for occupancy validation"""
+
+    def test_invalid_viewport_is_rejected(self, repository, tmp_path):
+        """Test inverted latitudes and coordinates out of range raise ValueError"""
+        service = TargetService(repository, HistoryService(PositionHistoryRepository(str(tmp_path / "history"))))
+        with pytest.raises(ValueError):
+            service.get_spectrum_occupancy(min_latitude=10.0, max_latitude=-10.0)
+        with pytest.raises(ValueError):
+            service.get_spectrum_occupancy(min_longitude=-200.0)
+
+
+class TestSpectrumEndpoint:
+    """Tests for GET /api/v1/spectrum/occupancy"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        client = src.main.connexion_app.test_client()
+        targets_controller.get_service().repository.put_many([
+            _target(1, 32.0, 34.8, 2.4), _target(2, 40.0, 34.8, 2.4), _target(3, 32.0, 34.8, 100.0),
+        ])
+        return client
+
+    def test_occupancy_is_returned(self, client):
+        """Test the endpoint returns bands, exact frequencies and ids within a viewport"""
+        response = client.get("/api/v1/spectrum/occupancy")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 3
+        band = next(b for b in body["bands"] if b["name"] == "2.4 GHz")
+        assert (band["count"], band["frequencies"], band["target_ids"]) == (
+            2, [{"frequency": 2.4, "count": 2}], ["t1", "t2"]
+        )
+        assert body["unbanded"] == [{"frequency": 100.0, "count": 1}]
+
+        params = {"min_latitude": 30, "max_latitude": 35, "min_longitude": 30, "max_longitude": 40}
+        body = client.get("/api/v1/spectrum/occupancy", params=params).json()
+        assert next(b for b in body["bands"] if b["name"] == "2.4 GHz")["target_ids"] == ["t1"]
+
+    def test_invalid_viewport_returns_400(self, client):
+        """Test inverted latitudes are rejected"""
+        response = client.get("/api/v1/spectrum/occupancy", params={"min_latitude": 10, "max_latitude": -10})
+        assert response.status_code == 400
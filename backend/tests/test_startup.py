@@ -0,0 +1,60 @@
+"""
+Unit tests for application startup
+"""
+import json
+
+import src.main
+from src.api.spec_loader import load_spec
+
+
+SPEC = """
+openapi: 3.0.3
+info:
+  title: Test
+  version: 1.0.0
+paths: {}
+"""
+
+
+class TestSpecLoader:
+    """Tests for the cached OpenAPI spec loader"""
+
+    def test_writes_and_reuses_cache(self, tmp_path):
+        """Test the parsed spec is cached and served from the cache"""
+        spec_path = tmp_path / "openapi.yaml"
+        spec_path.write_text(SPEC)
+        cache_dir = tmp_path / "cache"
+
+        first = load_spec(spec_path, cache_dir)
+        cached = list(cache_dir.glob("openapi-*.json"))
+        assert len(cached) == 1
+        assert json.loads(cached[0].read_text()) == first
+        assert load_spec(spec_path, cache_dir) == first
+
+    def test_edited_spec_misses_cache(self, tmp_path):
+        """Test a changed spec is parsed again instead of using a stale cache"""
+        spec_path = tmp_path / "openapi.yaml"
+        spec_path.write_text(SPEC)
+        cache_dir = tmp_path / "cache"
+        load_spec(spec_path, cache_dir)
+
+        spec_path.write_text(SPEC.replace("title: Test", "title: Changed"))
+        assert load_spec(spec_path, cache_dir)["info"]["title"] == "Changed"
+        assert len(list(cache_dir.glob("openapi-*.json"))) == 2
+
+
+class TestAppConstruction:
+    """Tests for building the application once per process"""
+
+    def test_app_is_built_once(self, tmp_path, monkeypatch):
+        """Test repeated access returns the same app with a startup report"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+
+        app = src.main.app
+        assert src.main.app is app
+        assert src.main.connexion_app.app is app
+        phases = app.config["STARTUP_PHASES_MS"]
+        assert "spec" in phases
+        assert {"target store", "target table", "target indexes"} <= set(phases)
@@ -0,0 +1,180 @@
+"""
+Unit tests for copy-on-write table versions
+"""
+import random
+import threading
+
+import pytest
+
+from src.api.single_flight import SingleFlight
+from src.dal.shared_counters import SharedCounters
+from src.dal.table_versions import CHUNK_ROWS, TableVersion, TableVersions
+from src.dal.target_repository import TargetRepository
+from src.dal.target_table import TargetTable
+from src.models.target import Target
+
+
+def _target(number, latitude=1.0, ip="10.0.0.1"):
+    return Target(f"t{number}", latitude, 2.0, 100.0, 2.4, 10.0, 45.0, ip)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = TargetRepository(str(tmp_path / "targets.csv"))
+    yield repository
+    repository.close()
+
+
+class TestTableVersions:
+    """Tests for versions published by the repository"""
+
+    def test_unchanged_chunks_are_shared(self, repository):
+        """Test a write copies only the chunk and id bucket of the changed row"""
+        repository.put_many([_target(n, latitude=n * 0.02) for n in range(3 * CHUNK_ROWS)])
+        repository.get_all()
+        before = repository._versions.current
+        repository.update(_target(CHUNK_ROWS + 5, latitude=9.0))
+        after = repository._versions.current
+
+        assert after.sequence == before.sequence + 1
+        assert [a is b for a, b in zip(before.chunks, after.chunks)] == [True, False, True]
+        assert sum(a is not b for a, b in zip(before.buckets, after.buckets)) == 1
+
+    def test_published_versions_do_not_change(self, repository):
+        """Test a version taken before writes keeps returning the rows it had"""
+        repository.put_many([_target(n) for n in range(10)])
+        repository.get_all()
+        version = repository._versions.current
+        rows = list(version.rows())
+
+        repository.update(_target(3, latitude=9.0))
+        repository.delete("t4")
+        repository.create(_target(10))
+
+        assert list(version.rows()) == rows
+        assert len(version) == 10 and "t4" in version and "t10" not in version
+        assert version.get("t3")[1] == 1.0
+        assert repository.get_by_id("t3").latitude == 9.0
+        assert repository.count() == 10
+
+    def test_versions_follow_random_changes(self):
+        """Test versions match the table after random writes, deletes and compactions"""
+        rng = random.Random(3)
+        table = TargetTable()
+        versions = TableVersions()
+        versions.reset(table)
+        versions.build(0)
+        table.listeners.append(versions)
+
+        def row(number):
+            return (f"t{number}", rng.uniform(-50, 50), 0.0, 0.0, 2.4, 0.0, 0.0, rng.choice([1, 1 << 70]))
+
+        for sequence in range(1, 400):
+            for _ in range(rng.randrange(1, 30)):
+                number = rng.randrange(3 * CHUNK_ROWS)
+                if rng.random() < 0.4:
+                    table.remove(f"t{number}")
+                else:
+                    table.put(row(number))
+            versions.publish(sequence)
+            if sequence % 50 == 0:
+                version = versions.current
+                assert version.sequence == sequence
+                assert list(version.rows()) == list(table.rows())
+                assert len(version) == len(table)
+                assert all(version.get(target_id) == table.get(target_id) for target_id in table.index)
+                assert version.get("missing") is None
+
+    def test_of_table_drops_tombstones(self):
+        """Test a version built from a table with deleted rows holds its live rows in order"""
+        table = TargetTable.from_rows((f"t{n}", float(n), 0.0, 0.0, 0.0, 0.0, 0.0, n) for n in range(10))
+        table.hold_compaction()
+        table.remove("t2")
+        table.remove("t5")
+        version = TableVersion.of_table(table, 7)
+        assert (version.sequence, len(version)) == (7, 8)
+        assert list(version.rows()) == list(table.rows())
+        assert version.get("t6") == table.get("t6")
+
+    def test_first_version_is_built_by_the_first_listing(self, tmp_path):
+        """Test loading builds no version and reads before the first listing use the table"""
+        csv_path = str(tmp_path / "targets.csv")
+        repository = TargetRepository(csv_path)
+        repository.put_many([_target(n) for n in range(5)])
+        repository.close()
+
+        repository = TargetRepository(csv_path)
+        assert repository._versions.current is None
+        repository.update(_target(1, latitude=9.0))
+        assert (repository.count(), repository.get_by_id("t1").latitude) == (5, 9.0)
+        assert repository._versions.current is None
+
+        assert [t.latitude for t in repository.get_all()] == [1.0, 9.0, 1.0, 1.0, 1.0]
+        assert repository._versions.current.sequence == repository.sequence
+        repository.delete("t2")
+        assert repository._versions.current.sequence == repository.sequence
+        assert [t.id for t in repository.get_all()] == ["t0", "t1", "t3", "t4"]
+        repository.close()
+
+    def test_reads_do_not_wait_for_writers(self, repository):
+        """Test reads return while a writer holds the table lock"""
+        repository.put_many([_target(n) for n in range(5)])
+        repository.get_all()
+        results = []
+
+        def read():
+            results.append((len(repository.get_all()), repository.get_by_id("t1").id, repository.count()))
+
+        with repository._table_lock:
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join(timeout=5)
+            assert not reader.is_alive()
+        assert results == [(5, "t1", 5)]
+
+    def test_sequence_is_shown_after_the_version_holding_it(self, repository, monkeypatch):
+        """Test reads keyed by the sequence during a write get the version of that sequence"""
+        repository.create(_target(0))
+        repository.get_all()
+        publish = repository._versions.publish
+        publishing, resume = threading.Event(), threading.Event()
+
+        def paused_publish(sequence):
+            publishing.set()
+            resume.wait(timeout=5)
+            publish(sequence)
+
+        monkeypatch.setattr(repository._versions, "publish", paused_publish)
+        flight = SingleFlight("test")
+        reads = []
+
+        def read():
+            key = repository.sequence
+            reads.append((key, flight.do(key, lambda: [t.id for t in repository.get_all()])))
+
+        writer = threading.Thread(target=repository.create, args=(_target(1),))
+        writer.start()
+        assert publishing.wait(timeout=5)
+        read()
+        resume.set()
+        writer.join(timeout=5)
+        read()
+
+        first = reads[0][0]
+        assert reads == [(first, ["t0"]), (first + 1, ["t0", "t1"])]
+
+    def test_changes_of_other_repositories_are_read(self, tmp_path):
+        """Test a version is caught up with writes of another repository on the same files"""
+        csv_path = str(tmp_path / "targets.csv")
+        counters = SharedCounters("sequence", "log_start")
+        writer = TargetRepository(csv_path, counters=counters)
+        reader = TargetRepository(csv_path, counters=counters)
+        writer.create(_target(1))
+        writer.update(_target(1, latitude=5.0))
+        writer.create(_target(2))
+
+        assert [t.id for t in reader.get_all()] == ["t1", "t2"]
+        assert reader.get_by_id("t1").latitude == 5.0
+        assert reader._versions.current.sequence == 3
+        writer.close()
+        reader.close()
@@ -0,0 +1,105 @@
+"""
+Unit tests for streaming export
+"""
+import io
+import json
+
+import pytest
+
+import src.main
+from src.api.controllers import targets_controller
+from src.bl.target_export import export_chunks
+from src.bl.target_import import read_chunks
+from src.dal.target_repository import TargetRepository
+from src.models.target import Target
+
+
+def _target(number):
+    return Target(f"t{number}", 1.0 + number / 100, 2.0, 3.0, 2400.0, 10.0, 45.0, f"10.0.0.{number}")
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = TargetRepository(str(tmp_path / "targets.csv"))
+    repository.put_many([_target(n) for n in range(20)])
+    yield repository
+    repository.close()
+
+
+class TestIterBatches:
+    """Tests for reading the table batch by batch"""
+
+    def test_batches_cover_table_in_order(self, repository):
+        """Test every target is returned once, in storage order"""
+        batches = list(repository.iter_batches(batch_size=6))
+        assert [len(batch) for batch in batches] == [6, 6, 6, 2]
+        assert [t.id for batch in batches for t in batch] == [f"t{n}" for n in range(20)]
+
+    def test_concurrent_changes_do_not_shift_rows(self, repository):
+        """Test deletes between batches neither skip nor repeat stored targets"""
+        batches = repository.iter_batches(batch_size=5)
+        seen = [t.id for t in next(batches)]
+        # Enough deletes to make compaction due, which would shift positions
+        for number in range(0, 10):
+            repository.delete(f"t{number}")
+        repository.create(_target(50))
+        seen += [t.id for batch in batches for t in batch]
+
+        assert seen == [f"t{n}" for n in range(5)] + [f"t{n}" for n in range(10, 20)] + ["t50"]
+        # Compaction ran once the iteration ended
+        assert None not in repository._table.ids
+
+
+class TestExportChunks:
+    """Tests for encoding batches"""
+
+    def test_csv_export_can_be_imported(self):
+        """Test the CSV export reads back as the same targets"""
+        targets = [_target(n) for n in range(7)]
+        data = b"".join(export_chunks([targets[:4], targets[4:]], "text/csv"))
+        assert data.startswith(b"id,latitude,longitude,altitude,frequency,speed,bearing,ip_address\r\n")
+        imported = [t for chunk in read_chunks(io.BytesIO(data), "text/csv") for _, t in chunk]
+        assert imported == targets
+
+    def test_empty_csv_export_has_header(self):
+        """Test an empty table still exports the header line"""
+        assert b"".join(export_chunks([], "text/csv")).count(b"\n") == 1
+
+    def test_ndjson_export_has_one_object_per_line(self):
+        """Test each NDJSON line is a target object"""
+        data = b"".join(export_chunks([[_target(1), _target(2)]], "application/x-ndjson"))
+        lines = [json.loads(line) for line in data.splitlines()]
+        assert [line["id"] for line in lines] == ["t1", "t2"]
+        assert lines[0]["ip_address"] == "10.0.0.1"
+
+
+class TestExportEndpoint:
+    """Tests for GET /api/v1/targets/export"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        client = src.main.connexion_app.test_client()
+        targets_controller.get_service().repository.put_many([_target(n) for n in range(3)])
+        return client
+
+    def test_format_follows_accept_header(self, client):
+        """Test CSV is the default and NDJSON is sent when preferred"""
+        response = client.get("/api/v1/targets/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert len(response.text.splitlines()) == 4
+
+        response = client.get(
+            "/api/v1/targets/export", headers={"Accept": "text/csv;q=0.5, application/x-ndjson"}
+        )
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["t0", "t1", "t2"]
+
+    def test_unsupported_accept_is_rejected(self, client):
+        """Test an Accept header without CSV or NDJSON returns 406"""
+        response = client.get("/api/v1/targets/export", headers={"Accept": "application/json"})
+        assert response.status_code == 406
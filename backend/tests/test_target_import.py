@@ -0,0 +1,177 @@
+"""
+Unit tests for streaming bulk import
+"""
+import io
+import json
+
+import pytest
+
+import src.main
+from src.api.controllers import targets_controller
+from src.bl.history_service import HistoryService
+from src.bl.target_import import read_chunks
+from src.bl.target_service import TargetService
+from src.dal.csv_loader import load_table
+from src.dal.position_history_repository import PositionHistoryRepository
+from src.dal.target_repository import TargetRepository
+from src.models.target import Target
+
+HEADER = "id,latitude,longitude,altitude,frequency,speed,bearing,ip_address\n"
+
+
+def _target(target_id, latitude=1.0):
+    return Target(target_id, latitude, 2.0, 3.0, 2400.0, 10.0, 45.0, "10.0.0.1")
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = TargetService(
+        TargetRepository(str(tmp_path / "targets.csv")),
+        HistoryService(PositionHistoryRepository(str(tmp_path / "history"))),
+    )
+    yield service
+    service.repository.close()
+    service.history.repository.close()
+
+
+class TestReadChunks:
+    """Tests for parsing uploads into chunks"""
+
+    def test_csv_rows_are_chunked_with_line_numbers(self):
+        """Test rows come in chunks of the requested size, invalid ones as messages"""
+        upload = HEADER + "".join(f"t{n},1.0,2.0,3.0,4.0,5.0,6.0,10.0.0.1\n" for n in range(4))
+        upload += "bad,100.0,2.0,3.0,4.0,5.0,6.0,10.0.0.1\nshort,1.0\n"
+        chunks = list(read_chunks(io.BytesIO(upload.encode()), "text/csv", chunk_rows=4))
+
+        assert [len(chunk) for chunk in chunks] == [4, 2]
+        assert [t.id for _, t in chunks[0]] == ["t0", "t1", "t2", "t3"]
+        assert chunks[1] == [
+            (6, "100.0 is greater than the maximum of 90 - 'latitude'"),
+            (7, "Expected 8 fields, got 2"),
+        ]
+
+    def test_csv_columns_are_matched_by_header(self):
+        """Test column order is free and a missing id gets a new one"""
+        upload = "ip_address,bearing,speed,frequency,altitude,longitude,latitude\n10.0.0.9,6,5,4,3,2,1\n"
+        [[(line, target)]] = read_chunks(io.BytesIO(upload.encode()), "text/csv")
+        assert line == 2
+        assert (target.latitude, target.bearing, target.ip_address) == (1.0, 6.0, "10.0.0.9")
+        assert len(target.id) == 36
+
+    def test_csv_header_without_required_column_is_rejected(self):
+        """Test an unusable header fails the whole upload"""
+        with pytest.raises(ValueError, match="missing columns: ip_address"):
+            list(read_chunks(io.BytesIO(b"id,latitude,longitude,altitude,frequency,speed,bearing\n"), "text/csv"))
+
+    def test_ndjson_errors_are_reported_per_line(self):
+        """Test NDJSON lines are parsed on their own"""
+        valid = {"latitude": 1, "longitude": 2, "altitude": 3, "frequency": 4,
+                 "speed": 5, "bearing": 6, "ip_address": "10.0.0.1"}
+        lines = [json.dumps(valid), "", "{broken", "[1, 2]", json.dumps({**valid, "speed": "fast"})]
+        [chunk] = read_chunks(io.BytesIO("\n".join(lines).encode()), "application/x-ndjson")
+
+        assert isinstance(chunk[0][1], Target)
+        assert chunk[1][0] == 3 and chunk[1][1].startswith("Invalid JSON")
+        assert chunk[2] == (4, "Expected a JSON object")
+        assert chunk[3] == (5, "'fast' is not of type 'number' - 'speed'")
+
+    def test_rows_are_checked_by_the_compiled_validator(self):
+        """Test every violated constraint of a row is reported, as for a create request"""
+        upload = HEADER + "t1,95.0,2.0,3.0,0.0,,6.0,10.0.0.1\n"
+        [[(_, message)]] = read_chunks(io.BytesIO(upload.encode()), "text/csv")
+        assert message == (
+            "95.0 is greater than the maximum of 90 - 'latitude'; "
+            "0.0 is less than or equal to the minimum of 0 - 'frequency'; "
+            "'speed' is a required property"
+        )
+
+    def test_ids_with_control_characters_are_rejected(self):
+        """Test ids that would break the line-based CSV and snapshot files are rejected"""
+        valid = {"latitude": 1, "longitude": 2, "altitude": 3, "frequency": 4,
+                 "speed": 5, "bearing": 6, "ip_address": "10.0.0.1"}
+        ids = ("evil\nid", "tab\tid", "x" * 129, 7)
+        lines = [json.dumps({**valid, "id": target_id}) for target_id in ids]
+        [chunk] = read_chunks(io.BytesIO("\n".join(lines).encode()), "application/x-ndjson")
+        assert [message.split(",")[0] for _, message in chunk] == [
+            "Field 'id' must be at most 128 printable characters",
+        ] * 3 + ["Field 'id' must be a string"]
+
+
+class TestImportTargets:
+    """Tests for storing uploads through the service"""
+
+    def test_import_stores_chunks_and_reports_errors(self, service):
+        """Test valid rows are stored, replaced by id and recorded in history"""
+        service.repository.create(_target("t0", latitude=50.0))
+        upload = HEADER + "".join(f"t{n},1.0,2.0,3.0,4.0,5.0,6.0,10.0.0.{n}\n" for n in range(5))
+        upload += "bad,1.0,2.0,3.0,4.0,5.0,6.0,999.0.0.1\n"
+
+        report = service.import_targets(io.BytesIO(upload.encode()), "text/csv", chunk_rows=2)
+
+        assert (report.received, report.imported, report.rejected) == (6, 5, 1)
+        assert report.errors[0].line == 7 and "999.0.0.1" in report.errors[0].message
+        assert [t.id for t in service.get_all()] == ["t0", "t1", "t2", "t3", "t4"]
+        assert service.get_by_id("t0").latitude == 1.0
+        assert len(service.history.get_track("t3")) == 1
+
+        # The CSV exported with a snapshot holds the same rows, once each
+        service.repository.snapshot()
+        assert [row[0] for row in load_table(service.repository.csv_path, workers=1).rows()] == [
+            "t0", "t1", "t2", "t3", "t4",
+        ]
+
+    def test_reported_errors_are_capped(self, service, monkeypatch):
+        """Test rejected rows beyond MAX_REPORTED_ERRORS are only counted"""
+        monkeypatch.setattr("src.bl.target_service.MAX_REPORTED_ERRORS", 3)
+        upload = HEADER + "x,1.0,2.0,3.0,0.0,5.0,6.0,10.0.0.1\n" * 10
+
+        report = service.import_targets(io.BytesIO(upload.encode()), "text/csv", chunk_rows=4)
+        assert report.rejected == 10
+        assert [e.line for e in report.errors] == [2, 3, 4]
+
+
+class TestImportEndpoint:
+    """Tests for POST /api/v1/targets/import"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(src.main, "_connexion_app", None)
+        monkeypatch.setattr(targets_controller, "_service", None)
+        return src.main.connexion_app.test_client()
+
+    def test_csv_export_layout_is_imported(self, client):
+        """Test a targets.csv file can be uploaded as is"""
+        upload = HEADER + "a,1.0,2.0,3.0,4.0,5.0,6.0,10.0.0.1\nb,95.0,2.0,3.0,4.0,5.0,6.0,10.0.0.2\n"
+        response = client.post(
+            "/api/v1/targets/import", content=upload, headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "received": 2,
+            "imported": 1,
+            "rejected": 1,
+            "errors": [{"line": 3, "message": "95.0 is greater than the maximum of 90 - 'latitude'"}],
+        }
+        assert client.get("/api/v1/targets/a").status_code == 200
+
+    def test_ndjson_is_streamed_to_the_handler(self, client):
+        """Test NDJSON bodies are not parsed as one JSON document by connexion"""
+        row = {"latitude": 1, "longitude": 2, "altitude": 3, "frequency": 4,
+               "speed": 5, "bearing": 6, "ip_address": "10.0.0.1"}
+        upload = "\n".join(json.dumps({**row, "id": f"n{n}"}) for n in range(3))
+        response = client.post(
+            "/api/v1/targets/import", content=upload, headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        assert response.json()["imported"] == 3
+        assert len(client.get("/api/v1/targets").json()) == 3
+
+    def test_unreadable_upload_is_rejected(self, client):
+        """Test a CSV without the target columns returns 400"""
+        response = client.post(
+            "/api/v1/targets/import", content="a,b\n1,2\n", headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 400
+        assert "missing columns" in response.json()["details"]["message"]
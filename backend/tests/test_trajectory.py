@@ -0,0 +1,72 @@
+"""
+Unit tests for trajectory downsampling
+"""
+import math
+
+from src.models.position import PositionRecord
+from src.bl.trajectory import decimate, douglas_peucker
+
+
+def _track(count):
+    """Build a wavy track heading north, one point per second."""
+    return [
+        PositionRecord(
+            target_id="a",
+            timestamp=1000.0 + i,
+            latitude=10.0 + i * 0.001,
+            longitude=20.0 + 0.01 * math.sin(i / 10),
+            altitude=100.0,
+        )
+        for i in range(count)
+    ]
+
+
+class TestDecimate:
+    """Tests for time-bucket decimation"""
+
+    def test_respects_max_points(self):
+        """Test decimation returns at most max_points points"""
+        result = decimate(_track(1000), 50)
+        assert 2 <= len(result) <= 50
+
+    def test_keeps_endpoints(self):
+        """Test first and last points are always kept"""
+        track = _track(1000)
+        result = decimate(track, 50)
+        assert result[0] is track[0]
+        assert result[-1] is track[-1]
+
+    def test_short_track_unchanged(self):
+        """Test tracks shorter than max_points are returned as-is"""
+        track = _track(10)
+        assert decimate(track, 50) == track
+
+
+class TestDouglasPeucker:
+    """Tests for Douglas-Peucker simplification"""
+
+    def test_respects_max_points(self):
+        """Test simplification returns exactly max_points for a curvy track"""
+        result = douglas_peucker(_track(1000), max_points=40)
+        assert len(result) == 40
+
+    def test_straight_line_collapses_to_endpoints(self):
+        """Test collinear points are removed with any tolerance"""
+        track = [
+            PositionRecord("a", 1000.0 + i, 10.0 + i * 0.001, 20.0, 0.0) for i in range(100)
+        ]
+        result = douglas_peucker(track, tolerance=1.0)
+        assert result == [track[0], track[-1]]
+
+    def test_tolerance_bounds_error(self):
+        """Test a larger tolerance keeps fewer points"""
+        track = _track(1000)
+        fine = douglas_peucker(track, tolerance=10.0)
+        coarse = douglas_peucker(track, tolerance=200.0)
+        assert len(coarse) < len(fine) < len(track)
+
+    def test_points_stay_in_time_order(self):
+        """Test the simplified track is ordered by timestamp"""
+        result = douglas_peucker(_track(500), max_points=25)
+        timestamps = [r.timestamp for r in result]
+        assert timestamps == sorted(timestamps)